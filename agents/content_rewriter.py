@@ -2,44 +2,44 @@ __module_name__ = "content_rewriter"
 
 from backend.llm import get_chat_model
 from backend.prompts.content_rewriting import get_prompt
-from .utils import parse_markdown_response, validate_required_params
+from .utils import parse_markdown_response, validate_required_params, build_additional_context
 from typing import Dict, Optional, Any
 
 class ContentRewriterAgent:
     def __init__(self):
-        self.model = get_chat_model()
+        self.model = get_chat_model(agent="content_rewriter")
         self.prompt_template = get_prompt()
 
-    def rewrite(self, current_content: dict, profile_analysis_report: dict, target_role: Optional[str] = None, 
-                user_instructions: Optional[Dict[str, Any]] = None, conversation_context: Optional[str] = None) -> str:
+    def _build_prompt(self, current_content, profile_analysis_report, target_role=None,
+                      user_instructions=None, conversation_context=None) -> str:
         validate_required_params(
             current_content=current_content,
             profile_analysis_report=profile_analysis_report
         )
-        
-        # Extract instruction summary from structured data
-        instruction_text = None
-        if user_instructions and isinstance(user_instructions, dict):
-            instruction_text = user_instructions.get('summary')
-        elif user_instructions and isinstance(user_instructions, str):
-            instruction_text = user_instructions
-        
-        # Build dynamic context for the prompt
-        additional_context = ""
-        if instruction_text:
-            additional_context += f"\n\nSpecific user instructions: {instruction_text}"
-        if conversation_context:
-            additional_context += f"\n\nConversation context: {conversation_context}"
-            
-        prompt = self.prompt_template.format(
+        return self.prompt_template.format(
             current_linkedin_content=current_content,
             profile_analysis_report=profile_analysis_report,
             target_role=target_role or "the same role",
-            additional_context=additional_context
+            additional_context=build_additional_context(user_instructions, conversation_context)
         )
-        response = self.model.invoke(prompt)
+
+    def _parse(self, response) -> str:
         print(f"\nCONTENT REWRITER LLM RESPONSE:")
         print("=" * 80)
         print(response.content if hasattr(response, 'content') else str(response))
         print("=" * 80)
         return parse_markdown_response(response)
+
+    def rewrite(self, current_content: dict, profile_analysis_report: dict, target_role: Optional[str] = None,
+                user_instructions: Optional[Dict[str, Any]] = None, conversation_context: Optional[str] = None) -> str:
+        prompt = self._build_prompt(current_content, profile_analysis_report, target_role,
+                                    user_instructions, conversation_context)
+        response = self.model.invoke(prompt)
+        return self._parse(response)
+
+    async def arewrite(self, current_content: dict, profile_analysis_report: dict, target_role: Optional[str] = None,
+                       user_instructions: Optional[Dict[str, Any]] = None, conversation_context: Optional[str] = None) -> str:
+        prompt = self._build_prompt(current_content, profile_analysis_report, target_role,
+                                    user_instructions, conversation_context)
+        response = await self.model.ainvoke(prompt)
+        return self._parse(response)
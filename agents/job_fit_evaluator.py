@@ -2,43 +2,41 @@ __module_name__ = "job_fit_evaluator"
 
 from backend.llm import get_chat_model
 from backend.prompts.job_fit import get_prompt
-from .utils import parse_markdown_response, validate_required_params
+from .utils import parse_markdown_response, validate_required_params, build_additional_context
 from typing import Optional, Dict, Any
 
 class JobFitEvaluatorAgent:
     def __init__(self):
-        self.model = get_chat_model()
+        self.model = get_chat_model(agent="job_fit_evaluator")
         self.prompt_template = get_prompt()
 
-    def evaluate_fit(self, profile_analysis_report, job_description, user_instructions: Optional[Dict[str, Any]] = None, 
-                     conversation_context: Optional[str] = None) -> str:
+    def _build_prompt(self, profile_analysis_report, job_description, user_instructions=None,
+                      conversation_context=None) -> str:
         validate_required_params(
             profile_analysis_report=profile_analysis_report,
             job_description=job_description
         )
-        
-        # Extract instruction summary from structured data
-        instruction_text = None
-        if user_instructions and isinstance(user_instructions, dict):
-            instruction_text = user_instructions.get('summary')
-        elif user_instructions and isinstance(user_instructions, str):
-            instruction_text = user_instructions
-        
-        # Build dynamic context for the prompt
-        additional_context = ""
-        if instruction_text:
-            additional_context += f"\n\nSpecific user instructions: {instruction_text}"
-        if conversation_context:
-            additional_context += f"\n\nConversation context: {conversation_context}"
-            
-        prompt = self.prompt_template.format(
+        return self.prompt_template.format(
             profile_analysis_report=profile_analysis_report,
             target_job_description=job_description,
-            additional_context=additional_context
+            additional_context=build_additional_context(user_instructions, conversation_context)
         )
-        response = self.model.invoke(prompt)
+
+    def _parse(self, response) -> str:
         print(f"\nJOB FIT EVALUATOR LLM RESPONSE:")
         print("=" * 80)
         print(response.content if hasattr(response, 'content') else str(response))
         print("=" * 80)
         return parse_markdown_response(response)
+
+    def evaluate_fit(self, profile_analysis_report, job_description, user_instructions: Optional[Dict[str, Any]] = None,
+                     conversation_context: Optional[str] = None) -> str:
+        prompt = self._build_prompt(profile_analysis_report, job_description, user_instructions, conversation_context)
+        response = self.model.invoke(prompt)
+        return self._parse(response)
+
+    async def aevaluate_fit(self, profile_analysis_report, job_description, user_instructions: Optional[Dict[str, Any]] = None,
+                            conversation_context: Optional[str] = None) -> str:
+        prompt = self._build_prompt(profile_analysis_report, job_description, user_instructions, conversation_context)
+        response = await self.model.ainvoke(prompt)
+        return self._parse(response)
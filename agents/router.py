@@ -1,109 +1,263 @@
 __module_name__ = "router"
 
 from backend.llm import get_chat_model
-from backend.prompts.routing import get_prompt, get_post_processing_prompt, get_instruction_extraction_prompt
+from backend.logger import log_error
+from backend.prompts.routing import get_prompt, get_fused_prompt, get_post_processing_prompt, get_instruction_extraction_prompt
+from .schemas import FusedRouterDecision, RouterDecision
 from .utils import parse_llm_response, validate_required_params
 import json
+import os
+import threading
+import time
+
+# "structured": Gemini JSON mode constrained to the RouterDecision schema, validated with Pydantic
+# (free-form parsing only as a fallback); "text": free-form JSON parsed by parse_llm_response
+ROUTER_OUTPUT = os.getenv("ROUTER_OUTPUT", "structured").lower()
+
+ROUTER_ACTIONS = {
+    "CALL_ANALYZE", "CALL_REWRITE", "CALL_JOB_FIT", "CALL_GUIDE",
+    "PROCESS_AGENT_OUTPUT", "RESPOND_DIRECTLY", "AWAIT_URL", "AWAIT_CONFIRMATION",
+    "REQUEST_JOB_DESCRIPTION", "INVALID_INPUT", "INITIAL_WELCOME"
+}
+
+_parse_lock = threading.Lock()
+_parse_stats = {"responses": 0, "structured": 0, "text": 0, "text_fallback": 0, "failures": 0, "parse_s": 0.0}
+
+def _record_parse(outcome, elapsed):
+    with _parse_lock:
+        _parse_stats["responses"] += 1
+        _parse_stats[outcome] += 1
+        _parse_stats["parse_s"] += elapsed
+
+def get_router_parse_stats():
+    """How routing responses were parsed, the failure rate and mean parse time."""
+    with _parse_lock:
+        stats = dict(_parse_stats)
+    responses = stats.pop("responses")
+    parse_s = stats.pop("parse_s")
+    return {
+        "responses": responses,
+        **stats,
+        "failure_rate": stats["failures"] / responses if responses else 0.0,
+        "parse_ms_mean": parse_s / responses * 1000 if responses else 0.0,
+        "mode": ROUTER_OUTPUT,
+    }
+
+# JSON Schema types as Gemini's response_schema names them
+_GEMINI_TYPES = {"string": "STRING", "integer": "INTEGER", "number": "NUMBER",
+                 "boolean": "BOOLEAN", "array": "ARRAY", "object": "OBJECT"}
+
+def gemini_response_schema(json_schema, defs=None):
+    """
+    A Pydantic model_json_schema() in the Schema format of Gemini's generation_config:
+    references inlined, Optional[X] as a nullable X, and only the keywords Gemini accepts.
+    """
+    defs = json_schema.get("$defs", {}) if defs is None else defs
+    if "$ref" in json_schema:
+        return gemini_response_schema(defs[json_schema["$ref"].split("/")[-1]], defs)
+    options = json_schema.get("anyOf")
+    if options:
+        non_null = [option for option in options if option.get("type") != "null"]
+        converted = gemini_response_schema(non_null[0], defs)
+        if len(non_null) < len(options):
+            converted["nullable"] = True
+        return converted
+    converted = {"type_": _GEMINI_TYPES[json_schema.get("type", "string")]}
+    if "enum" in json_schema:
+        converted["enum"] = json_schema["enum"]
+        converted["format_"] = "enum"
+    if "description" in json_schema:
+        converted["description"] = json_schema["description"]
+    if "items" in json_schema:
+        converted["items"] = gemini_response_schema(json_schema["items"], defs)
+    if "properties" in json_schema:
+        converted["properties"] = {name: gemini_response_schema(prop, defs)
+                                   for name, prop in json_schema["properties"].items()}
+        if json_schema.get("required"):
+            converted["required"] = json_schema["required"]
+    return converted
+
+def structured_generation_config(schema):
+    """generation_config for Gemini's native JSON mode constrained to a Pydantic schema."""
+    try:
+        return {"response_mime_type": "application/json",
+                "response_schema": gemini_response_schema(schema.model_json_schema())}
+    except Exception as e:
+        log_error("router", f"Routing schema not supported by Gemini, using plain JSON mode: {e}")
+        return {"response_mime_type": "application/json"}
+
+def summarize_instruction_data(instruction_data):
+    """Build the structured instruction dict agents consume from raw extraction fields."""
+    # Build a comprehensive instruction summary
+    instruction_parts = []
+    
+    if instruction_data.get('style_preferences'):
+        instruction_parts.append(f"Style: {', '.join(instruction_data['style_preferences'])}")
+    
+    if instruction_data.get('content_focus'):
+        instruction_parts.append(f"Focus on: {', '.join(instruction_data['content_focus'])}")
+    
+    if instruction_data.get('tone_adjustments'):
+        instruction_parts.append(f"Tone: {', '.join(instruction_data['tone_adjustments'])}")
+    
+    if instruction_data.get('length_requirements') and instruction_data['length_requirements'] != "standard":
+        instruction_parts.append(f"Length: {instruction_data['length_requirements']}")
+    
+    if instruction_data.get('exclusions'):
+        instruction_parts.append(f"Avoid: {', '.join(instruction_data['exclusions'])}")
+    
+    if instruction_data.get('target_audience'):
+        instruction_parts.append(f"Target: {instruction_data['target_audience']}")
+    
+    if instruction_data.get('customization_context'):
+        instruction_parts.append(f"Context: {instruction_data['customization_context']}")
+    
+    # Return structured instructions if any were found
+    if instruction_parts:
+        return {
+            'summary': '; '.join(instruction_parts),
+            'raw_data': instruction_data,
+            'confidence': instruction_data.get('confidence_score', 0.0)
+        }
+    
+    return None
 
 class RoutingAgent:
     def __init__(self):
-        self.model = get_chat_model()
+        self.model = get_chat_model(agent="router")
+        self.extraction_model = get_chat_model(agent="instruction_extractor")
+        self.output_model = get_chat_model(agent="output_processor")
         self.prompt_template = get_prompt()
+        self.fused_prompt_template = get_fused_prompt()
+        self.route_kwargs = {}
+        self.fused_kwargs = {}
+        if ROUTER_OUTPUT == "structured":
+            self.route_kwargs = {"generation_config": structured_generation_config(RouterDecision)}
+            self.fused_kwargs = {"generation_config": structured_generation_config(FusedRouterDecision)}
 
-    def route(self, state, conversation_history, user_input):
+    def _build_route_prompt(self, state, conversation_history, user_input) -> str:
         validate_required_params(user_input=user_input)
-        prompt = self.prompt_template.format(
+        return self.prompt_template.format(
             state=state,
             conversation_history=conversation_history,
             user_input=user_input
         )
-        response = self.model.invoke(prompt)
+
+    def _parse_route(self, response, schema=RouterDecision) -> dict:
         print(f"\nROUTER LLM RESPONSE:")
         print("=" * 80)
         print(response.content if hasattr(response, 'content') else str(response))
         print("=" * 80)
-        parsed_response = parse_llm_response(response)
-        actions = {
-            "CALL_ANALYZE", "CALL_REWRITE", "CALL_JOB_FIT", "CALL_GUIDE",
-            "PROCESS_AGENT_OUTPUT", "RESPOND_DIRECTLY", "AWAIT_URL", "AWAIT_CONFIRMATION",
-            "REQUEST_JOB_DESCRIPTION", "INVALID_INPUT", "INITIAL_WELCOME"
-        }
-        if parsed_response.get('current_router_action') not in actions:
+        start = time.perf_counter()
+        outcome = "failures"
+        try:
+            if ROUTER_OUTPUT == "structured":
+                try:
+                    content = response.content if hasattr(response, 'content') else response
+                    # Only the fields the model actually returned, like the free-form parser
+                    parsed_response = schema.model_validate_json(content).model_dump(exclude_unset=True)
+                    outcome = "structured"
+                except ValueError:
+                    parsed_response = parse_llm_response(response)
+                    outcome = "text_fallback"
+            else:
+                parsed_response = parse_llm_response(response)
+                outcome = "text"
+        finally:
+            _record_parse(outcome, time.perf_counter() - start)
+        if parsed_response.get('current_router_action') not in ROUTER_ACTIONS:
             parsed_response['current_router_action'] = 'RESPOND_DIRECTLY'
         return parsed_response
-    
-    def extract_user_instructions(self, user_input, conversation_history, current_task="general"):
-        """Extract specific user instructions using LLM-based analysis for robust intent understanding."""
+
+    def route(self, state, conversation_history, user_input):
+        prompt = self._build_route_prompt(state, conversation_history, user_input)
+        response = self.model.invoke(prompt, **self.route_kwargs)
+        return self._parse_route(response)
+
+    async def aroute(self, state, conversation_history, user_input):
+        prompt = self._build_route_prompt(state, conversation_history, user_input)
+        response = await self.model.ainvoke(prompt, **self.route_kwargs)
+        return self._parse_route(response)
+
+    def _build_fused_prompt(self, state, conversation_history, user_input) -> str:
+        validate_required_params(user_input=user_input)
+        return self.fused_prompt_template.format(
+            state=state,
+            conversation_history=conversation_history,
+            user_input=user_input
+        )
+
+    def _split_fused(self, parsed_response):
+        """Separate the routing decision from the instructions extracted in the same response."""
+        instruction_data = parsed_response.pop('user_instructions', None)
+        if not isinstance(instruction_data, dict) or not instruction_data.get('has_specific_instructions', False):
+            return parsed_response, None
+        return parsed_response, summarize_instruction_data(instruction_data)
+
+    def route_fused(self, state, conversation_history, user_input):
+        """Route and extract user instructions with a single model call. Returns (routing_response, instructions)."""
+        prompt = self._build_fused_prompt(state, conversation_history, user_input)
+        response = self.model.invoke(prompt, **self.fused_kwargs)
+        return self._split_fused(self._parse_route(response, FusedRouterDecision))
+
+    async def aroute_fused(self, state, conversation_history, user_input):
+        prompt = self._build_fused_prompt(state, conversation_history, user_input)
+        response = await self.model.ainvoke(prompt, **self.fused_kwargs)
+        return self._split_fused(self._parse_route(response, FusedRouterDecision))
+
+    def _build_extraction_prompt(self, user_input, conversation_history, current_task) -> str:
+        prompt_template = get_instruction_extraction_prompt()
+        return prompt_template.format(
+            user_input=user_input,
+            conversation_context=conversation_history or "No prior conversation",
+            current_task=current_task
+        )
+
+    def _parse_instructions(self, response, user_input):
+        response_content = response.content if hasattr(response, 'content') else str(response)
+        print(f"\nROUTER INSTRUCTION EXTRACTION LLM RESPONSE:")
+        print("=" * 80)
+        print(response_content)
+        print("=" * 80)
+        
+        # Parse the LLM response as JSON
         try:
-            prompt_template = get_instruction_extraction_prompt()
-            extraction_prompt = prompt_template.format(
-                user_input=user_input,
-                conversation_context=conversation_history or "No prior conversation",
-                current_task=current_task
-            )
-            
-            response = self.model.invoke(extraction_prompt)
-            response_content = response.content if hasattr(response, 'content') else str(response)
-            print(f"\nROUTER INSTRUCTION EXTRACTION LLM RESPONSE:")
-            print("=" * 80)
-            print(response_content)
-            print("=" * 80)
+            instruction_data = json.loads(response_content)
             
-            # Parse the LLM response as JSON
-            try:
-                instruction_data = json.loads(response_content)
-                
-                # Validate the response structure
-                if not isinstance(instruction_data, dict) or not instruction_data.get('has_specific_instructions', False):
-                    return None
-                
-                # Build a comprehensive instruction summary
-                instruction_parts = []
-                
-                if instruction_data.get('style_preferences'):
-                    instruction_parts.append(f"Style: {', '.join(instruction_data['style_preferences'])}")
-                
-                if instruction_data.get('content_focus'):
-                    instruction_parts.append(f"Focus on: {', '.join(instruction_data['content_focus'])}")
-                
-                if instruction_data.get('tone_adjustments'):
-                    instruction_parts.append(f"Tone: {', '.join(instruction_data['tone_adjustments'])}")
-                
-                if instruction_data.get('length_requirements') and instruction_data['length_requirements'] != "standard":
-                    instruction_parts.append(f"Length: {instruction_data['length_requirements']}")
-                
-                if instruction_data.get('exclusions'):
-                    instruction_parts.append(f"Avoid: {', '.join(instruction_data['exclusions'])}")
-                
-                if instruction_data.get('target_audience'):
-                    instruction_parts.append(f"Target: {instruction_data['target_audience']}")
-                
-                if instruction_data.get('customization_context'):
-                    instruction_parts.append(f"Context: {instruction_data['customization_context']}")
-                
-                # Return structured instructions if any were found
-                if instruction_parts:
-                    return {
-                        'summary': '; '.join(instruction_parts),
-                        'raw_data': instruction_data,
-                        'confidence': instruction_data.get('confidence_score', 0.0)
-                    }
-                
+            # Validate the response structure
+            if not isinstance(instruction_data, dict) or not instruction_data.get('has_specific_instructions', False):
                 return None
-                
-            except json.JSONDecodeError:
-                # If JSON parsing fails, fall back to extracting key phrases from the response
-                if "has_specific_instructions" in response_content.lower() and "true" in response_content.lower():
-                    return {
-                        'summary': f"User instructions detected: {user_input[:100]}...",
-                        'raw_data': {'fallback': True},
-                        'confidence': 0.5
-                    }
-                return None
-                
+            
+            return summarize_instruction_data(instruction_data)
+            
+        except json.JSONDecodeError:
+            # If JSON parsing fails, fall back to extracting key phrases from the response
+            if "has_specific_instructions" in response_content.lower() and "true" in response_content.lower():
+                return {
+                    'summary': f"User instructions detected: {user_input[:100]}...",
+                    'raw_data': {'fallback': True},
+                    'confidence': 0.5
+                }
+            return None
+
+    def extract_user_instructions(self, user_input, conversation_history, current_task="general"):
+        """Extract specific user instructions using LLM-based analysis for robust intent understanding."""
+        try:
+            extraction_prompt = self._build_extraction_prompt(user_input, conversation_history, current_task)
+            response = self.extraction_model.invoke(extraction_prompt)
+            return self._parse_instructions(response, user_input)
         except Exception as e:
             # Fallback to basic keyword detection if LLM fails
             return self._fallback_instruction_extraction(user_input)
+
+    async def aextract_user_instructions(self, user_input, conversation_history, current_task="general"):
+        """Async variant of extract_user_instructions."""
+        try:
+            extraction_prompt = self._build_extraction_prompt(user_input, conversation_history, current_task)
+            response = await self.extraction_model.ainvoke(extraction_prompt)
+            return self._parse_instructions(response, user_input)
+        except Exception as e:
+            return self._fallback_instruction_extraction(user_input)
     
     def _fallback_instruction_extraction(self, user_input):
         """Fallback method for instruction extraction if LLM approach fails."""
@@ -132,30 +286,62 @@ class RoutingAgent:
         
         return None
     
+    def _build_processing_prompt(self, agent_output, agent_type, conversation_context, user_instructions) -> str:
+        # Extract instruction summary from structured data
+        instruction_text = None
+        if user_instructions and isinstance(user_instructions, dict):
+            instruction_text = user_instructions.get('summary')
+        elif user_instructions and isinstance(user_instructions, str):
+            instruction_text = user_instructions
+        
+        # Use the prompt template from routing prompts module
+        prompt_template = get_post_processing_prompt()
+        return prompt_template.format(
+            agent_type=agent_type,
+            agent_output=agent_output,
+            conversation_context=conversation_context,
+            user_instructions=instruction_text or "None"
+        )
+
+    def _processed_text(self, response) -> str:
+        print(f"\nROUTER OUTPUT PROCESSING LLM RESPONSE:")
+        print("=" * 80)
+        print(response.content if hasattr(response, 'content') else str(response))
+        print("=" * 80)
+        return response.content if hasattr(response, 'content') else str(response)
+
     def process_agent_output(self, agent_output, agent_type, conversation_context, user_instructions):
         """Process and contextualize agent output for user presentation."""
         try:
-            # Extract instruction summary from structured data
-            instruction_text = None
-            if user_instructions and isinstance(user_instructions, dict):
-                instruction_text = user_instructions.get('summary')
-            elif user_instructions and isinstance(user_instructions, str):
-                instruction_text = user_instructions
-            
-            # Use the prompt template from routing prompts module
-            prompt_template = get_post_processing_prompt()
-            processing_prompt = prompt_template.format(
-                agent_type=agent_type,
-                agent_output=agent_output,
-                conversation_context=conversation_context,
-                user_instructions=instruction_text or "None"
-            )
-            
-            response = self.model.invoke(processing_prompt)
-            print(f"\nROUTER OUTPUT PROCESSING LLM RESPONSE:")
-            print("=" * 80)
-            print(response.content if hasattr(response, 'content') else str(response))
-            print("=" * 80)
-            return response.content if hasattr(response, 'content') else str(response)
+            processing_prompt = self._build_processing_prompt(agent_output, agent_type, conversation_context, user_instructions)
+            response = self.output_model.invoke(processing_prompt)
+            return self._processed_text(response)
+        except Exception as e:
+            return f"I've completed the {agent_type} analysis. The detailed results are available, and I'm ready to help you with next steps. What would you like to explore further?"
+
+    async def aprocess_agent_output(self, agent_output, agent_type, conversation_context, user_instructions):
+        """Async variant of process_agent_output."""
+        try:
+            processing_prompt = self._build_processing_prompt(agent_output, agent_type, conversation_context, user_instructions)
+            response = await self.output_model.ainvoke(processing_prompt)
+            return self._processed_text(response)
+        except Exception as e:
+            return f"I've completed the {agent_type} analysis. The detailed results are available, and I'm ready to help you with next steps. What would you like to explore further?"
+
+    def stream_agent_output(self, agent_output, agent_type, conversation_context, user_instructions):
+        """Like process_agent_output, but streams the reply so the first words reach the user sooner."""
+        try:
+            processing_prompt = self._build_processing_prompt(agent_output, agent_type, conversation_context, user_instructions)
+            chunks = [chunk.content for chunk in self.output_model.stream(processing_prompt)]
+            return self._processed_text("".join(c if isinstance(c, str) else str(c) for c in chunks))
+        except Exception as e:
+            return f"I've completed the {agent_type} analysis. The detailed results are available, and I'm ready to help you with next steps. What would you like to explore further?"
+
+    async def astream_agent_output(self, agent_output, agent_type, conversation_context, user_instructions):
+        """Async variant of stream_agent_output."""
+        try:
+            processing_prompt = self._build_processing_prompt(agent_output, agent_type, conversation_context, user_instructions)
+            chunks = [chunk.content async for chunk in self.output_model.astream(processing_prompt)]
+            return self._processed_text("".join(c if isinstance(c, str) else str(c) for c in chunks))
         except Exception as e:
-            return f"I've completed the {agent_type} analysis. The detailed results are available, and I'm ready to help you with next steps. What would you like to explore further?"
\ No newline at end of file
+            return f"I've completed the {agent_type} analysis. The detailed results are available, and I'm ready to help you with next steps. What would you like to explore further?"
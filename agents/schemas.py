@@ -0,0 +1,61 @@
+__module_name__ = "schemas"
+
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, field_validator
+
+# Kept in sync with RouterAction in backend/orchestrator/state_schema.py
+RouterActionName = Literal[
+    "INITIAL_WELCOME", "AWAIT_URL", "CALL_ANALYZE", "CALL_REWRITE", "CALL_JOB_FIT",
+    "CALL_GUIDE", "PROCESS_AGENT_OUTPUT", "RESPOND_DIRECTLY", "AWAIT_CONFIRMATION",
+    "REQUEST_JOB_DESCRIPTION", "INVALID_INPUT",
+]
+AgentName = Literal["analyze", "rewrite", "job_fit", "guide"]
+
+def _null_to_none(value):
+    # The prompt's format shows "null" as a string option; models sometimes echo it literally
+    if isinstance(value, str) and value.strip().lower() in ("", "null", "none"):
+        return None
+    return value
+
+class InstructionData(BaseModel):
+    """The user_instructions object of the fused routing response."""
+    has_specific_instructions: bool = False
+    style_preferences: List[str] = []
+    content_focus: List[str] = []
+    tone_adjustments: List[str] = []
+    length_requirements: str = "standard"
+    exclusions: List[str] = []
+    target_audience: Optional[str] = None
+    customization_context: Optional[str] = None
+    raw_instructions: Optional[str] = None
+    confidence_score: float = 0.0
+
+class RouterDecision(BaseModel):
+    """Routing response, mirroring the output format of the routing prompt."""
+    model_config = ConfigDict(extra="allow")
+
+    current_router_action: RouterActionName
+    current_bot_response: str
+    linkedin_url: Optional[str] = None
+    is_profile_analyzed: bool = False
+    awaiting_user_confirmation: bool = False
+    awaiting_job_description: bool = False
+    proposed_next_action: Optional[str] = None
+    last_agent_called: Optional[AgentName] = None
+    user_requested_update: bool = False
+
+    @field_validator("current_router_action", mode="before")
+    @classmethod
+    def _known_action(cls, value):
+        # Same fallback the text parser applies to unknown actions
+        return value if value in RouterActionName.__args__ else "RESPOND_DIRECTLY"
+
+    @field_validator("linkedin_url", "proposed_next_action", "last_agent_called", mode="before")
+    @classmethod
+    def _nullable(cls, value):
+        return _null_to_none(value)
+
+class FusedRouterDecision(RouterDecision):
+    """Routing response with the instructions extracted in the same call."""
+    user_instructions: Optional[InstructionData] = None
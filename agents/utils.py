@@ -194,3 +194,28 @@ def validate_required_params(**kwargs):
             raise ValueError(f"Required parameter '{param_name}' cannot be empty")
         if isinstance(param_value, dict) and not param_value:
             raise ValueError(f"Required parameter '{param_name}' cannot be empty")
+
+def build_additional_context(user_instructions=None, conversation_context=None):
+    """
+    Build the dynamic context block appended to agent prompts.
+    
+    Args:
+        user_instructions: Structured instructions dict (uses its 'summary') or a plain string
+        conversation_context: Recent conversation summary for continuity
+        
+    Returns:
+        str: Context text, empty if there is nothing to add
+    """
+    # Extract instruction summary from structured data
+    instruction_text = None
+    if user_instructions and isinstance(user_instructions, dict):
+        instruction_text = user_instructions.get('summary')
+    elif user_instructions and isinstance(user_instructions, str):
+        instruction_text = user_instructions
+    
+    additional_context = ""
+    if instruction_text:
+        additional_context += f"\n\nSpecific user instructions: {instruction_text}"
+    if conversation_context:
+        additional_context += f"\n\nConversation context: {conversation_context}"
+    return additional_context
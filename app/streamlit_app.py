@@ -19,6 +19,9 @@ import streamlit as st
 import uuid
 import json
 import time
+
+# Stream agent reports and replies token by token instead of waiting behind a spinner
+STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() in ("1", "true", "yes", "on")
 # Delay imports that require API keys until after configuration
 
 # from app.ui_utils import load_svg_icon
@@ -84,25 +87,23 @@ def clear_streamlit_cache():
 # Clear cache immediately when the app starts, before any other initialization
 clear_streamlit_cache()
 
-# Additional startup cache clearing for a completely fresh session
-try:
-    # Clear backend memory on app startup to prevent cross-session contamination
-    from backend.memory import clear_memory
-    clear_memory()
-except:
-    pass  # Ignore if backend not yet available
+# Backend memory is not cleared here: Streamlit reruns this script on every interaction,
+# and the checkpointer is shared by every session (each turn resumes from its thread).
+# Sessions are keyed by a fresh uuid, and logout/reset delete only their own thread.
 
 def clear_all_streamlit_state(clear_session_state=False):
     """Clear all Streamlit cache and optionally session state for a completely fresh start"""
     # First clear all caches
     clear_streamlit_cache()
     
-    # Clear backend persistent state that could cause cross-session issues
+    # Clear this session's persistent state; the checkpointer is shared with every other
+    # session (and with CHECKPOINTER=sqlite, with every replica on the volume)
     try:
-        # Clear LangGraph memory saver
-        from backend.memory import clear_memory
-        clear_memory()
-        print("Backend memory cleared successfully")
+        session_id = st.session_state.get("session_id") if hasattr(st, 'session_state') else None
+        if session_id:
+            from backend.memory import delete_thread
+            delete_thread(session_id)
+            print("Session checkpoints cleared successfully")
     except Exception as e:
         print(f"Warning: Could not clear backend memory: {e}")
     
@@ -172,6 +173,9 @@ class LinkedInGenieStreamlit:
         if 'graph_runner' not in st.session_state:
             st.session_state.graph_runner = None
         
+        if 'full_report_runner' not in st.session_state:
+            st.session_state.full_report_runner = None
+        
         if 'messages' not in st.session_state:
             st.session_state.messages = []
         
@@ -184,6 +188,9 @@ class LinkedInGenieStreamlit:
         if 'pending_message' not in st.session_state:
             st.session_state.pending_message = None
         
+        if 'pending_full_report' not in st.session_state:
+            st.session_state.pending_full_report = False
+        
         if 'processing' not in st.session_state:
             st.session_state.processing = False
         
@@ -334,6 +341,10 @@ class LinkedInGenieStreamlit:
 
     def _check_existing_api_keys(self):
         """Check if API keys already exist and are valid"""
+        # The offline fake and cassette-replay backends need no keys
+        if os.getenv("LLM_BACKEND", "gemini").lower() in ("fake", "replay"):
+            return True
+
         # Check if .env file exists first - if not, API keys are definitely not configured
         env_path = os.path.join(project_root, '.env')
         if not os.path.exists(env_path):
@@ -739,6 +750,25 @@ APIFY_API_TOKEN={apify_api_token if apify_api_token else 'your_apify_api_token_h
                 if st.button("Full Reset (Dev)", help="Complete reset of all caches and state for development", use_container_width=True, type="secondary", icon=":material/refresh:"):
                     self._full_reset_for_development()
 
+                # LLM usage recorded by the graph nodes in debug_info
+                from backend.call_metrics import get_session_metrics
+                usage = get_session_metrics(st.session_state.bot_state.debug_info)
+                if usage["turns"]:
+                    totals = usage["totals"]
+                    st.markdown("")
+                    st.markdown("**LLM Usage (this session)**")
+                    st.caption(
+                        f"{totals['calls']} calls over {usage['turns']} turns · "
+                        f"{totals['prompt_tokens']:,} in / {totals['output_tokens']:,} out tokens · "
+                        f"{totals['wall_s']:.1f}s model time · ~${totals['cost_usd']:.4f}"
+                    )
+                    st.dataframe(
+                        [{"node": node, "calls": n["calls"], "tokens": n["prompt_tokens"] + n["output_tokens"],
+                          "seconds": round(n["node_wall_s"], 2), "retries": n["retries"]}
+                         for node, n in usage["nodes"].items()],
+                        hide_index=True, use_container_width=True,
+                    )
+
     def _validate_linkedin_url(self, user_input):
         """Validate if LinkedIn URL contains valid keywords"""
         valid_keywords = ["arjun-srivastava-ml", "michael-rodriguez-cfa", "sarah-chen-architect"]
@@ -794,7 +824,14 @@ APIFY_API_TOKEN={apify_api_token if apify_api_token else 'your_apify_api_token_h
         # Clear environment variables to remove API keys from memory
         os.environ.pop('GOOGLE_API_KEY', None)
         os.environ.pop('APIFY_API_TOKEN', None)
-        
+
+        # Drop shared chat model clients that were built with the removed key
+        try:
+            from backend.llm import clear_chat_models
+            clear_chat_models()
+        except Exception as e:
+            print(f"Warning: Could not clear chat models: {e}")
+
         # Use the comprehensive clearing function to clear everything
         clear_all_streamlit_state(clear_session_state=True)
     
@@ -842,8 +879,8 @@ APIFY_API_TOKEN={apify_api_token if apify_api_token else 'your_apify_api_token_h
                 return False
         return True
 
-    def _process_user_input(self, user_input):
-        """Process user input through the graph runner"""
+    def _prepare_user_input(self, user_input):
+        """Validate the input and load it into the bot state. Returns an error message or None."""
         # Initialize graph runner if not already done (after API keys are configured)
         if not self._initialize_graph_runner():
             return "Failed to initialize the assistant. Please check your API keys."
@@ -873,38 +910,101 @@ APIFY_API_TOKEN={apify_api_token if apify_api_token else 'your_apify_api_token_h
             "role": "user", 
             "content": user_input
         })
+        return None
+
+    def _apply_graph_result(self, delta):
+        """Apply the fields the graph changed this turn to the bot state and return the bot response"""
+        from backend.orchestrator.resume import apply_delta
+        apply_delta(st.session_state.bot_state, delta)
+        
+        # Get bot response
+        bot_response = st.session_state.bot_state.current_bot_response or "I'm processing your request..."
+        
+        # Add to conversation history (the router usually recorded the reply already)
+        history = st.session_state.bot_state.conversation_history
+        if bot_response and not (history and history[-1].get("content") == bot_response):
+            st.session_state.bot_state.conversation_history.append({
+                "role": "assistant",
+                "content": bot_response
+            })
+        
+        return bot_response
+
+    def _record_graph_error(self, e):
+        error_msg = f"Sorry, I encountered an error: {str(e)}"
+        st.session_state.bot_state.conversation_history.append({
+            "role": "assistant",
+            "content": error_msg
+        })
+        return error_msg
+
+    def _process_user_input(self, user_input, full_report=False):
+        """Process user input through the graph runner (or the parallel full-report graph)"""
+        error_msg = self._prepare_user_input(user_input)
+        if error_msg:
+            return error_msg
         
         # Process through graph runner
         try:
-            updated_state_dict = st.session_state.graph_runner.invoke(
-                st.session_state.bot_state.model_dump(),
-                config={"configurable": {"thread_id": st.session_state.bot_state.session_id}},
-            )
-            ProfileBotState = _get_profile_bot_state()
-            if ProfileBotState:
-                st.session_state.bot_state = ProfileBotState.model_validate(updated_state_dict)
-            else:
-                return "Error: Could not load bot state. Please check your setup."
-            
-            # Get bot response
-            bot_response = st.session_state.bot_state.current_bot_response or "I'm processing your request..."
-            
-            # Add to conversation history
-            if bot_response:
-                st.session_state.bot_state.conversation_history.append({
-                    "role": "assistant",
-                    "content": bot_response
-                })
-            
-            return bot_response
+            if full_report and st.session_state.full_report_runner is None:
+                from backend.orchestrator.langgraph_graph import get_full_report_graph_runner
+                st.session_state.full_report_runner = get_full_report_graph_runner()
+            graph_runner = st.session_state.full_report_runner if full_report else st.session_state.graph_runner
+            # The checkpointer holds the rest of the state under this session's thread
+            from backend.orchestrator.resume import client_input, resume_turn
+            delta = resume_turn(graph_runner, client_input(st.session_state.bot_state))
+            return self._apply_graph_result(delta)
             
         except Exception as e:
-            error_msg = f"Sorry, I encountered an error: {str(e)}"
-            st.session_state.bot_state.conversation_history.append({
-                "role": "assistant",
-                "content": error_msg
-            })
+            return self._record_graph_error(e)
+
+    def _stream_user_input(self, user_input):
+        """Process user input through the graph runner, streaming tokens into the current chat message"""
+        error_msg = self._prepare_user_input(user_input)
+        if error_msg:
+            st.write(error_msg)
             return error_msg
+        
+        from backend.orchestrator.resume import client_input, state_delta
+        from backend.orchestrator.streaming import stream_turn, REPORT_NODES
+        
+        result = {"before": None, "state": None}
+        report = {"status": None, "placeholder": None, "label": None, "text": "", "done": False}
+        
+        def response_tokens():
+            for kind, payload in stream_turn(
+                st.session_state.graph_runner,
+                client_input(st.session_state.bot_state),
+                config={"configurable": {"thread_id": st.session_state.bot_state.session_id}},
+            ):
+                if kind == "state":
+                    # The first snapshot is the checkpointed state with this turn's input applied
+                    if result["before"] is None:
+                        result["before"] = payload
+                    result["state"] = payload
+                elif kind == "report":
+                    node, text = payload
+                    # Show the agent's report as it is written; the full copy lands in the sidebar
+                    if report["status"] is None:
+                        report["label"] = REPORT_NODES[node]
+                        report["status"] = st.status(f"{report['label']} is working...", expanded=True)
+                        report["placeholder"] = report["status"].empty()
+                    report["text"] += text
+                    report["placeholder"].markdown(report["text"])
+                elif kind == "response":
+                    if report["status"] is not None and not report["done"]:
+                        report["status"].update(label=f"{report['label']} finished", state="complete", expanded=False)
+                        report["done"] = True
+                    yield payload
+        
+        try:
+            st.write_stream(response_tokens())
+            if result["state"] is None:
+                return self._record_graph_error("No state returned from the assistant")
+            return self._apply_graph_result(state_delta(result["before"], result["state"]))
+        
+        except Exception as e:
+            return self._record_graph_error(e)
 
     def _initialize_bot_state_if_needed(self):
         """Initialize bot state after API keys are configured"""
@@ -1112,14 +1212,23 @@ APIFY_API_TOKEN={apify_api_token if apify_api_token else 'your_apify_api_token_h
         if st.session_state.pending_message and not st.session_state.processing:
             st.session_state.processing = True
             with chat_container:
-                with st.spinner("Processing..."):
-                    bot_response = self._process_user_input(st.session_state.pending_message)
+                if st.session_state.pending_full_report:
+                    # Report tokens of the parallel agents would interleave, so no streaming here
+                    with st.spinner("Preparing your full report..."):
+                        bot_response = self._process_user_input(st.session_state.pending_message, full_report=True)
+                elif STREAM_RESPONSES:
+                    with st.chat_message("assistant", avatar=bot_path):
+                        bot_response = self._stream_user_input(st.session_state.pending_message)
+                else:
+                    with st.spinner("Processing..."):
+                        bot_response = self._process_user_input(st.session_state.pending_message)
             
             # Add bot response to session
             st.session_state.messages.append({"role": "assistant", "content": bot_response})
             
             # Clear pending message and processing flag
             st.session_state.pending_message = None
+            st.session_state.pending_full_report = False
             st.session_state.processing = False
             st.rerun()
         
@@ -1127,7 +1236,7 @@ APIFY_API_TOKEN={apify_api_token if apify_api_token else 'your_apify_api_token_h
         # st.markdown("#### Quick Actions")
         
         # Create more compact columns for buttons with reduced spacing
-        col1, col2, col3, col4 = st.columns(4, gap="small")
+        col1, col2, col3, col4, col5 = st.columns(5, gap="small")
         
         with col1:
             if st.button("Demo Profile", key="demo_btn", help="Load Michael Rodriguez demo profile", use_container_width=True):
@@ -1146,19 +1255,24 @@ APIFY_API_TOKEN={apify_api_token if apify_api_token else 'your_apify_api_token_h
             if st.button("Job Fit Check", key="jobfit_btn", help="Evaluate job fit", use_container_width=True):
                 self._handle_user_input("Evaluate my job fit")
         
+        with col5:
+            if st.button("Full Report", key="full_report_btn", help="Run the rewrite, job fit and career guidance agents at once", use_container_width=True):
+                self._handle_user_input("Give me the full report", full_report=True)
+        
         # Chat input
         user_input = st.chat_input("Type your message here...")
         
         if user_input:
             self._handle_user_input(user_input)
 
-    def _handle_user_input(self, user_input):
+    def _handle_user_input(self, user_input, full_report=False):
         """Handle user input and update the chat"""
         # Add user message to session immediately
         st.session_state.messages.append({"role": "user", "content": user_input})
         
         # Set pending message for processing on next run
         st.session_state.pending_message = user_input
+        st.session_state.pending_full_report = full_report
         
         # Rerun to show the user's message and trigger processing
         st.rerun()
@@ -1236,6 +1350,8 @@ APIFY_API_TOKEN={apify_api_token if apify_api_token else 'your_apify_api_token_h
 
     def _test_api_keys(self):
         """Test if the configured API keys are working"""
+        if os.getenv("LLM_BACKEND", "gemini").lower() in ("fake", "replay"):
+            return True, "Using an offline model backend"
         try:
             # Test Google API key (only required one for now)
             google_key = os.getenv('GOOGLE_API_KEY')
@@ -0,0 +1,367 @@
+__module_name__ = "benchmark"
+
+# End-to-end latency benchmark for the LangGraph orchestration.
+#
+# Runs a scripted conversation through the compiled graph the same way the
+# Streamlit app does (model_dump in, model_validate out) and reports per-turn
+# wall time plus the state serialization overhead. Meant to be run with the
+# offline model backend, e.g.:
+#
+#     LLM_BACKEND=fake FAKE_LLM_LATENCY=fixed:0 PYTHONPATH=. python -m backend.benchmark
+#
+# or against a cassette recorded from live Gemini traffic:
+#
+#     LLM_BACKEND=record PYTHONPATH=. python -m backend.benchmark --profile all --sessions 1
+#     LLM_BACKEND=replay LLM_CASSETTE_REPLAY_TIMING=true PYTHONPATH=. python -m backend.benchmark --profile all --sessions 1
+#
+# --concurrent runs every session at once through the async graph runner.
+# Set ROUTER_MODE=split|fused to A/B the routing prompt; "routes" in the
+# output is the routing outcome per turn for comparing the two. Likewise
+# ROUTER_STATE_VIEW=full|compact for the state block of that prompt.
+# --repeat N makes sessions N times longer; compare CONVERSATION_MEMORY=full
+# and bounded with "router_prompt_tokens_by_turn".
+# --full-report does each session's work in one turn of the parallel
+# full-report graph; compare its "session_s" with the chat script's.
+# --serde compares checkpoint serializers (bytes, dumps/loads time) on the
+# checkpoints the sessions wrote.
+# --resume sends only the new message and applies the returned delta, like the
+# app does now; "model_dump_s"/"model_validate_s" then time building the input
+# and applying the delta.
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import statistics
+import time
+import uuid
+from typing import Dict, Any, List, Optional
+
+# Sample profiles in linkedin/ paired with their job descriptions
+SAMPLE_PROFILES = {
+    "michael": ("https://www.linkedin.com/in/michael-rodriguez-cfa/", "jd_for_michael_rodrigues.md"),
+    "arjun": ("https://www.linkedin.com/in/arjun-srivastava-ml/", "jd_for_arjun_srivastava.md"),
+    "sarah": ("https://www.linkedin.com/in/sarah-chen-architect/", "jd_for_sarah_chen.md"),
+}
+
+def _job_description(profile: str) -> str:
+    _, jd_file = SAMPLE_PROFILES[profile]
+    try:
+        with open(os.path.join("linkedin", jd_file), "r", encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return "Senior Financial Analyst. Requirements: 5+ years experience, CFA, " * 10
+
+def default_script(profile: str = "michael") -> List[str]:
+    profile_url, _ = SAMPLE_PROFILES[profile]
+    job_description = _job_description(profile)
+    return [
+        profile_url,
+        "Help me rewrite my profile content",
+        "Evaluate my job fit",
+        job_description,
+        "Can you give me some career advice?",
+    ]
+
+FULL_REPORT_REQUEST = "Give me the full package: analysis, rewrites, job fit and career guidance"
+
+def _new_session(session_id: Optional[str]):
+    from backend.orchestrator.state_schema import ProfileBotState
+
+    # The session id is part of the router prompt, so cassette replays need it stable
+    state = ProfileBotState(session_id=session_id or str(uuid.uuid4()))
+    return state, {"configurable": {"thread_id": state.session_id}}
+
+def _prepare_turn(state, user_input: str) -> None:
+    from linkedin.profiles import get_mock_profile
+
+    if "linkedin.com/in/" in user_input:
+        state.linkedin_url = user_input
+        state.linkedin_data = get_mock_profile(linkedin_url=user_input)
+    state.user_input = user_input
+    state.conversation_history.append({"role": "user", "content": user_input})
+
+def _graph_input(state, resume: bool) -> Dict[str, Any]:
+    from backend.orchestrator.resume import client_input
+
+    return client_input(state) if resume else state.model_dump()
+
+def _finish_turn(user_input: str, updated, start: float, dump_time: float, graph_time: float, resumed_state=None):
+    from backend.orchestrator.resume import apply_delta
+    from backend.orchestrator.state_schema import ProfileBotState
+
+    validate_start = time.perf_counter()
+    if resumed_state is not None:
+        state = apply_delta(resumed_state, updated)
+    else:
+        state = ProfileBotState.model_validate(updated)
+    validate_time = time.perf_counter() - validate_start
+    router = state.debug_info.get("turn", {}).get("nodes", {}).get("router", {})
+    return state, {
+        "input": user_input[:40],
+        "action": state.current_router_action,
+        "last_agent": state.last_agent_called,
+        "turn_s": time.perf_counter() - start,
+        "graph_s": graph_time,
+        "router_s": router.get("node_wall_s", 0.0),
+        "router_calls": router.get("calls", 0),
+        "router_prompt_tokens": router.get("prompt_tokens", 0),
+        "model_dump_s": dump_time,
+        "model_validate_s": validate_time,
+        "state_bytes": len(state.model_dump_json()),
+        "output_fields": len(updated),
+    }
+
+def run_session(graph_runner, script: List[str], quiet: bool = True,
+                session_id: Optional[str] = None, think_s: float = 0.0, resume: bool = False) -> List[Dict[str, Any]]:
+    from backend.orchestrator.resume import resume_turn
+
+    state, config = _new_session(session_id)
+    results = []
+    for turn_index, user_input in enumerate(script):
+        if turn_index and think_s:
+            # The user reading the previous reply; background work (memory, speculation) runs meanwhile
+            time.sleep(think_s)
+        _prepare_turn(state, user_input)
+
+        start = time.perf_counter()
+        graph_input = _graph_input(state, resume)
+        dump_time = time.perf_counter() - start
+
+        graph_start = time.perf_counter()
+        # Agents print every raw LLM response; keep that out of the timings output
+        with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+            if resume:
+                updated = resume_turn(graph_runner, graph_input)
+            else:
+                updated = graph_runner.invoke(graph_input, config=config)
+        graph_time = time.perf_counter() - graph_start
+
+        state, result = _finish_turn(user_input, updated, start, dump_time, graph_time, state if resume else None)
+        result["turn_index"] = turn_index
+        results.append(result)
+    return results
+
+def run_full_report_session(graph_runner, profile: str, quiet: bool = True,
+                            session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    """The default script's work in one turn of the full-report graph (profile and job description preloaded)."""
+    from linkedin.profiles import get_mock_profile
+
+    state, config = _new_session(session_id)
+    profile_url, _ = SAMPLE_PROFILES[profile]
+    state.linkedin_url = profile_url
+    state.linkedin_data = get_mock_profile(linkedin_url=profile_url)
+    state.target_job_description = _job_description(profile)
+    _prepare_turn(state, FULL_REPORT_REQUEST)
+
+    start = time.perf_counter()
+    dumped = state.model_dump()
+    dump_time = time.perf_counter() - start
+
+    graph_start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) if quiet else contextlib.nullcontext():
+        updated = graph_runner.invoke(dumped, config=config)
+    graph_time = time.perf_counter() - graph_start
+
+    state, result = _finish_turn(FULL_REPORT_REQUEST, updated, start, dump_time, graph_time)
+    result["turn_index"] = 0
+    result["reports"] = [name for name in ("profile_analysis_report", "content_rewrites_suggestions",
+                                           "job_fit_evaluation_report", "career_guidance_notes")
+                         if getattr(state, name)]
+    return [result]
+
+async def arun_session(graph_runner, script: List[str], session_id: Optional[str] = None,
+                       think_s: float = 0.0, resume: bool = False) -> List[Dict[str, Any]]:
+    """Same as run_session but awaits the async graph, so sessions can run concurrently on one loop."""
+    from backend.orchestrator.resume import aresume_turn
+
+    state, config = _new_session(session_id)
+    results = []
+    for turn_index, user_input in enumerate(script):
+        if turn_index and think_s:
+            await asyncio.sleep(think_s)
+        _prepare_turn(state, user_input)
+
+        start = time.perf_counter()
+        graph_input = _graph_input(state, resume)
+        dump_time = time.perf_counter() - start
+
+        graph_start = time.perf_counter()
+        if resume:
+            updated = await aresume_turn(graph_runner, graph_input)
+        else:
+            updated = await graph_runner.ainvoke(graph_input, config=config)
+        graph_time = time.perf_counter() - graph_start
+
+        state, result = _finish_turn(user_input, updated, start, dump_time, graph_time, state if resume else None)
+        result["turn_index"] = turn_index
+        results.append(result)
+    return results
+
+async def _run_concurrent(profiles: List[str], sessions: int, repeat: int = 1,
+                          think_s: float = 0.0, resume: bool = False) -> List[Dict[str, Any]]:
+    from backend.orchestrator.langgraph_graph import get_async_graph_runner
+
+    graph_runner = get_async_graph_runner()
+    runs = [
+        arun_session(graph_runner, default_script(profile) * repeat, session_id=f"benchmark-{profile}-{i}",
+                     think_s=think_s, resume=resume)
+        for i in range(sessions) for profile in profiles
+    ]
+    # stdout is process-wide, so silence agent prints for the whole batch
+    with contextlib.redirect_stdout(io.StringIO()):
+        session_results = await asyncio.gather(*runs)
+    return [turn for turns in session_results for turn in turns]
+
+def summarize(all_turns: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = {}
+    for field in ("turn_s", "graph_s", "router_s", "model_dump_s", "model_validate_s"):
+        values = sorted(t[field] for t in all_turns)
+        summary[field] = {
+            "mean_ms": statistics.mean(values) * 1000,
+            "p50_ms": values[len(values) // 2] * 1000,
+            "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))] * 1000,
+        }
+    summary["router_calls_per_turn"] = statistics.mean(t["router_calls"] for t in all_turns)
+    # State channels handed back per turn: every field for invoke, the changed ones with --resume
+    summary["output_fields_per_turn"] = statistics.mean(t["output_fields"] for t in all_turns)
+    summary["router_prompt_tokens_per_turn"] = statistics.mean(t["router_prompt_tokens"] for t in all_turns)
+    # Grows with session length when the router sees the full state
+    summary["router_prompt_tokens_max"] = max(t["router_prompt_tokens"] for t in all_turns)
+    # Mean router prompt tokens at each position in the session; flat when memory is bounded
+    by_turn: Dict[int, List[int]] = {}
+    for t in all_turns:
+        by_turn.setdefault(t["turn_index"], []).append(t["router_prompt_tokens"])
+    summary["router_prompt_tokens_by_turn"] = [round(statistics.mean(by_turn[i])) for i in sorted(by_turn)]
+    # Agent that ran, or the router's own action when no agent was called
+    summary["routes"] = [t["last_agent"] or t["action"] for t in all_turns]
+    summary["max_state_bytes"] = max(t["state_bytes"] for t in all_turns)
+    # Time a user spends waiting over a whole session
+    summary["session_s"] = sum(t["turn_s"] for t in all_turns) / sum(t["turn_index"] == 0 for t in all_turns)
+    return summary
+
+def compare_serializers(checkpoints: List[Dict[str, Any]], rounds: int = 5) -> Dict[str, Any]:
+    """Bytes and (de)serialization time per checkpoint for each available checkpoint serializer."""
+    from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+    from backend.checkpoint_serde import CompressedSerializer, zstandard
+
+    candidates = {"jsonplus": JsonPlusSerializer(), "msgpack+zlib": CompressedSerializer(codec="zlib")}
+    if zstandard is not None:
+        candidates["msgpack+zstd"] = CompressedSerializer(codec="zstd")
+    results = {}
+    for name, serde in candidates.items():
+        dumped = [serde.dumps_typed(checkpoint) for checkpoint in checkpoints]
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for checkpoint in checkpoints:
+                serde.dumps_typed(checkpoint)
+        dumps_s = (time.perf_counter() - start) / (rounds * len(checkpoints))
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for payload in dumped:
+                serde.loads_typed(payload)
+        loads_s = (time.perf_counter() - start) / (rounds * len(checkpoints))
+        sizes = [len(payload[1]) for payload in dumped]
+        results[name] = {
+            "bytes_mean": round(statistics.mean(sizes)),
+            "bytes_max": max(sizes),
+            "dumps_us": round(dumps_s * 1e6, 1),
+            "loads_us": round(loads_s * 1e6, 1),
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LangGraph orchestration end to end.")
+    parser.add_argument("--sessions", type=int, default=5, help="Number of scripted sessions to run")
+    parser.add_argument("--profile", choices=[*SAMPLE_PROFILES, "all"], default="michael",
+                        help="Sample profile and job description to script the session with")
+    parser.add_argument("--verbose", action="store_true", help="Print every turn")
+    parser.add_argument("--concurrent", action="store_true",
+                        help="Run all sessions at once on one event loop through the async graph")
+    parser.add_argument("--repeat", type=int, default=1,
+                        help="Repeat the scripted conversation this many times within each session")
+    parser.add_argument("--full-report", action="store_true",
+                        help="Run each session as one turn of the parallel full-report graph instead of the chat script")
+    parser.add_argument("--serde", action="store_true",
+                        help="After the sessions, compare checkpoint serializers on the checkpoints they wrote")
+    parser.add_argument("--resume", action="store_true",
+                        help="Send only the new message each turn and apply the returned delta")
+    parser.add_argument("--think-s", type=float, default=0.0,
+                        help="Seconds the simulated user waits before each follow-up message")
+    args = parser.parse_args()
+
+    from backend.call_policy import get_call_policy_stats
+    from backend.rate_limiter import get_rate_limiter_stats
+    from backend.orchestrator.handlers import ROUTER_MODE
+    from backend.orchestrator.fast_router import get_fast_router_stats
+    from backend.orchestrator.intent_classifier import get_intent_classifier_stats
+    from agents.router import get_router_parse_stats
+    from backend.orchestrator.router_view import ROUTER_STATE_VIEW
+    from backend.orchestrator.conversation_memory import CONVERSATION_MEMORY
+    from backend.orchestrator.speculation import get_speculation_stats
+    from backend.orchestrator.agent_memo import get_agent_memo_stats
+
+    profiles = list(SAMPLE_PROFILES) if args.profile == "all" else [args.profile]
+    print(f"router mode: {ROUTER_MODE}, state view: {ROUTER_STATE_VIEW}, memory: {CONVERSATION_MEMORY}")
+    if args.full_report:
+        from backend.orchestrator.langgraph_graph import get_full_report_graph_runner
+
+        graph_runner = get_full_report_graph_runner()
+        all_turns = []
+        for i in range(args.sessions):
+            for profile in profiles:
+                all_turns.extend(run_full_report_session(graph_runner, profile, quiet=not args.verbose,
+                                                         session_id=f"benchmark-full-{profile}-{i}"))
+        summary = summarize(all_turns)
+        summary["reports"] = [t["reports"] for t in all_turns]
+        print(json.dumps(summary, indent=2))
+        return
+    if args.concurrent:
+        wall_start = time.perf_counter()
+        all_turns = asyncio.run(_run_concurrent(profiles, args.sessions, args.repeat, args.think_s, args.resume))
+        summary = summarize(all_turns)
+        summary["wall_s"] = time.perf_counter() - wall_start
+        summary["rate_limiter"] = get_rate_limiter_stats()
+        summary["call_policy"] = get_call_policy_stats()
+        summary["fast_router"] = get_fast_router_stats()
+        summary["intent_classifier"] = get_intent_classifier_stats()
+        summary["router_parse"] = get_router_parse_stats()
+        summary["speculation"] = get_speculation_stats()
+        summary["agent_memo"] = get_agent_memo_stats()
+        print(json.dumps(summary, indent=2))
+        return
+
+    from backend.orchestrator.langgraph_graph import get_graph_runner
+
+    graph_runner = get_graph_runner()
+    all_turns = []
+    # Background work (summaries, speculative agents) prints between turns too
+    with contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext():
+        for i in range(args.sessions):
+            for profile in profiles:
+                turns = run_session(graph_runner, default_script(profile) * args.repeat, quiet=not args.verbose,
+                                    session_id=f"benchmark-{profile}-{i}", think_s=args.think_s,
+                                    resume=args.resume)
+                all_turns.extend(turns)
+            if args.verbose:
+                for turn in turns:
+                    print(json.dumps(turn))
+
+    summary = summarize(all_turns)
+    summary["rate_limiter"] = get_rate_limiter_stats()
+    summary["call_policy"] = get_call_policy_stats()
+    summary["fast_router"] = get_fast_router_stats()
+    summary["intent_classifier"] = get_intent_classifier_stats()
+    summary["router_parse"] = get_router_parse_stats()
+    summary["speculation"] = get_speculation_stats()
+    summary["agent_memo"] = get_agent_memo_stats()
+    if args.serde:
+        from backend.memory import get_memory_saver
+        checkpoints = [item.checkpoint for item in get_memory_saver().list(None)]
+        summary["checkpoint_serde"] = {"checkpoints": len(checkpoints), **compare_serializers(checkpoints)}
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
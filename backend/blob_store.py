@@ -0,0 +1,164 @@
+__module_name__ = "blob_store"
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from backend.logger import log_agent_action, log_error
+
+# Content-addressed storage for the large state fields (reports, profile, job description).
+# "memory" keeps blobs in the process; "sqlite" keeps them next to durable checkpoints.
+BLOB_STORE = os.getenv("BLOB_STORE", os.getenv("CHECKPOINTER", "memory")).lower()
+BLOB_DB_PATH = os.getenv("BLOB_DB_PATH", os.getenv("CHECKPOINT_DB_PATH", "backend/data/checkpoints.sqlite"))
+# Decoded text blobs kept in memory; reports are read several times per turn
+BLOB_CACHE_SIZE = 256
+# Never sweep blobs this young: their checkpoint may not be written yet
+BLOB_SWEEP_GRACE_S = 3600
+
+class MemoryBlobStore:
+    def __init__(self):
+        self._blobs: Dict[str, bytes] = {}
+        self._created: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def put(self, ref: str, data: bytes) -> None:
+        with self._lock:
+            if ref not in self._blobs:
+                self._blobs[ref] = data
+                self._created[ref] = time.time()
+
+    def get(self, ref: str) -> Optional[bytes]:
+        return self._blobs.get(ref)
+
+    def has(self, ref: str) -> bool:
+        return ref in self._blobs
+
+    def sweep(self, live: Iterable[str], older_than: float) -> int:
+        live = set(live)
+        with self._lock:
+            dead = [ref for ref, created in self._created.items() if ref not in live and created < older_than]
+            for ref in dead:
+                del self._blobs[ref], self._created[ref]
+        return len(dead)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._blobs.clear()
+            self._created.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"blobs": len(self._blobs), "bytes": sum(len(data) for data in self._blobs.values())}
+
+class SQLiteBlobStore:
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS blobs "
+                               "(ref TEXT PRIMARY KEY, data BLOB NOT NULL, created_at REAL NOT NULL)")
+
+    def put(self, ref: str, data: bytes) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?, ?)", (ref, data, time.time()))
+
+    def get(self, ref: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM blobs WHERE ref = ?", (ref,)).fetchone()
+        return row[0] if row else None
+
+    def has(self, ref: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM blobs WHERE ref = ?", (ref,)).fetchone() is not None
+
+    def sweep(self, live: Iterable[str], older_than: float) -> int:
+        live = set(live)
+        with self._lock:
+            candidates = [row[0] for row in self._conn.execute(
+                "SELECT ref FROM blobs WHERE created_at < ?", (older_than,))]
+            dead = [(ref,) for ref in candidates if ref not in live]
+            self._conn.executemany("DELETE FROM blobs WHERE ref = ?", dead)
+        return len(dead)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+        return {"blobs": count, "bytes": size}
+
+_store = None
+_store_lock = threading.Lock()
+_text_cache: "OrderedDict[str, str]" = OrderedDict()
+
+def get_blob_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SQLiteBlobStore(BLOB_DB_PATH) if BLOB_STORE == "sqlite" else MemoryBlobStore()
+    return _store
+
+def _cache_text(ref: str, value: str) -> None:
+    with _store_lock:
+        _text_cache[ref] = value
+        _text_cache.move_to_end(ref)
+        while len(_text_cache) > BLOB_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+
+def put_value(value: Any) -> Optional[str]:
+    """Store a JSON-serializable value once and return its content hash (None stays None)."""
+    if value is None:
+        return None
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+    ref = hashlib.sha256(data).hexdigest()
+    get_blob_store().put(ref, data)
+    if isinstance(value, str):
+        _cache_text(ref, value)
+    return ref
+
+def get_value(ref: Optional[str]) -> Any:
+    """Value stored under ref. Text comes from a small cache; dicts are decoded fresh so callers may mutate them."""
+    if ref is None:
+        return None
+    cached = _text_cache.get(ref)
+    if cached is not None:
+        return cached
+    data = get_blob_store().get(ref)
+    if data is None:
+        log_error("blob_store", f"Missing blob {ref[:12]}")
+        return None
+    value = json.loads(data)
+    if isinstance(value, str):
+        _cache_text(ref, value)
+    return value
+
+def has_value(ref: Optional[str]) -> bool:
+    """Whether get_value(ref) can return the value (False for a ref whose blob was swept or lost)."""
+    return ref is not None and (ref in _text_cache or get_blob_store().has(ref))
+
+def sweep_blobs(live: Iterable[str]) -> int:
+    """Delete blobs no checkpoint refers to any more (older than the grace period)."""
+    removed = get_blob_store().sweep(live, time.time() - BLOB_SWEEP_GRACE_S)
+    if removed:
+        log_agent_action("blob_store", "Swept unreferenced blobs", {"blobs": f"{removed}"})
+    return removed
+
+def clear_blobs() -> None:
+    """
+    Drop every blob of the in-memory store. Only for full resets (clear_memory): blobs
+    are shared by all sessions, so one session's leftovers are left to sweep_blobs.
+    """
+    store = get_blob_store()
+    if isinstance(store, MemoryBlobStore):
+        store.clear()
+    with _store_lock:
+        _text_cache.clear()
+
+def get_blob_stats() -> Dict[str, Any]:
+    return {"store": BLOB_STORE, **get_blob_store().stats(), "cached_texts": len(_text_cache)}
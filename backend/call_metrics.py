@@ -0,0 +1,172 @@
+__module_name__ = "call_metrics"
+
+import contextlib
+import contextvars
+import functools
+import inspect
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+# USD per million tokens, used for the cost estimate in debug_info
+LLM_PRICE_INPUT_PER_MTOK = float(os.getenv("LLM_PRICE_INPUT_PER_MTOK", "0.15"))
+LLM_PRICE_OUTPUT_PER_MTOK = float(os.getenv("LLM_PRICE_OUTPUT_PER_MTOK", "0.60"))
+
+# Calls made while a collector is active are appended to it
+_collector: contextvars.ContextVar[Optional[List[Dict[str, Any]]]] = contextvars.ContextVar("llm_call_collector", default=None)
+
+@contextlib.contextmanager
+def collect_calls() -> Iterator[List[Dict[str, Any]]]:
+    """Gather a record for every model call made inside the block."""
+    calls: List[Dict[str, Any]] = []
+    token = _collector.set(calls)
+    try:
+        yield calls
+    finally:
+        _collector.reset(token)
+
+def new_call_record(agent: str) -> Dict[str, Any]:
+    return {
+        "agent": agent,
+        "prompt_tokens": 0,
+        "output_tokens": 0,
+        "wall_s": 0.0,
+        "ttft_s": None,
+        "retries": 0,
+        "hedged": False,
+        "cache_hit": False,
+        "error": None,
+        "_start": time.perf_counter(),
+    }
+
+def mark_first_token(record: Dict[str, Any]) -> None:
+    if record.get("ttft_s") is None:
+        record["ttft_s"] = time.perf_counter() - record["_start"]
+
+def finish_call_record(record: Dict[str, Any], response: Any = None) -> None:
+    """Fill in timing and usage from the final message and hand the record to the active collector."""
+    record["wall_s"] = time.perf_counter() - record.pop("_start")
+    if record["ttft_s"] is None:
+        # Not streamed: the whole reply arrives at once
+        record["ttft_s"] = record["wall_s"]
+    usage = getattr(response, "usage_metadata", None) if response is not None else None
+    # Cache hits cost nothing, whatever the original call used
+    if isinstance(usage, dict) and not record["cache_hit"]:
+        record["prompt_tokens"] = int(usage.get("input_tokens") or 0)
+        record["output_tokens"] = int(usage.get("output_tokens") or 0)
+    calls = _collector.get()
+    if calls is not None:
+        calls.append(record)
+
+class FirstTokenTimer(BaseCallbackHandler):
+    """Marks time-to-first-token on a call record when the client streams internally."""
+
+    def __init__(self, record: Dict[str, Any]):
+        self.record = record
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        mark_first_token(self.record)
+
+def with_first_token_timer(kwargs: Dict[str, Any], record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Add a FirstTokenTimer to the call's callbacks without dropping the ones
+    inherited from the running graph (LangGraph's token stream hangs off them).
+    """
+    if "config" in kwargs:
+        return kwargs
+    from langchain_core.callbacks import BaseCallbackManager
+    from langchain_core.runnables.config import var_child_runnable_config
+
+    timer = FirstTokenTimer(record)
+    parent = (var_child_runnable_config.get() or {}).get("callbacks")
+    if isinstance(parent, BaseCallbackManager):
+        callbacks = parent.copy()
+        callbacks.add_handler(timer, inherit=False)
+    else:
+        callbacks = list(parent or []) + [timer]
+    return {**kwargs, "config": {"callbacks": callbacks}}
+
+def _empty_totals() -> Dict[str, Any]:
+    return {"calls": 0, "prompt_tokens": 0, "output_tokens": 0, "wall_s": 0.0,
+            "ttft_s": 0.0, "retries": 0, "cache_hits": 0, "cost_usd": 0.0}
+
+def _add(totals: Dict[str, Any], other: Dict[str, Any]) -> None:
+    for field in totals:
+        totals[field] += other.get(field, 0) or 0
+
+def estimate_cost(prompt_tokens: int, output_tokens: int) -> float:
+    return (prompt_tokens * LLM_PRICE_INPUT_PER_MTOK + output_tokens * LLM_PRICE_OUTPUT_PER_MTOK) / 1_000_000
+
+def summarize_calls(calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+    totals = _empty_totals()
+    for call in calls:
+        totals["calls"] += 1
+        totals["prompt_tokens"] += call["prompt_tokens"]
+        totals["output_tokens"] += call["output_tokens"]
+        totals["wall_s"] += call["wall_s"]
+        totals["ttft_s"] += call["ttft_s"] or 0.0
+        totals["retries"] += call["retries"]
+        totals["cache_hits"] += int(call["cache_hit"])
+    totals["cost_usd"] = estimate_cost(totals["prompt_tokens"], totals["output_tokens"])
+    return totals
+
+def record_node_metrics(debug_info: Dict[str, Any], node: str, calls: List[Dict[str, Any]],
+                        node_wall_s: float, new_turn: bool = False) -> None:
+    """
+    Fold one node execution into debug_info:
+
+    - debug_info["turn"]: per-node breakdown and totals for the current turn
+    - debug_info["session"]: the same rolled up over every turn of the session
+    """
+    node_totals = summarize_calls(calls)
+    node_totals["node_wall_s"] = node_wall_s
+
+    session = debug_info.setdefault("session", {"turns": 0, "nodes": {}, "totals": _empty_totals()})
+    if new_turn or "turn" not in debug_info:
+        session["turns"] += 1
+        debug_info["turn"] = {"index": session["turns"], "nodes": {}, "calls": [], "totals": _empty_totals()}
+    turn = debug_info["turn"]
+
+    turn_node = turn["nodes"].setdefault(node, {**_empty_totals(), "node_wall_s": 0.0})
+    _add(turn_node, node_totals)
+    turn["calls"].extend(
+        {k: (round(v, 4) if isinstance(v, float) else v) for k, v in call.items()} | {"node": node}
+        for call in calls
+    )
+    _add(turn["totals"], node_totals)
+
+    session_node = session["nodes"].setdefault(node, {**_empty_totals(), "node_wall_s": 0.0})
+    _add(session_node, node_totals)
+    _add(session["totals"], node_totals)
+
+def get_session_metrics(debug_info: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-session rollup written by record_node_metrics, or an empty one."""
+    return debug_info.get("session", {"turns": 0, "nodes": {}, "totals": _empty_totals()})
+
+def track_node(node: str, new_turn: bool = False):
+    """
+    Decorator for graph nodes (sync or async): collect the model calls the node
+    makes and fold them into state.debug_info. The router opens a new turn.
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(state, *args, **kwargs):
+                start = time.perf_counter()
+                with collect_calls() as calls:
+                    result = await fn(state, *args, **kwargs)
+                record_node_metrics(result.debug_info, node, calls, time.perf_counter() - start, new_turn)
+                return result
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(state, *args, **kwargs):
+            start = time.perf_counter()
+            with collect_calls() as calls:
+                result = fn(state, *args, **kwargs)
+            record_node_metrics(result.debug_info, node, calls, time.perf_counter() - start, new_turn)
+            return result
+        return wrapper
+    return decorator
@@ -0,0 +1,389 @@
+__module_name__ = "call_policy"
+
+import asyncio
+import concurrent.futures
+import contextvars
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+from backend.logger import log_agent_action
+
+# Attempts per call, including the first one
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_BACKOFF_BASE_S = float(os.getenv("LLM_BACKOFF_BASE_S", "0.5"))
+LLM_BACKOFF_MAX_S = float(os.getenv("LLM_BACKOFF_MAX_S", "8"))
+# Wall-clock budget for one logical call across all attempts, queueing included. 0 disables it.
+LLM_CALL_DEADLINE_S = float(os.getenv("LLM_CALL_DEADLINE_S", "120"))
+# Fire a second identical request once the first is slower than the agent's recent p95
+LLM_HEDGING = os.getenv("LLM_HEDGING", "false").lower() in ("1", "true", "yes", "on")
+LLM_HEDGE_QUANTILE = float(os.getenv("LLM_HEDGE_QUANTILE", "0.95"))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+RETRYABLE = "retryable"
+FATAL = "fatal"
+
+# Set in a worker's context once the policy has given up on the attempt running there
+_abandoned: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar("llm_attempt_abandoned", default=None)
+
+class EmptyResponseError(RuntimeError):
+    """The model returned no content; usually transient on Gemini."""
+
+class CallDeadlineExceeded(TimeoutError):
+    """The call did not succeed within its deadline."""
+
+def classify_error(error: BaseException) -> str:
+    """Decide whether another attempt can help."""
+    if isinstance(error, (EmptyResponseError, TimeoutError, asyncio.TimeoutError, ConnectionError)):
+        return RETRYABLE
+    try:
+        from google.api_core import exceptions as google_exceptions
+        if isinstance(error, (google_exceptions.ResourceExhausted,     # 429
+                              google_exceptions.ServiceUnavailable,    # 503
+                              google_exceptions.InternalServerError,   # 500
+                              google_exceptions.DeadlineExceeded,      # 504
+                              google_exceptions.Aborted)):
+            return RETRYABLE
+        if isinstance(error, google_exceptions.GoogleAPIError):
+            # Bad request, auth, permission, not found: the same request fails again
+            return FATAL
+    except ImportError:
+        pass
+    message = str(error).lower()
+    if any(marker in message for marker in ("429", "503", "500 internal", "resource exhausted",
+                                            "unavailable", "deadline exceeded", "timed out")):
+        return RETRYABLE
+    return FATAL
+
+def _check_response(response: Any) -> Any:
+    content = getattr(response, "content", response)
+    if content is None or (isinstance(content, (str, list)) and not content):
+        raise EmptyResponseError("Empty response from LLM")
+    return response
+
+def attempt_abandoned() -> bool:
+    """Whether the attempt running in this context was given up (deadline or a faster hedge); its result is dropped."""
+    abandoned = _abandoned.get()
+    return abandoned is not None and abandoned.is_set()
+
+def _streaming_to_caller() -> bool:
+    # A duplicate request would emit every token twice into LangGraph's "messages" stream
+    try:
+        from langchain_core.runnables.config import var_child_runnable_config
+        from langgraph.pregel.messages import StreamMessagesHandler
+        config = var_child_runnable_config.get() or {}
+        handlers = getattr(config.get("callbacks"), "handlers", None) or []
+        return any(isinstance(handler, StreamMessagesHandler) for handler in handlers)
+    except Exception:
+        return False
+
+class CallPolicy:
+    """
+    Retry, deadline and hedging rules shared by every model call.
+
+    Retryable failures are retried with full-jitter exponential backoff until
+    the attempts or the deadline run out. With hedging on, an attempt that
+    outlives the agent's recent p95 latency gets a twin request and whichever
+    answers first wins.
+    """
+
+    def __init__(self, max_attempts: int = LLM_MAX_ATTEMPTS, backoff_base_s: float = LLM_BACKOFF_BASE_S,
+                 backoff_max_s: float = LLM_BACKOFF_MAX_S, deadline_s: float = LLM_CALL_DEADLINE_S,
+                 hedging: bool = LLM_HEDGING, hedge_quantile: float = LLM_HEDGE_QUANTILE,
+                 hedge_min_samples: int = LLM_HEDGE_MIN_SAMPLES):
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base_s = backoff_base_s
+        self.backoff_max_s = backoff_max_s
+        self.deadline_s = deadline_s
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self._lock = threading.Lock()
+        self._latencies: Dict[str, deque] = defaultdict(lambda: deque(maxlen=200))
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=64, thread_name_prefix="llm-call")
+
+    # --- bookkeeping ---
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def _observe(self, agent: str, latency: float) -> None:
+        with self._lock:
+            self._latencies[agent].append(latency)
+
+    def hedge_after(self, agent: str) -> Optional[float]:
+        """Latency at which a hedge fires for this agent, or None while there is too little history."""
+        if not self.hedging:
+            return None
+        with self._lock:
+            samples = sorted(self._latencies[agent])
+        if len(samples) < self.hedge_min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * self.hedge_quantile))]
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * (2 ** attempt)))
+
+    def _deadline(self) -> Optional[float]:
+        return time.monotonic() + self.deadline_s if self.deadline_s > 0 else None
+
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else deadline - time.monotonic()
+
+    def _should_retry(self, agent: str, error: BaseException, attempt: int, deadline: Optional[float]) -> Optional[float]:
+        """Return the backoff delay before the next attempt, or None to give up."""
+        kind = classify_error(error)
+        self._count(f"errors_{kind}")
+        if kind == FATAL or attempt + 1 >= self.max_attempts:
+            return None
+        delay = self.backoff(attempt)
+        remaining = self._remaining(deadline)
+        if remaining is not None and remaining <= delay:
+            return None
+        self._count("retries")
+        log_agent_action(agent, "Retrying model call",
+                         {"attempt": attempt + 2, "error": type(error).__name__, "backoff_s": round(delay, 2)})
+        return delay
+
+    # --- sync ---
+
+    def _submit(self, fn: Callable[[], Any], attempts: Dict[concurrent.futures.Future, threading.Event]) -> concurrent.futures.Future:
+        # Carry the caller's context (graph config, session id) into the worker thread,
+        # with the flag attempt_abandoned() reads
+        context = contextvars.copy_context()
+        abandoned = threading.Event()
+        context.run(_abandoned.set, abandoned)
+        future = self._pool.submit(context.run, fn)
+        attempts[future] = abandoned
+        return future
+
+    def _abandon(self, futures, attempts: Dict[concurrent.futures.Future, threading.Event]) -> None:
+        # Queued attempts never start; running ones can't be interrupted, so they are flagged
+        # and the model wrapper drops their result (see attempt_abandoned)
+        for future in futures:
+            if not future.cancel():
+                attempts[future].set()
+                self._count("abandoned")
+
+    def _attempt(self, fn: Callable[[], Any], agent: str, deadline: Optional[float],
+                 record: Optional[Dict[str, Any]]) -> Any:
+        start = time.monotonic()
+        hedge_after = None if _streaming_to_caller() else self.hedge_after(agent)
+        if hedge_after is None and deadline is None:
+            # Nothing to race and nothing to time out, so no thread hop
+            result = _check_response(fn())
+            self._observe(agent, time.monotonic() - start)
+            return result
+        # In the pool, so the deadline bounds a hung call and not just the gaps between attempts
+        attempts: Dict[concurrent.futures.Future, threading.Event] = {}
+        primary = self._submit(fn, attempts)
+        pending = {primary}
+        hedge = None
+        if hedge_after is not None:
+            remaining = self._remaining(deadline)
+            done, _ = concurrent.futures.wait(pending, timeout=hedge_after if remaining is None else min(hedge_after, remaining))
+            if not done and (deadline is None or time.monotonic() < deadline):
+                hedge = self._submit(fn, attempts)
+                pending.add(hedge)
+                self._count("hedges")
+                if record is not None:
+                    record["hedged"] = True
+        error: Optional[BaseException] = None
+        while pending:
+            remaining = self._remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                break
+            done, pending = concurrent.futures.wait(pending, timeout=remaining,
+                                                    return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                try:
+                    result = _check_response(future.result())
+                except Exception as e:
+                    error = e
+                    continue
+                self._abandon(pending, attempts)
+                if future is hedge:
+                    self._count("hedges_won")
+                self._observe(agent, time.monotonic() - start)
+                return result
+        if pending:
+            self._abandon(pending, attempts)
+            self._count("deadline_exceeded")
+            raise CallDeadlineExceeded(f"{agent} model call exceeded its {self.deadline_s:.0f}s deadline")
+        raise error
+
+    def run(self, fn: Callable[[], Any], agent: str = "default", record: Optional[Dict[str, Any]] = None) -> Any:
+        """Call fn under the policy and return its first good result. Retries and hedging are noted on record."""
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            self._count("attempts")
+            try:
+                return self._attempt(fn, agent, deadline, record)
+            except CallDeadlineExceeded:
+                raise
+            except Exception as e:
+                delay = self._should_retry(agent, e, attempt, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                if record is not None:
+                    record["retries"] = attempt
+
+    def run_stream(self, factory: Callable[[], Iterator[Any]], agent: str = "default",
+                   record: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+        """Stream from factory(); failures are retried only until the first chunk has been yielded."""
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            self._count("attempts")
+            start = time.monotonic()
+            yielded = False
+            try:
+                for chunk in factory():
+                    yielded = True
+                    yield chunk
+                self._observe(agent, time.monotonic() - start)
+                return
+            except Exception as e:
+                delay = None if yielded else self._should_retry(agent, e, attempt, deadline)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                attempt += 1
+                if record is not None:
+                    record["retries"] = attempt
+
+    # --- async ---
+
+    @staticmethod
+    def _spawn(fn: Callable[[], Awaitable[Any]], attempts: Dict[asyncio.Task, threading.Event]) -> asyncio.Task:
+        # The task runs in its own copy of the context, carrying the flag attempt_abandoned() reads
+        context = contextvars.copy_context()
+        abandoned = threading.Event()
+        context.run(_abandoned.set, abandoned)
+        task = asyncio.get_running_loop().create_task(fn(), context=context)
+        attempts[task] = abandoned
+        return task
+
+    async def _aattempt(self, fn: Callable[[], Awaitable[Any]], agent: str, deadline: Optional[float],
+                        record: Optional[Dict[str, Any]]) -> Any:
+        start = time.monotonic()
+        attempts: Dict[asyncio.Task, threading.Event] = {}
+        primary = self._spawn(fn, attempts)
+        pending = {primary}
+        hedge_after = None if _streaming_to_caller() else self.hedge_after(agent)
+        hedge = None
+        try:
+            if hedge_after is not None:
+                remaining = self._remaining(deadline)
+                done, _ = await asyncio.wait(pending, timeout=hedge_after if remaining is None else min(hedge_after, remaining))
+                if not done and (deadline is None or time.monotonic() < deadline):
+                    hedge = self._spawn(fn, attempts)
+                    pending.add(hedge)
+                    self._count("hedges")
+                    if record is not None:
+                        record["hedged"] = True
+            error: Optional[BaseException] = None
+            while pending:
+                remaining = self._remaining(deadline)
+                if remaining is not None and remaining <= 0:
+                    break
+                done, pending = await asyncio.wait(pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    try:
+                        result = _check_response(task.result())
+                    except Exception as e:
+                        error = e
+                        continue
+                    if task is hedge:
+                        self._count("hedges_won")
+                    self._observe(agent, time.monotonic() - start)
+                    return result
+            if pending:
+                self._count("deadline_exceeded")
+                raise CallDeadlineExceeded(f"{agent} model call exceeded its {self.deadline_s:.0f}s deadline")
+            raise error
+        finally:
+            # Flagged as well as cancelled, so the model wrapper treats them like abandoned sync attempts
+            for task in pending:
+                attempts[task].set()
+                task.cancel()
+                self._count("abandoned")
+
+    async def arun(self, fn: Callable[[], Awaitable[Any]], agent: str = "default",
+                   record: Optional[Dict[str, Any]] = None) -> Any:
+        """Async counterpart of run(); fn must return a fresh awaitable on each call."""
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            self._count("attempts")
+            try:
+                return await self._aattempt(fn, agent, deadline, record)
+            except CallDeadlineExceeded:
+                raise
+            except Exception as e:
+                delay = self._should_retry(agent, e, attempt, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                if record is not None:
+                    record["retries"] = attempt
+
+    async def arun_stream(self, factory: Callable[[], AsyncIterator[Any]], agent: str = "default",
+                          record: Optional[Dict[str, Any]] = None) -> AsyncIterator[Any]:
+        deadline = self._deadline()
+        attempt = 0
+        while True:
+            self._count("attempts")
+            start = time.monotonic()
+            yielded = False
+            try:
+                async for chunk in factory():
+                    yielded = True
+                    yield chunk
+                self._observe(agent, time.monotonic() - start)
+                return
+            except Exception as e:
+                delay = None if yielded else self._should_retry(agent, e, attempt, deadline)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+                if record is not None:
+                    record["retries"] = attempt
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            agents = list(self._latencies)
+        return {
+            "max_attempts": self.max_attempts,
+            "deadline_s": self.deadline_s,
+            "hedging": self.hedging,
+            "hedge_after_s": {agent: self.hedge_after(agent) for agent in agents},
+            **counters,
+        }
+
+_policy: Optional[CallPolicy] = None
+_policy_lock = threading.Lock()
+
+def get_call_policy() -> CallPolicy:
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = CallPolicy()
+        return _policy
+
+def get_call_policy_stats() -> Dict[str, Any]:
+    if _policy is None:
+        return {"status": "not_initialized"}
+    return _policy.stats()
@@ -0,0 +1,246 @@
+__module_name__ = "cassette"
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, Iterator, AsyncIterator, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from backend.call_policy import attempt_abandoned
+from backend.llm_cache import make_cache_key
+
+LLM_CASSETTE_PATH = os.getenv(
+    "LLM_CASSETTE_PATH",
+    os.path.join(os.path.dirname(__file__), "cassettes", "session.jsonl"),
+)
+LLM_CASSETTE_REPLAY_TIMING = os.getenv("LLM_CASSETTE_REPLAY_TIMING", "false").lower() in ("1", "true", "yes", "on")
+
+class CassetteMissError(KeyError):
+    """Raised in replay mode when a prompt was never recorded."""
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(m.content if isinstance(m.content, str) else str(m.content) for m in messages)
+
+class Cassette:
+    """
+    Append-only JSONL file of recorded calls. Each line holds the content
+    address of the request (same key as the response cache), the exact
+    response text, usage metadata and the measured latencies.
+    """
+
+    def __init__(self, path: str = LLM_CASSETTE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: Dict[str, deque] = defaultdict(deque)
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    def load(self) -> "Cassette":
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[entry["key"]].append(entry)
+        return self
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.recorded += 1
+
+    def next_for(self, key: str) -> Dict[str, Any]:
+        """Return recorded entries for a key in order; the last one repeats once exhausted."""
+        with self._lock:
+            queue = self._entries.get(key)
+            if queue:
+                entry = queue.popleft()
+                self._last[key] = entry
+            elif key in self._last:
+                entry = self._last[key]
+            else:
+                self.misses += 1
+                raise CassetteMissError(f"No cassette entry for request {key[:12]} in {self.path}")
+            self.replayed += 1
+            return entry
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "path": self.path,
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "misses": self.misses,
+                "remaining": sum(len(q) for q in self._entries.values()),
+            }
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+def get_cassette(replay: bool = False) -> Cassette:
+    global _cassette
+    with _cassette_lock:
+        if _cassette is None:
+            _cassette = Cassette().load() if replay else Cassette()
+        return _cassette
+
+def _entry(key: str, model: str, temperature: float, top_p: float, message: AIMessage,
+           latency: float, ttft: Optional[float]) -> Dict[str, Any]:
+    return {
+        "key": key,
+        "model": model,
+        "temperature": temperature,
+        "top_p": top_p,
+        "content": message.content,
+        "usage_metadata": dict(message.usage_metadata) if message.usage_metadata else None,
+        "response_metadata": message.response_metadata,
+        "latency_s": latency,
+        "ttft_s": ttft,
+        "recorded_at": time.time(),
+    }
+
+class RecordingChatModel(BaseChatModel):
+    """Pass-through to a live model that appends every prompt/response pair to the cassette."""
+
+    inner: BaseChatModel
+    model: str
+    temperature: float
+    top_p: float
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette-recorder"
+
+    def _key(self, messages: List[BaseMessage]) -> str:
+        return make_cache_key(self.model, self.temperature, self.top_p, _prompt_text(messages))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        start = time.perf_counter()
+        result = self.inner._generate(messages, stop=stop, **kwargs)
+        latency = time.perf_counter() - start
+        if attempt_abandoned():
+            # Dropped by the call policy, so a replay must not serve it
+            return result
+        get_cassette().record(_entry(self._key(messages), self.model, self.temperature, self.top_p,
+                                     result.generations[0].message, latency, None))
+        return result
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        start = time.perf_counter()
+        result = await self.inner._agenerate(messages, stop=stop, **kwargs)
+        latency = time.perf_counter() - start
+        if attempt_abandoned():
+            return result
+        get_cassette().record(_entry(self._key(messages), self.model, self.temperature, self.top_p,
+                                     result.generations[0].message, latency, None))
+        return result
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        start = time.perf_counter()
+        ttft = None
+        aggregate = None
+        for chunk in self.inner._stream(messages, stop=stop, **kwargs):
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            aggregate = chunk if aggregate is None else aggregate + chunk
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+        if aggregate is not None and not attempt_abandoned():
+            message = AIMessage(content=aggregate.message.content,
+                                usage_metadata=aggregate.message.usage_metadata,
+                                response_metadata=aggregate.message.response_metadata)
+            get_cassette().record(_entry(self._key(messages), self.model, self.temperature, self.top_p,
+                                         message, time.perf_counter() - start, ttft))
+
+class ReplayChatModel(BaseChatModel):
+    """Serves recorded responses byte-for-byte, optionally sleeping for the recorded latency."""
+
+    model: str
+    temperature: float
+    top_p: float
+    preserve_timing: bool = LLM_CASSETTE_REPLAY_TIMING
+
+    @property
+    def _llm_type(self) -> str:
+        return "cassette-replay"
+
+    def _lookup(self, messages: List[BaseMessage]) -> Dict[str, Any]:
+        key = make_cache_key(self.model, self.temperature, self.top_p, _prompt_text(messages))
+        return get_cassette(replay=True).next_for(key)
+
+    @staticmethod
+    def _message(entry: Dict[str, Any]) -> AIMessage:
+        return AIMessage(content=entry["content"], usage_metadata=entry.get("usage_metadata"),
+                         response_metadata=entry.get("response_metadata") or {})
+
+    def _delays(self, entry: Dict[str, Any], pieces: int):
+        if not self.preserve_timing:
+            return 0.0, 0.0
+        latency = entry.get("latency_s") or 0.0
+        ttft = entry.get("ttft_s")
+        if ttft is None:
+            return latency, 0.0
+        return ttft, max(0.0, latency - ttft) / max(1, pieces)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        entry = self._lookup(messages)
+        if self.preserve_timing:
+            time.sleep(entry.get("latency_s") or 0.0)
+        return ChatResult(generations=[ChatGeneration(message=self._message(entry))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        entry = self._lookup(messages)
+        if self.preserve_timing:
+            await asyncio.sleep(entry.get("latency_s") or 0.0)
+        return ChatResult(generations=[ChatGeneration(message=self._message(entry))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        entry = self._lookup(messages)
+        content = entry["content"]
+        pieces = content.splitlines(keepends=True) or [content]
+        first_delay, per_piece = self._delays(entry, len(pieces))
+        time.sleep(first_delay)
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(per_piece)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=piece,
+                usage_metadata=entry.get("usage_metadata") if i == len(pieces) - 1 else None))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        entry = self._lookup(messages)
+        content = entry["content"]
+        pieces = content.splitlines(keepends=True) or [content]
+        first_delay, per_piece = self._delays(entry, len(pieces))
+        await asyncio.sleep(first_delay)
+        for i, piece in enumerate(pieces):
+            if i:
+                await asyncio.sleep(per_piece)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=piece,
+                usage_metadata=entry.get("usage_metadata") if i == len(pieces) - 1 else None))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
@@ -0,0 +1,64 @@
+__module_name__ = "checkpoint_serde"
+
+import os
+import zlib
+from typing import Any, Optional, Tuple
+
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+# "jsonplus": LangGraph's default serializer; "compressed": the same msgpack encoding,
+# compressed with zstd (or zlib when the optional zstandard package is missing) above a size threshold
+CHECKPOINT_SERDE = os.getenv("CHECKPOINT_SERDE", "jsonplus").lower()
+# Smaller payloads (flags, short strings) aren't worth a compression call
+CHECKPOINT_COMPRESS_MIN_BYTES = int(os.getenv("CHECKPOINT_COMPRESS_MIN_BYTES", "2048"))
+CHECKPOINT_COMPRESS_LEVEL = int(os.getenv("CHECKPOINT_COMPRESS_LEVEL", "3"))
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class CompressedSerializer(SerializerProtocol):
+    """
+    Wraps a serializer and compresses its msgpack output when it is large.
+    Compressed payloads get a "+zstd"/"+zlib" suffix on their type, so
+    checkpoints written without compression still load.
+    """
+
+    def __init__(self, inner: Optional[SerializerProtocol] = None,
+                 min_bytes: int = CHECKPOINT_COMPRESS_MIN_BYTES, level: int = CHECKPOINT_COMPRESS_LEVEL,
+                 codec: Optional[str] = None):
+        self.inner = inner or JsonPlusSerializer()
+        self.min_bytes = min_bytes
+        self.codec = codec or ("zstd" if zstandard is not None else "zlib")
+        self.level = level
+        if self.codec == "zstd":
+            if zstandard is None:
+                raise ValueError("zstd compression needs the zstandard package")
+            # zstandard contexts are not thread-safe; the saver is shared, so one per call
+            self._compress = lambda data: zstandard.ZstdCompressor(level=level).compress(data)
+        else:
+            self._compress = lambda data: zlib.compress(data, level)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if type_ != "msgpack" or len(data) < self.min_bytes:
+            return type_, data
+        return f"{type_}+{self.codec}", self._compress(data)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_.endswith("+zstd"):
+            if zstandard is None:
+                raise ValueError("Checkpoint was compressed with zstd; install the zstandard package to read it")
+            return self.inner.loads_typed((type_[:-5], zstandard.ZstdDecompressor().decompress(payload)))
+        if type_.endswith("+zlib"):
+            return self.inner.loads_typed((type_[:-5], zlib.decompress(payload)))
+        return self.inner.loads_typed(data)
+
+def get_checkpoint_serde() -> Optional[SerializerProtocol]:
+    """Serializer for the checkpointer per CHECKPOINT_SERDE (None means the saver's default)."""
+    if CHECKPOINT_SERDE == "compressed":
+        return CompressedSerializer()
+    return None
@@ -0,0 +1,264 @@
+__module_name__ = "fake_llm"
+
+import asyncio
+import json
+import os
+import random
+import re
+import time
+from typing import Any, Dict, Iterator, AsyncIterator, List, Optional
+
+from google.api_core import exceptions as google_exceptions
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Latency spec for time-to-first-token, e.g. "fixed:0.5", "uniform:0.2,1.5",
+# "normal:0.8,0.2" or "lognormal:-0.5,0.4" (seconds).
+FAKE_LLM_LATENCY = os.getenv("FAKE_LLM_LATENCY", "fixed:0")
+FAKE_LLM_TOKENS_PER_SEC = float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "0"))
+FAKE_LLM_FAILURE_RATE = float(os.getenv("FAKE_LLM_FAILURE_RATE", "0"))
+# Share of routing replies mangled (prose preamble, missing closing brace) unless JSON mode was requested
+FAKE_LLM_MALFORMED_JSON_RATE = float(os.getenv("FAKE_LLM_MALFORMED_JSON_RATE", "0"))
+FAKE_LLM_OUTPUT_TOKENS = int(os.getenv("FAKE_LLM_OUTPUT_TOKENS", "400"))
+FAKE_LLM_SEED = os.getenv("FAKE_LLM_SEED", "0")
+
+def sample_latency(spec: str, rng: random.Random) -> float:
+    """Draw one latency in seconds from a "kind:params" spec."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v.strip()] if params else []
+    kind = kind.strip().lower()
+    if kind == "fixed":
+        return values[0] if values else 0.0
+    if kind == "uniform":
+        return rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return rng.lognormvariate(values[0], values[1])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(m.content if isinstance(m.content, str) else str(m.content) for m in messages)
+
+def _state_flag(prompt: str, name: str) -> bool:
+    match = re.search(rf'"?{name}"?\s*[:=]\s*(true|false)', prompt, re.IGNORECASE)
+    return bool(match) and match.group(1).lower() == "true"
+
+def _router_response(prompt: str) -> str:
+    match = re.search(r"User Input: (.*?)\n\n\*\*Available Actions", prompt, re.DOTALL)
+    user_input = (match.group(1) if match else "").strip()
+    text = user_input.lower()
+    analyzed = _state_flag(prompt, "analysis_completed")
+    has_jd = bool(re.search(r'"?target_job_description"?\s*[:=]\s*["{]', prompt))
+
+    url = None
+    url_match = re.search(r"https?://[^\s]*linkedin\.com/in/[^\s]+", user_input)
+    if url_match:
+        url = url_match.group(0)
+
+    if url:
+        action, reply = "CALL_ANALYZE", "Deploying my Profile Analyzer Agent now."
+    elif len(user_input) > 200 or _state_flag(prompt, "awaiting_job_description"):
+        action, reply = "CALL_JOB_FIT", "Evaluating your job fit."
+    elif "analy" in text:
+        action, reply = "CALL_ANALYZE", "Deploying my Profile Analyzer Agent now."
+    elif "rewrite" in text or "improve" in text:
+        action, reply = ("CALL_REWRITE", "Generating content rewrites.") if analyzed else \
+            ("CALL_ANALYZE", "Let's analyze your profile first.")
+    elif "job" in text:
+        if has_jd:
+            action, reply = "CALL_JOB_FIT", "Evaluating your job fit."
+        else:
+            action, reply = "REQUEST_JOB_DESCRIPTION", "Please copy and paste the job description text."
+    elif "career" in text or "guid" in text or "advice" in text:
+        action, reply = "CALL_GUIDE", "Preparing career guidance."
+    elif text in ("yes", "y", "sure", "ok", "go ahead"):
+        action, reply = ("CALL_REWRITE", "Great, continuing.") if analyzed else \
+            ("CALL_ANALYZE", "Great, starting the analysis.")
+    else:
+        action, reply = "RESPOND_DIRECTLY", "I can analyze, rewrite, evaluate job fit or guide your career."
+
+    response = {
+        "current_router_action": action,
+        "current_bot_response": reply,
+        "linkedin_url": url,
+        "is_profile_analyzed": analyzed,
+        "awaiting_user_confirmation": False,
+        "awaiting_job_description": action == "REQUEST_JOB_DESCRIPTION",
+        "proposed_next_action": "rewrite" if analyzed else "analyze",
+        "last_agent_called": None,
+        "user_requested_update": False,
+    }
+    if "USER INSTRUCTION EXTRACTION" in prompt:
+        # Fused routing prompt
+        response["user_instructions"] = _instruction_data(user_input)
+    return json.dumps(response, indent=2)
+
+_STYLE_WORDS = ("professional", "formal", "casual", "technical", "creative", "confident")
+_LENGTH_WORDS = {"brief": "brief", "concise": "brief", "short": "brief", "detailed": "detailed"}
+
+def _instruction_data(user_input: str) -> Dict[str, Any]:
+    text = user_input.lower()
+    styles = [word for word in _STYLE_WORDS if word in text]
+    length = next((value for word, value in _LENGTH_WORDS.items() if word in text), "standard")
+    focus = re.findall(r"focus on ([\w\s]+?)(?:[.,!?]|$)", text)
+    found = bool(styles or focus or length != "standard")
+    return {
+        "has_specific_instructions": found,
+        "style_preferences": styles,
+        "content_focus": focus,
+        "tone_adjustments": [],
+        "length_requirements": length,
+        "exclusions": [],
+        "target_audience": "",
+        "customization_context": "",
+        "raw_instructions": user_input if found else "",
+        "confidence_score": 0.9 if found else 0.0,
+    }
+
+def _instruction_response(prompt: str) -> str:
+    match = re.search(r'User Input: "(.*?)"\n', prompt, re.DOTALL)
+    return json.dumps(_instruction_data(match.group(1) if match else ""))
+
+def _summary_response(prompt: str) -> str:
+    match = re.search(r"\*\*New Messages:\*\*\n(.*?)\n\n\*\*Instructions", prompt, re.DOTALL)
+    users = [line[len("User: "):][:60] for line in (match.group(1) if match else "").splitlines()
+             if line.startswith("User: ")]
+    return "The user asked: " + "; ".join(users) + ". The assistant handled each request."
+
+def _markdown_report(title: str, sections: List[str], score_label: str, rng: random.Random) -> str:
+    filler = ("This is deterministic placeholder content generated by the fake chat model "
+              "for offline benchmarking of the orchestration layer. ")
+    per_section = max(1, (FAKE_LLM_OUTPUT_TOKENS * 4) // (len(filler) * max(1, len(sections))))
+    parts = [f"# {title}", ""]
+    for section in sections:
+        parts.extend([f"## {section}", filler * per_section, ""])
+    parts.append(f"## 🏆 {score_label}: {rng.randint(55, 95)}/100")
+    return "\n".join(parts)
+
+def build_fake_response(prompt: str, rng: random.Random) -> str:
+    """Pick a canned response by recognising which prompt template produced the request."""
+    if "Router Agent" in prompt and "User Input:" in prompt and "Output Format (JSON only)" in prompt:
+        return _router_response(prompt)
+    if "extracting specific instructions" in prompt:
+        return _instruction_response(prompt)
+    if "Conversation Summarizer" in prompt:
+        return _summary_response(prompt)
+    if "Raw Agent Output:" in prompt:
+        agent_type = re.search(r"Agent Type: (\w+)", prompt)
+        label = agent_type.group(1) if agent_type else "agent"
+        return (f"My {label} agent has finished and the full report is in the sidebar. "
+                "Would you like to continue to the next step?")
+    if "Profile Analysis Agent" in prompt:
+        return _markdown_report("LinkedIn Profile Analysis Report",
+                                ["📊 Analysis Summary", "✅ Key Strengths", "🎯 Areas for Improvement",
+                                 "🚀 Priority Actions"], "Overall Profile Score", rng)
+    if "Content Rewriter Agent" in prompt:
+        return _markdown_report("LinkedIn Content Optimization Suggestions",
+                                ["📝 Summary Section Rewrites", "💼 Experience Section Rewrites",
+                                 "🎯 Optimization Notes"], "Rewrite Impact Score", rng)
+    if "Job Fit Evaluator Agent" in prompt:
+        return _markdown_report("Job Fit Evaluation Report",
+                                ["📊 Overall Fit Assessment", "🛠️ Skills Alignment Analysis",
+                                 "🚀 Improvement Roadmap"], "Overall Fit Score", rng)
+    if "Career Guidance Agent" in prompt:
+        return _markdown_report("Career Guidance Report",
+                                ["📋 Guidance Summary", "🚀 Immediate Actions to Take",
+                                 "🤝 Networking Strategy"], "Career Readiness Score", rng)
+    return "This is a response from the fake chat model."
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for ChatGoogleGenerativeAI used for offline benchmarking.
+    Responses are templated per prompt type; latency, token throughput and
+    failure rate are configurable so orchestration overhead can be measured
+    without a Google API key or network access.
+    """
+
+    model: str = "fake-chat-model"
+    temperature: float = 0.3
+    top_p: float = 0.9
+    latency: str = FAKE_LLM_LATENCY
+    tokens_per_sec: float = FAKE_LLM_TOKENS_PER_SEC
+    failure_rate: float = FAKE_LLM_FAILURE_RATE
+    malformed_json_rate: float = FAKE_LLM_MALFORMED_JSON_RATE
+    seed: Optional[int] = int(FAKE_LLM_SEED) if FAKE_LLM_SEED.lstrip("-").isdigit() else None
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"model": self.model, "temperature": self.temperature, "top_p": self.top_p}
+
+    def _plan(self, messages: List[BaseMessage], kwargs: Dict[str, Any]):
+        prompt = _prompt_text(messages)
+        if self.failure_rate and self._rng.random() < self.failure_rate:
+            raise google_exceptions.ResourceExhausted("429 Fake quota exceeded (injected failure)")
+        text = build_fake_response(prompt, self._rng)
+        json_mode = bool((kwargs.get("generation_config") or {}).get("response_mime_type"))
+        if '"current_router_action"' in text and not json_mode and self.malformed_json_rate \
+                and self._rng.random() < self.malformed_json_rate:
+            text = "Here is my routing decision:\n" + text.rstrip().rstrip("}")
+        first_token_delay = sample_latency(self.latency, self._rng)
+        per_token_delay = 1.0 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0.0
+        usage = {
+            "input_tokens": estimate_tokens(prompt),
+            "output_tokens": estimate_tokens(text),
+            "total_tokens": estimate_tokens(prompt) + estimate_tokens(text),
+        }
+        return text, first_token_delay, per_token_delay, usage
+
+    @staticmethod
+    def _chunks(text: str) -> List[str]:
+        return re.findall(r"\S+\s*|\s+", text)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        text, first_token_delay, per_token_delay, usage = self._plan(messages, kwargs)
+        time.sleep(first_token_delay + per_token_delay * usage["output_tokens"])
+        message = AIMessage(content=text, usage_metadata=usage,
+                            response_metadata={"model_name": self.model, "finish_reason": "STOP"})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        text, first_token_delay, per_token_delay, usage = self._plan(messages, kwargs)
+        await asyncio.sleep(first_token_delay + per_token_delay * usage["output_tokens"])
+        message = AIMessage(content=text, usage_metadata=usage,
+                            response_metadata={"model_name": self.model, "finish_reason": "STOP"})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        text, first_token_delay, per_token_delay, usage = self._plan(messages, kwargs)
+        time.sleep(first_token_delay)
+        pieces = self._chunks(text)
+        for i, piece in enumerate(pieces):
+            time.sleep(per_token_delay * estimate_tokens(piece))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=piece, usage_metadata=usage if i == len(pieces) - 1 else None))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        text, first_token_delay, per_token_delay, usage = self._plan(messages, kwargs)
+        await asyncio.sleep(first_token_delay)
+        pieces = self._chunks(text)
+        for i, piece in enumerate(pieces):
+            await asyncio.sleep(per_token_delay * estimate_tokens(piece))
+            chunk = ChatGenerationChunk(message=AIMessageChunk(
+                content=piece, usage_metadata=usage if i == len(pieces) - 1 else None))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
@@ -1,21 +1,339 @@
 __module_name__ = "llm"
 
 from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_core.messages import AIMessage, AIMessageChunk
 from dotenv import load_dotenv
+from backend.llm_cache import get_llm_cache, make_cache_key
+from backend.call_policy import attempt_abandoned, get_call_policy
+from backend.call_metrics import finish_call_record, mark_first_token, new_call_record, with_first_token_timer
+from backend.rate_limiter import (
+    RATE_LIMIT_ENABLED,
+    current_session_id,
+    estimate_request_tokens,
+    get_rate_limiter,
+    priority_for,
+)
+from typing import Dict, Tuple, Any, Optional
+import threading
 import os
 
 load_dotenv()
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 
-def get_chat_model(temperature: float = 0.3) -> ChatGoogleGenerativeAI:
-    if not GOOGLE_API_KEY:
-        raise ValueError("GOOGLE_API_KEY not found. Check your .env file.")
+# "gemini" talks to Google; "fake" uses the deterministic offline model in backend/fake_llm.py;
+# "record" talks to Google and appends every call to a cassette; "replay" serves that cassette offline
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini").lower()
+
+DEFAULT_MODEL = "gemini-2.5-flash-preview-04-17"
+DEFAULT_TOP_P = 0.9
+
+# Registry key: (model name, temperature, top_p)
+ModelKey = Tuple[str, float, float]
+
+_registry: Dict[ModelKey, ChatGoogleGenerativeAI] = {}
+_registry_lock = threading.Lock()
+_registry_api_key: Optional[str] = None
+_registry_counters = {"requests": 0, "created": 0, "reused": 0}
+
+def _current_api_key() -> Optional[str]:
+    # The Streamlit app writes the key into os.environ after this module may
+    # already have been imported, so prefer the live environment value.
+    return os.getenv("GOOGLE_API_KEY") or GOOGLE_API_KEY
+
+def _create_chat_model(key: ModelKey, api_key: Optional[str]) -> ChatGoogleGenerativeAI:
+    model, temperature, top_p = key
+    if LLM_BACKEND == "fake":
+        from backend.fake_llm import FakeChatModel
+        return FakeChatModel(model=model, temperature=temperature, top_p=top_p)
+    if LLM_BACKEND == "replay":
+        from backend.cassette import ReplayChatModel
+        return ReplayChatModel(model=model, temperature=temperature, top_p=top_p)
     try:
-        return ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash-preview-04-17",
-            google_api_key=GOOGLE_API_KEY,
+        client = ChatGoogleGenerativeAI(
+            model=model,
+            google_api_key=api_key,
             temperature=temperature,
-            top_p=0.9,
+            top_p=top_p,
         )
     except Exception as e:
         raise ValueError(f"Failed to initialize chat model: {str(e)}")
+    if LLM_BACKEND == "record":
+        from backend.cassette import RecordingChatModel
+        return RecordingChatModel(inner=client, model=model, temperature=temperature, top_p=top_p)
+    return client
+
+def _settle(limiter, ticket, response=None, error: Optional[BaseException] = None) -> None:
+    """
+    Settle an attempt's rate-limit ticket. Errors always reach the limiter, so a 429
+    starts its cooldown even on an abandoned attempt; a response the call policy
+    dropped (deadline passed, hedge lost) is not reconciled.
+    """
+    if limiter is None or (error is None and attempt_abandoned()):
+        return
+    limiter.settle(ticket, response, error=error)
+
+class AgentChatModel:
+    """
+    Per-agent handle over a shared client. Calls go through the response cache
+    using the agent's TTL, then the rate limiter and the retry/hedging policy;
+    everything else is delegated to the client.
+    """
+
+    def __init__(self, client: ChatGoogleGenerativeAI, key: ModelKey, agent: str):
+        self.client = client
+        self.key = key
+        self.agent = agent
+        # Only real model output is worth persisting
+        self.use_cache = LLM_BACKEND == "gemini"
+        # Only live traffic counts against the Gemini quota
+        self.use_limiter = RATE_LIMIT_ENABLED in ("1", "true", "yes", "on") or (
+            RATE_LIMIT_ENABLED == "auto" and LLM_BACKEND in ("gemini", "record"))
+
+    def _cache_lookup(self, prompt, kwargs):
+        cache = get_llm_cache() if self.use_cache else None
+        if cache is None or kwargs or cache.ttl_for(self.agent) <= 0:
+            return None, None, None
+        cache_key = make_cache_key(*self.key, prompt)
+        return cache, cache_key, cache.get(cache_key, self.agent)
+
+    def _cache_store(self, cache, cache_key, response) -> None:
+        if cache is None:
+            return
+        content = response.content if hasattr(response, "content") else str(response)
+        if isinstance(content, str) and content.strip():
+            cache.put(cache_key, self.agent, {
+                "content": content,
+                "usage_metadata": getattr(response, "usage_metadata", None),
+            })
+
+    def _limiter_args(self, prompt):
+        return current_session_id(), priority_for(self.agent), estimate_request_tokens(prompt)
+
+    def _acquire(self, prompt):
+        if not self.use_limiter:
+            return None, None
+        limiter = get_rate_limiter()
+        return limiter, limiter.acquire(*self._limiter_args(prompt))
+
+    async def _aacquire(self, prompt):
+        if not self.use_limiter:
+            return None, None
+        limiter = get_rate_limiter()
+        return limiter, await limiter.aacquire(*self._limiter_args(prompt))
+
+    def _cached_message(self, cached, chunk: bool = False):
+        message_cls = AIMessageChunk if chunk else AIMessage
+        return message_cls(
+            content=cached["content"],
+            response_metadata={"cache_hit": True},
+            usage_metadata=cached.get("usage_metadata"),
+        )
+
+    # One attempt each: take a rate-limit slot, call the client, settle the slot
+
+    def _invoke_once(self, prompt, kwargs, record):
+        limiter, ticket = self._acquire(prompt)
+        try:
+            response = self.client.invoke(prompt, **with_first_token_timer(kwargs, record))
+        except BaseException as e:
+            _settle(limiter, ticket, error=e)
+            raise
+        _settle(limiter, ticket, response)
+        return response
+
+    def _stream_once(self, prompt, kwargs):
+        limiter, ticket = self._acquire(prompt)
+        aggregate = None
+        try:
+            for chunk in self.client.stream(prompt, **kwargs):
+                aggregate = chunk if aggregate is None else aggregate + chunk
+                yield chunk
+        except BaseException as e:
+            _settle(limiter, ticket, error=e)
+            raise
+        _settle(limiter, ticket, aggregate)
+
+    async def _ainvoke_once(self, prompt, kwargs, record):
+        limiter, ticket = await self._aacquire(prompt)
+        try:
+            response = await self.client.ainvoke(prompt, **with_first_token_timer(kwargs, record))
+        except BaseException as e:
+            # Also a hedge or deadline cancelling the task (CancelledError)
+            _settle(limiter, ticket, error=e)
+            raise
+        _settle(limiter, ticket, response)
+        return response
+
+    async def _astream_once(self, prompt, kwargs):
+        limiter, ticket = await self._aacquire(prompt)
+        aggregate = None
+        try:
+            async for chunk in self.client.astream(prompt, **kwargs):
+                aggregate = chunk if aggregate is None else aggregate + chunk
+                yield chunk
+        except BaseException as e:
+            _settle(limiter, ticket, error=e)
+            raise
+        _settle(limiter, ticket, aggregate)
+
+    # Each public call leaves one record (tokens, wall time, TTFT, retries) for backend/call_metrics.py
+
+    def invoke(self, prompt, **kwargs):
+        record = new_call_record(self.agent)
+        cache, cache_key, cached = self._cache_lookup(prompt, kwargs)
+        if cached is not None:
+            record["cache_hit"] = True
+            response = self._cached_message(cached)
+            finish_call_record(record, response)
+            return response
+
+        try:
+            response = get_call_policy().run(lambda: self._invoke_once(prompt, kwargs, record), self.agent, record)
+        except Exception as e:
+            record["error"] = type(e).__name__
+            finish_call_record(record)
+            raise
+        finish_call_record(record, response)
+        self._cache_store(cache, cache_key, response)
+        return response
+
+    def stream(self, prompt, **kwargs):
+        """Yield message chunks as the model produces them; a cache hit arrives as one chunk."""
+        record = new_call_record(self.agent)
+        cache, cache_key, cached = self._cache_lookup(prompt, kwargs)
+        if cached is not None:
+            record["cache_hit"] = True
+            chunk = self._cached_message(cached, chunk=True)
+            finish_call_record(record, chunk)
+            yield chunk
+            return
+
+        aggregate = None
+        try:
+            for chunk in get_call_policy().run_stream(lambda: self._stream_once(prompt, kwargs), self.agent, record):
+                mark_first_token(record)
+                aggregate = chunk if aggregate is None else aggregate + chunk
+                yield chunk
+        except Exception as e:
+            record["error"] = type(e).__name__
+            finish_call_record(record)
+            raise
+        finish_call_record(record, aggregate)
+        if aggregate is not None:
+            self._cache_store(cache, cache_key, aggregate)
+
+    async def ainvoke(self, prompt, **kwargs):
+        record = new_call_record(self.agent)
+        cache, cache_key, cached = self._cache_lookup(prompt, kwargs)
+        if cached is not None:
+            record["cache_hit"] = True
+            response = self._cached_message(cached)
+            finish_call_record(record, response)
+            return response
+
+        try:
+            response = await get_call_policy().arun(lambda: self._ainvoke_once(prompt, kwargs, record), self.agent, record)
+        except Exception as e:
+            record["error"] = type(e).__name__
+            finish_call_record(record)
+            raise
+        finish_call_record(record, response)
+        self._cache_store(cache, cache_key, response)
+        return response
+
+    async def astream(self, prompt, **kwargs):
+        """Async counterpart of stream()."""
+        record = new_call_record(self.agent)
+        cache, cache_key, cached = self._cache_lookup(prompt, kwargs)
+        if cached is not None:
+            record["cache_hit"] = True
+            chunk = self._cached_message(cached, chunk=True)
+            finish_call_record(record, chunk)
+            yield chunk
+            return
+
+        aggregate = None
+        try:
+            async for chunk in get_call_policy().arun_stream(lambda: self._astream_once(prompt, kwargs), self.agent, record):
+                mark_first_token(record)
+                aggregate = chunk if aggregate is None else aggregate + chunk
+                yield chunk
+        except Exception as e:
+            record["error"] = type(e).__name__
+            finish_call_record(record)
+            raise
+        finish_call_record(record, aggregate)
+        if aggregate is not None:
+            self._cache_store(cache, cache_key, aggregate)
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+def _get_shared_client(key: ModelKey) -> ChatGoogleGenerativeAI:
+    """
+    Return the process-wide shared client for (model, temperature, top_p).
+
+    Clients are created once per configuration and reused by every agent and
+    session, so their underlying gRPC channels (and keep-alive connections)
+    are shared too. The registry is rebuilt if the API key changes.
+    """
+    global _registry_api_key
+    api_key = _current_api_key()
+    if not api_key and LLM_BACKEND in ("gemini", "record"):
+        raise ValueError("GOOGLE_API_KEY not found. Check your .env file.")
+
+    with _registry_lock:
+        if api_key != _registry_api_key:
+            _registry.clear()
+            _registry_api_key = api_key
+        _registry_counters["requests"] += 1
+        client = _registry.get(key)
+        if client is None:
+            client = _create_chat_model(key, api_key)
+            _registry[key] = client
+            _registry_counters["created"] += 1
+        else:
+            _registry_counters["reused"] += 1
+        return client
+
+def get_chat_model(temperature: float = 0.3, top_p: float = DEFAULT_TOP_P,
+                   model: str = DEFAULT_MODEL, agent: str = "default") -> AgentChatModel:
+    key = (model, float(temperature), float(top_p))
+    return AgentChatModel(_get_shared_client(key), key, agent)
+
+def clear_chat_models() -> None:
+    """Drop all shared clients, e.g. after the user logs out and the API key is removed."""
+    global _registry_api_key
+    with _registry_lock:
+        _registry.clear()
+        _registry_api_key = None
+
+def _client_channels(client: ChatGoogleGenerativeAI) -> list:
+    # Cassette recorders wrap the live client
+    client = getattr(client, "inner", client)
+    channels = []
+    for attr in ("client", "async_client_running"):
+        service_client = getattr(client, attr, None)
+        transport = getattr(service_client, "_transport", None) if service_client is not None else None
+        if transport is None:
+            continue
+        channel = getattr(transport, "_grpc_channel", None) or getattr(transport, "_session", None)
+        channels.append(channel if channel is not None else transport)
+    return channels
+
+def get_model_registry_stats() -> Dict[str, Any]:
+    """Report how many shared clients and underlying connections are live."""
+    with _registry_lock:
+        clients = dict(_registry)
+        counters = dict(_registry_counters)
+    channels = {id(channel) for client in clients.values() for channel in _client_channels(client)}
+    return {
+        "backend": LLM_BACKEND,
+        "clients": len(clients),
+        "connections": len(channels),
+        "configs": [
+            {"model": model, "temperature": temperature, "top_p": top_p}
+            for (model, temperature, top_p) in clients
+        ],
+        **counters,
+    }
@@ -0,0 +1,173 @@
+__module_name__ = "llm_cache"
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Any, Optional
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+LLM_CACHE_PATH = os.getenv(
+    "LLM_CACHE_PATH",
+    os.path.join(os.path.dirname(__file__), "cache", "llm_cache.sqlite3"),
+)
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Per-agent TTLs in seconds. A TTL of 0 disables caching for that agent.
+# The router prompt embeds the session id and full conversation, so it never
+# repeats across sessions and is not worth storing.
+DEFAULT_AGENT_TTLS: Dict[str, int] = {
+    "router": 0,
+    "instruction_extractor": 0,
+    "output_processor": 0,
+    "profile_analyzer": 7 * 24 * 3600,
+    "content_rewriter": 24 * 3600,
+    "job_fit_evaluator": 7 * 24 * 3600,
+    "career_guide": 24 * 3600,
+}
+DEFAULT_TTL = 0
+
+def make_cache_key(model: str, temperature: float, top_p: float, prompt: Any) -> str:
+    """Content address for a call: hash of the model config and the full prompt text."""
+    prompt_text = prompt if isinstance(prompt, str) else str(prompt)
+    payload = json.dumps([model, float(temperature), float(top_p), prompt_text], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    SQLite-backed response store with per-agent TTLs and size-based LRU eviction.
+    Safe to share between threads; all access goes through a single connection.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_bytes: int = LLM_CACHE_MAX_BYTES,
+                 agent_ttls: Optional[Dict[str, int]] = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.agent_ttls = dict(DEFAULT_AGENT_TTLS)
+        self.agent_ttls.update(agent_ttls or {})
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "expired": 0, "stores": 0}
+        )
+        self._evictions = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                agent TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)")
+
+    def ttl_for(self, agent: str) -> int:
+        env_ttl = os.getenv(f"LLM_CACHE_TTL_{agent.upper()}")
+        if env_ttl is not None:
+            try:
+                return int(env_ttl)
+            except ValueError:
+                pass
+        return self.agent_ttls.get(agent, DEFAULT_TTL)
+
+    def get(self, key: str, agent: str) -> Optional[Dict[str, Any]]:
+        ttl = self.ttl_for(agent)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._counters[agent]["misses"] += 1
+                return None
+            payload, created_at = row
+            if ttl <= 0 or now - created_at > ttl:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._counters[agent]["expired"] += 1
+                self._counters[agent]["misses"] += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (now, key))
+            self._counters[agent]["hits"] += 1
+        return json.loads(payload)
+
+    def put(self, key: str, agent: str, value: Dict[str, Any]) -> None:
+        payload = json.dumps(value, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, agent, payload, size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, agent, payload, size, now, now),
+            )
+            self._counters[agent]["stores"] += 1
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access ASC"
+        ).fetchall():
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+            per_agent = {agent: dict(counts) for agent, counts in self._counters.items()}
+        hits = sum(c["hits"] for c in per_agent.values())
+        misses = sum(c["misses"] for c in per_agent.values())
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "evictions": self._evictions,
+            "agents": per_agent,
+        }
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """Return the process-wide response cache, or None when caching is disabled."""
+    global _cache
+    if not LLM_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache()
+    return _cache
+
+def get_llm_cache_stats() -> Dict[str, Any]:
+    cache = get_llm_cache()
+    if cache is None:
+        return {"status": "disabled"}
+    return {"status": "enabled", **cache.stats()}
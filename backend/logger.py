@@ -75,8 +75,8 @@ def log_agent_action(agent_name: str, action: str, state_changes: Optional[Dict[
     
     logger.info(" | ".join(parts))
 
-def log_router_decision(current_action: str, user_input: str, key_state_flags: Dict[str, Any]):
-    """Log router routing decisions."""
+def log_router_decision(current_action: str, user_input: str, key_state_flags: Dict[str, Any], source: str = "llm"):
+    """Log router routing decisions, tagged with what made them (llm, fast_path, classifier) and the LLM backend."""
     logger = get_logger()
     
     # Build state summary
@@ -91,7 +91,8 @@ def log_router_decision(current_action: str, user_input: str, key_state_flags: D
     
     truncated_input = user_input[:40] + "..." if len(user_input) > 40 else user_input
     
-    logger.info(f"ROUTER: Decision -> {current_action} | Input: '{truncated_input}' | {state_summary}")
+    backend = os.getenv("LLM_BACKEND", "gemini").lower()
+    logger.info(f"ROUTER: Decision -> {current_action} | Input: '{truncated_input}' | {state_summary} | Source: {source}/{backend}")
 
 def log_error(agent_name: str, error_msg: str, context: Optional[str] = None):
     """Log an error with context."""
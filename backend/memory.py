@@ -1,28 +1,130 @@
 __module_name__ = "memory"
 
-from typing import Optional, Dict, Any
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Iterable, Set
 from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import InMemorySaver
 
+from backend.checkpoint_serde import get_checkpoint_serde
+from backend.logger import log_error
+
+# "memory": process-local, lost on restart; "sqlite": durable file shared by replicas on one volume
+CHECKPOINTER = os.getenv("CHECKPOINTER", "memory").lower()
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", "backend/data/checkpoints.sqlite")
+# Checkpoints kept per session (0 keeps every step of every turn)
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "10"))
+# Sessions idle longer than this are deleted (0 keeps them forever)
+CHECKPOINT_TTL_S = float(os.getenv("CHECKPOINT_TTL_S", str(7 * 24 * 3600)))
+# How often expiry and vacuuming (and in memory mode the blob sweep) run in the background (0 disables)
+CHECKPOINT_VACUUM_INTERVAL_S = float(os.getenv("CHECKPOINT_VACUUM_INTERVAL_S", "600"))
+
 _saver: Optional[BaseCheckpointSaver] = None
+_blob_sweeper: Optional[threading.Thread] = None
+
+def _memory_channel_values(saver: InMemorySaver, channels: Iterable[str]) -> Set[Any]:
+    """Every value an InMemorySaver's checkpoints and pending writes hold for the given channels."""
+    channels = set(channels)
+    values = set()
+    # Copies, as turns write to the saver while the sweep runs
+    for (_, _, channel, _), typed in saver.blobs.copy().items():
+        if channel in channels and typed[0] != "empty":
+            values.add(saver.serde.loads_typed(typed))
+    for writes in saver.writes.copy().values():
+        for _, channel, typed, _ in writes.copy().values():
+            if channel in channels:
+                values.add(saver.serde.loads_typed(typed))
+    values.discard(None)
+    return values
+
+def _sweep_blobs(saver) -> None:
+    # Report/profile blobs are referenced from the "<name>_ref" state channels and the agent memo
+    from backend.blob_store import sweep_blobs
+    from backend.orchestrator.agent_memo import live_refs
+    from backend.orchestrator.state_schema import BLOB_FIELDS
+    channels = [f"{name}_ref" for name in BLOB_FIELDS]
+    if isinstance(saver, InMemorySaver):
+        refs = _memory_channel_values(saver, channels)
+    else:
+        refs = saver.channel_values(channels)
+    sweep_blobs([*refs, *live_refs()])
+
+def _blob_sweep_loop() -> None:
+    # The SQLite saver sweeps from its own maintenance pass; this covers memory mode
+    while True:
+        time.sleep(CHECKPOINT_VACUUM_INTERVAL_S)
+        try:
+            if isinstance(_saver, InMemorySaver):
+                _sweep_blobs(_saver)
+        except Exception as e:
+            log_error("memory", f"Blob sweep failed: {e}")
+
+def _start_blob_sweeper() -> None:
+    global _blob_sweeper
+    if _blob_sweeper is None and CHECKPOINT_VACUUM_INTERVAL_S > 0:
+        _blob_sweeper = threading.Thread(target=_blob_sweep_loop, name="blob-sweep", daemon=True)
+        _blob_sweeper.start()
+
+def _create_saver() -> BaseCheckpointSaver:
+    serde = get_checkpoint_serde()
+    if CHECKPOINTER == "sqlite":
+        from backend.sqlite_saver import SQLiteSaver
+        return SQLiteSaver(CHECKPOINT_DB_PATH, keep_last=CHECKPOINT_KEEP_LAST, ttl_s=CHECKPOINT_TTL_S,
+                           vacuum_interval_s=CHECKPOINT_VACUUM_INTERVAL_S, serde=serde, on_maintain=_sweep_blobs)
+    _start_blob_sweeper()
+    return InMemorySaver(serde=serde)
 
 def get_memory_saver() -> BaseCheckpointSaver:
     global _saver
     if _saver is None:
-        _saver = InMemorySaver()
+        _saver = _create_saver()
     return _saver
 
 def clear_memory() -> None:
+    """Delete every session's checkpoints (tests and admin use; see delete_thread for one session)."""
     global _saver
-    if _saver is not None:
-        _saver = InMemorySaver()
+    if _saver is None:
+        return
+    if hasattr(_saver, "clear"):
+        _saver.clear()
+    else:
+        # In place, so graphs already compiled with this saver keep using it
+        _saver.storage.clear()
+        _saver.writes.clear()
+        _saver.blobs.clear()
+        # Memory-mode blobs (and the memo entries pointing at them) die with the checkpoints
+        from backend.blob_store import BLOB_STORE, clear_blobs
+        from backend.orchestrator.agent_memo import clear_memo
+        if BLOB_STORE == "memory":
+            clear_blobs()
+            clear_memo()
+
+def delete_thread(thread_id: str) -> None:
+    """Delete one session's checkpoints (logout, reset); every other session keeps its state."""
+    get_memory_saver().delete_thread(thread_id)
+
+def has_thread(thread_id: str) -> bool:
+    """Whether the checkpointer holds any state for the session."""
+    saver = get_memory_saver()
+    if hasattr(saver, "has_thread"):
+        return saver.has_thread(thread_id)
+    return saver.get_tuple({"configurable": {"thread_id": thread_id}}) is not None
 
 def get_memory_stats() -> Dict[str, Any]:
     global _saver
     if _saver is None:
         return {"status": "not_initialized", "type": None}
-    return {
+    stats = {
         "status": "initialized",
         "type": type(_saver).__name__,
         "class": str(type(_saver))
     }
+    from backend.blob_store import get_blob_stats
+    stats["blob_store"] = get_blob_stats()
+    if hasattr(_saver, "stats"):
+        stats.update(_saver.stats())
+    elif isinstance(_saver, InMemorySaver):
+        stats["threads"] = len(_saver.storage)
+        stats["checkpoints"] = sum(len(ns) for thread in _saver.storage.values() for ns in thread.values())
+    return stats
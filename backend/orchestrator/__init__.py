@@ -1,6 +1,6 @@
 __module_name__ = "orchestrator"
 
-from .langgraph_graph import build_graph
+from .langgraph_graph import build_full_report_graph, build_graph
 from .state_schema import ProfileBotState
 
-__all__ = ["build_graph", "ProfileBotState"]
\ No newline at end of file
+__all__ = ["build_graph", "build_full_report_graph", "ProfileBotState"]
\ No newline at end of file
@@ -0,0 +1,122 @@
+__module_name__ = "agent_memo"
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from .state_schema import ProfileBotState
+from agents.profile_analyzer import FALLBACK_REPORT
+from backend.blob_store import get_value, put_value
+from backend.logger import log_agent_action
+
+# Reuse an agent's report when the router dispatches it again for unchanged inputs
+# ("show me the analysis again"); user_requested_update always runs the agent
+AGENT_MEMO_ENABLED = os.getenv("AGENT_MEMO_ENABLED", "true").lower() == "true"
+# "session": reports are reused within the session that produced them;
+# "global": by any session with the same inputs (same profile, job description, ...)
+AGENT_MEMO_SCOPE = os.getenv("AGENT_MEMO_SCOPE", "session").lower()
+AGENT_MEMO_MAX_ENTRIES = int(os.getenv("AGENT_MEMO_MAX_ENTRIES", "1024"))
+
+# State fields each memoized agent's report depends on, besides target_role and the
+# instruction summary. The "_ref" fields are content hashes from the blob store, so
+# nothing large is hashed again; conversation_context only carries tone and is left out.
+MEMO_INPUTS = {
+    "analyze": ("linkedin_data_ref",),
+    # The analysis report (not the raw profile) is what job fit reads, so a refreshed analysis misses
+    "job_fit": ("profile_analysis_report_ref", "target_job_description_ref"),
+}
+
+# Placeholder reports an agent returns instead of raising when its model call fails.
+# Memoizing one would replay a transient failure (to every session in global scope);
+# the job fit evaluator raises instead, so its failures never reach remember().
+FAILED_REPORTS = {
+    "analyze": FALLBACK_REPORT,
+}
+
+_memo_lock = threading.Lock()
+# key -> blob store ref of the report
+_memo: "OrderedDict[str, str]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "stores": 0, "bypassed": 0, "rejected": 0}
+
+def memo_key(state: ProfileBotState, agent: str) -> str:
+    """Fingerprint of agent's inputs in the state, scoped to the session unless AGENT_MEMO_SCOPE is global."""
+    instructions = state.current_user_instructions or {}
+    inputs = {field: getattr(state, field) for field in MEMO_INPUTS[agent]}
+    inputs["target_role"] = state.target_role
+    inputs["instructions"] = instructions.get("summary")
+    scope = None if AGENT_MEMO_SCOPE == "global" else state.session_id
+    return hashlib.sha1(json.dumps([agent, scope, inputs], sort_keys=True).encode("utf-8")).hexdigest()
+
+def _count(event: str) -> None:
+    with _memo_lock:
+        _stats[event] += 1
+
+def memoized(state: ProfileBotState, agent: str) -> bool:
+    """Whether recall would return a report for agent (without counting a hit)."""
+    if not AGENT_MEMO_ENABLED or agent not in MEMO_INPUTS or state.user_requested_update:
+        return False
+    return memo_key(state, agent) in _memo
+
+def recall(state: ProfileBotState, agent: str) -> Optional[str]:
+    """Stored report of agent for the state's current inputs, or None when the agent has to run."""
+    if not AGENT_MEMO_ENABLED or agent not in MEMO_INPUTS:
+        return None
+    if state.user_requested_update:
+        _count("bypassed")
+        return None
+    key = memo_key(state, agent)
+    with _memo_lock:
+        ref = _memo.get(key)
+        if ref is not None:
+            _memo.move_to_end(key)
+    report = get_value(ref)
+    if report is None:
+        with _memo_lock:
+            # A swept blob leaves a dangling entry
+            _memo.pop(key, None)
+            _stats["misses"] += 1
+        return None
+    _count("hits")
+    log_agent_action("agent_memo", "Reused memoized report", {"agent": agent, "scope": AGENT_MEMO_SCOPE})
+    return report
+
+def remember(state: ProfileBotState, agent: str, report: Any) -> None:
+    """Store agent's report under the state's current inputs (call before the state is updated with it)."""
+    if not AGENT_MEMO_ENABLED or agent not in MEMO_INPUTS or not report or not isinstance(report, str):
+        return
+    if report == FAILED_REPORTS.get(agent):
+        _count("rejected")
+        log_agent_action("agent_memo", "Not memoizing failed report", {"agent": agent})
+        return
+    key = memo_key(state, agent)
+    ref = put_value(report)
+    with _memo_lock:
+        _memo[key] = ref
+        _memo.move_to_end(key)
+        while len(_memo) > AGENT_MEMO_MAX_ENTRIES:
+            _memo.popitem(last=False)
+        _stats["stores"] += 1
+
+def live_refs():
+    """Blob refs the memo points at, so the blob sweep can keep them."""
+    with _memo_lock:
+        return list(_memo.values())
+
+def clear_memo() -> None:
+    """Forget every stored report (its blobs are being cleared)."""
+    with _memo_lock:
+        _memo.clear()
+
+def get_agent_memo_stats() -> Dict[str, Any]:
+    """Process-wide memo hits and misses."""
+    with _memo_lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_memo)
+    stats["enabled"] = AGENT_MEMO_ENABLED
+    stats["scope"] = AGENT_MEMO_SCOPE
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    return stats
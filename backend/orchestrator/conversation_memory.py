@@ -0,0 +1,160 @@
+__module_name__ = "conversation_memory"
+
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .state_schema import ProfileBotState
+from backend.call_metrics import collect_calls, record_node_metrics
+from backend.logger import log_agent_action, log_error
+from backend.rate_limiter import current_session_id, session_scope
+
+# "bounded": recent turns verbatim plus a rolling summary; "full": the whole history every turn
+CONVERSATION_MEMORY = os.getenv("CONVERSATION_MEMORY", "bounded").lower()
+# User turns (with their replies) kept verbatim in conversation_history
+MEMORY_RECENT_TURNS = max(1, int(os.getenv("MEMORY_RECENT_TURNS", "4")))
+# Default token budget for the history rendered into prompts
+MEMORY_TOKEN_BUDGET = int(os.getenv("MEMORY_TOKEN_BUDGET", "1500"))
+# Longest single message in the rendered history (pasted job descriptions are long)
+MEMORY_MESSAGE_MAX_CHARS = int(os.getenv("MEMORY_MESSAGE_MAX_CHARS", "1200"))
+MEMORY_SUMMARY_MAX_CHARS = 2000
+
+_summary_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="memory")
+_pending_lock = threading.Lock()
+# session -> in-flight summarization job
+_pending: Dict[str, Dict[str, Any]] = {}
+_summarizer = None
+
+def _estimate_tokens(text: str) -> int:
+    # ~4 characters per token for English text
+    return len(text) // 4
+
+def _format_message(msg: Dict[str, str], max_chars: Optional[int] = None) -> str:
+    content = msg.get("content") or ""
+    if max_chars and len(content) > max_chars:
+        content = content[:max_chars] + f"... [{len(content) - max_chars} more characters]"
+    return f"{msg.get('role', 'user').capitalize()}: {content}"
+
+def _digest(messages: List[Dict[str, str]]) -> str:
+    return hashlib.sha1(json.dumps(messages, sort_keys=True).encode("utf-8")).hexdigest()
+
+def _recent_start(history: List[Dict[str, str]]) -> int:
+    """Index of the first message of the last MEMORY_RECENT_TURNS user turns."""
+    seen = 0
+    for index in range(len(history) - 1, -1, -1):
+        if history[index].get("role") == "user":
+            seen += 1
+            if seen == MEMORY_RECENT_TURNS:
+                return index
+    return 0
+
+def _get_summarizer():
+    global _summarizer
+    if _summarizer is None:
+        from backend.llm import get_chat_model
+        from backend.prompts.conversation_summary import get_summary_prompt
+        _summarizer = (get_chat_model(agent="memory_summarizer"), get_summary_prompt())
+    return _summarizer
+
+def _fallback_summary(previous_summary: str, messages: List[Dict[str, str]]) -> str:
+    lines = [previous_summary] if previous_summary else []
+    lines += [_format_message(msg, 150) for msg in messages]
+    return "\n".join(lines)[-MEMORY_SUMMARY_MAX_CHARS:]
+
+def summarize_messages(previous_summary: str, messages: List[Dict[str, str]]) -> str:
+    """Fold messages into the previous summary with the summarizer model, or by truncation if it fails."""
+    try:
+        model, prompt = _get_summarizer()
+        response = model.invoke(prompt.format(
+            previous_summary=previous_summary or "None yet",
+            messages="\n".join(_format_message(msg, MEMORY_MESSAGE_MAX_CHARS) for msg in messages),
+        ))
+        summary = (response.content if hasattr(response, "content") else str(response)).strip()
+        if summary:
+            return summary[:MEMORY_SUMMARY_MAX_CHARS]
+    except Exception as e:
+        log_error("memory_summarizer", f"Summarization failed, truncating instead: {e}")
+    return _fallback_summary(previous_summary, messages)
+
+def _run_job(session: str, previous_summary: str, messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    with session_scope(session), collect_calls() as calls:
+        summary = summarize_messages(previous_summary, messages)
+    return {"summary": summary, "calls": calls, "wall_s": time.perf_counter() - start}
+
+def _apply_finished(state: ProfileBotState, job: Dict[str, Any]) -> None:
+    future: Future = job["future"]
+    count = job["count"]
+    if future.exception() is not None:
+        log_error("memory_summarizer", f"Summarization job failed: {future.exception()}")
+        return
+    # The state may have moved on (e.g. restored from an older checkpoint); only apply to what was summarized
+    if (state.conversation_summary or "") != job["base_summary"] or \
+            _digest(state.conversation_history[:count]) != job["digest"]:
+        return
+    result = future.result()
+    state.conversation_summary = result["summary"]
+    del state.conversation_history[:count]
+    state.summarized_message_count += count
+    record_node_metrics(state.debug_info, "memory_summarizer", result["calls"], result["wall_s"])
+    log_agent_action("memory", "Folded messages into conversation summary",
+                     {"messages": f"{count}", "summarized_total": f"{state.summarized_message_count}"})
+
+def update_memory(state: ProfileBotState) -> None:
+    """
+    Keep conversation_history bounded. Applies the summary from a finished
+    background job, then schedules one for any turns older than the recent
+    window. Never waits on the summarizer; until a job lands the older turns
+    simply stay in the history.
+    """
+    if CONVERSATION_MEMORY != "bounded":
+        return
+    session = state.session_id or current_session_id()
+    with _pending_lock:
+        job = _pending.get(session)
+        if job is not None and job["future"].done():
+            del _pending[session]
+            _apply_finished(state, job)
+            job = None
+        if job is not None:
+            return
+
+        older = state.conversation_history[:_recent_start(state.conversation_history)]
+        if not older:
+            return
+        base_summary = state.conversation_summary or ""
+        _pending[session] = {
+            "future": _summary_pool.submit(_run_job, session, base_summary, list(older)),
+            "count": len(older),
+            "base_summary": base_summary,
+            "digest": _digest(older),
+        }
+
+def history_view(state: ProfileBotState, budget_tokens: Optional[int] = None) -> str:
+    """
+    Conversation history for a prompt: the rolling summary, then as many of
+    the most recent messages as fit in budget_tokens (the latest one always).
+    """
+    history = state.conversation_history
+    if CONVERSATION_MEMORY != "bounded":
+        return "\n".join(_format_message(msg) for msg in history)
+
+    budget = MEMORY_TOKEN_BUDGET if budget_tokens is None else budget_tokens
+    header = f"Summary of earlier conversation: {state.conversation_summary}" if state.conversation_summary else ""
+    remaining = budget - _estimate_tokens(header)
+    lines: List[str] = []
+    for msg in reversed(history):
+        line = _format_message(msg, MEMORY_MESSAGE_MAX_CHARS)
+        cost = _estimate_tokens(line)
+        if lines and cost > remaining:
+            break
+        lines.append(line)
+        remaining -= cost
+    omitted = len(history) - len(lines)
+    if omitted:
+        header = "\n".join(filter(None, [header, f"[{omitted} earlier messages omitted]"]))
+    return "\n".join(filter(None, [header] + lines[::-1]))
@@ -0,0 +1,198 @@
+__module_name__ = "fast_router"
+
+import os
+import re
+import threading
+from typing import Any, Dict, Optional
+
+from .report_deps import was_invalidated
+from .state_schema import ProfileBotState
+
+# Resolve unambiguous turns locally instead of asking the routing model
+FAST_ROUTER_ENABLED = os.getenv("FAST_ROUTER_ENABLED", "true").lower() in ("1", "true", "yes", "on")
+
+LINKEDIN_URL_PATTERN = re.compile(r"https?://[^\s]*linkedin\.com/in/[^\s]+", re.IGNORECASE)
+# Extra words allowed around a pasted URL ("here is my profile: <url>")
+MAX_WORDS_AROUND_URL = 8
+
+# Quick-action buttons in app/streamlit_app.py
+QUICK_ACTIONS = {
+    "analyze my linkedin profile": "analyze",
+    "help me rewrite my profile content": "rewrite",
+    "evaluate my job fit": "job_fit",
+}
+
+YES_REPLIES = {"yes", "y", "yeah", "yep", "yes please", "sure", "ok", "okay", "go ahead",
+               "please do", "do it", "let's do it", "lets do it", "sounds good", "proceed"}
+NO_REPLIES = {"no", "n", "nope", "no thanks", "not now", "maybe later", "skip"}
+
+# Same heuristic router_node uses to auto-detect a pasted job description
+JOB_KEYWORDS = ["experience", "responsibilities", "qualifications", "requirements",
+                "skills", "years", "education", "job summary", "salary", "benefits"]
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, Any] = {"turns": 0, "hits": 0, "fallbacks": 0, "rules": {}}
+
+def _normalize(text: str) -> str:
+    return re.sub(r"[^\w\s']", "", text).strip().lower()
+
+def looks_like_job_description(text: str) -> bool:
+    lowered = text.lower()
+    keyword_count = sum(1 for keyword in JOB_KEYWORDS if keyword in lowered)
+    return keyword_count >= 3 or len(text) > 200
+
+def _proposed_agent(proposed: Optional[str]) -> Optional[str]:
+    text = (proposed or "").lower()
+    if "analy" in text:
+        return "analyze"
+    if "rewrit" in text or "content" in text:
+        return "rewrite"
+    if "job" in text or "fit" in text:
+        return "job_fit"
+    if "guid" in text or "career" in text:
+        return "guide"
+    return None
+
+def _decision(action: str, response: str, state: ProfileBotState, **changes: Any) -> Dict[str, Any]:
+    decision = {
+        "current_router_action": action,
+        "current_bot_response": response,
+        "is_profile_analyzed": state.is_profile_analyzed or state.analysis_completed,
+        "awaiting_user_confirmation": False,
+        "awaiting_job_description": False,
+        "last_agent_called": None,
+        "user_requested_update": False,
+    }
+    decision.update(changes)
+    return decision
+
+def _analysis_available(state: ProfileBotState) -> bool:
+    # An analysis invalidated by a new profile is recomputed on demand by the agent that reads it
+    return bool(state.profile_analysis_report) or (bool(state.linkedin_data) and was_invalidated(state, "analyze"))
+
+def _analysis_is_current(state: ProfileBotState, url: str) -> bool:
+    """Whether the state's analysis was made from this profile URL and the profile data now loaded."""
+    provenance = state.report_provenance.get("analyze")
+    if not state.profile_analysis_report or not provenance:
+        return False
+    # The app stores the message the URL was pasted in
+    same_url = not state.linkedin_url or url in state.linkedin_url
+    return same_url and provenance.get("linkedin_data_ref") == state.linkedin_data_ref
+
+def _route_agent(agent: str, state: ProfileBotState) -> Optional[Dict[str, Any]]:
+    """Decision for running an agent when its prerequisites are unambiguous, else None."""
+    analyzed = _analysis_available(state)
+    if agent == "analyze":
+        if not state.linkedin_data:
+            return None
+        return _decision("CALL_ANALYZE", "Let me analyze your LinkedIn profile now.", state,
+                         user_requested_update=state.analysis_completed)
+    if agent == "rewrite" and analyzed:
+        return _decision("CALL_REWRITE", "Let me craft improved content for your profile.", state,
+                         user_requested_update=state.rewrite_completed)
+    if agent == "job_fit" and analyzed:
+        if not state.target_job_description:
+            return _decision("REQUEST_JOB_DESCRIPTION",
+                             "I'd be happy to evaluate your job fit. Please copy and paste the job description text "
+                             "(links to job postings can't be opened).",
+                             state, awaiting_job_description=True, proposed_next_action="job_fit")
+        return _decision("CALL_JOB_FIT", "Let me evaluate how well your profile fits this role.", state,
+                         user_requested_update=state.job_fit_completed)
+    if agent == "guide":
+        return _decision("CALL_GUIDE", "Let me put together some career guidance for you.", state,
+                         user_requested_update=state.guidance_completed)
+    return None
+
+# Router actions that only deploy an agent (or ask for its missing input), so no reply needs writing
+ACTION_AGENTS = {
+    "CALL_ANALYZE": "analyze",
+    "CALL_REWRITE": "rewrite",
+    "CALL_JOB_FIT": "job_fit",
+    "REQUEST_JOB_DESCRIPTION": "job_fit",
+    "CALL_GUIDE": "guide",
+}
+
+def route_action(action: str, state: ProfileBotState) -> Optional[Dict[str, Any]]:
+    """
+    Decision for a router action predicted elsewhere (e.g. the intent
+    classifier), or None when the action needs a model-written reply or the
+    state does not support it.
+    """
+    agent = ACTION_AGENTS.get(action)
+    decision = _route_agent(agent, state) if agent else None
+    if decision is None or decision["current_router_action"] != action:
+        return None
+    return decision
+
+def _match(state: ProfileBotState) -> Optional[Dict[str, Any]]:
+    user_input = (state.user_input or "").strip()
+    if not user_input:
+        return None
+    normalized = _normalize(user_input)
+
+    url_match = LINKEDIN_URL_PATTERN.search(user_input)
+    if url_match:
+        rest = LINKEDIN_URL_PATTERN.sub(" ", user_input)
+        if len(rest.split()) > MAX_WORDS_AROUND_URL or not state.linkedin_data:
+            return None
+        decision = _route_agent("analyze", state)
+        decision["linkedin_url"] = url_match.group(0)
+        decision["current_bot_response"] = "Thanks for sharing your profile! Let me analyze it now."
+        # Only a new profile forces a fresh analysis; for the same one the memo and report_deps decide
+        decision["user_requested_update"] = not _analysis_is_current(state, url_match.group(0))
+        return dict(decision, fast_path_rule="linkedin_url")
+
+    if normalized in QUICK_ACTIONS:
+        agent = QUICK_ACTIONS[normalized]
+        if agent != "analyze" and not state.linkedin_data:
+            return None
+        decision = _route_agent(agent, state)
+        return dict(decision, fast_path_rule=f"quick_action_{agent}") if decision else None
+
+    if state.awaiting_job_description and looks_like_job_description(user_input):
+        if not _analysis_available(state):
+            return None
+        decision = _decision("CALL_JOB_FIT", "Thanks for the job description! Let me evaluate your fit for this role.",
+                             state, target_job_description=user_input,
+                             user_requested_update=state.job_fit_completed)
+        return dict(decision, fast_path_rule="job_description")
+
+    if state.awaiting_user_confirmation:
+        if normalized in YES_REPLIES:
+            agent = _proposed_agent(state.proposed_next_action)
+            decision = _route_agent(agent, state) if agent else None
+            return dict(decision, fast_path_rule="confirm_yes") if decision else None
+        if normalized in NO_REPLIES:
+            decision = _decision("RESPOND_DIRECTLY",
+                                 "No problem. Let me know what you'd like to do next: analyze your profile, "
+                                 "improve your content, check your fit for a job, or get career advice.",
+                                 state, proposed_next_action=None)
+            return dict(decision, fast_path_rule="confirm_no")
+
+    return None
+
+def fast_route(state: ProfileBotState) -> Optional[Dict[str, Any]]:
+    """
+    Routing decision for turns whose outcome is obvious from the input and
+    state flags, in the same shape as RoutingAgent.route. Returns None when
+    unsure so the caller falls back to the routing model. The matched rule is
+    under "fast_path_rule".
+    """
+    decision = _match(state)
+    with _stats_lock:
+        _stats["turns"] += 1
+        if decision is None:
+            _stats["fallbacks"] += 1
+        else:
+            _stats["hits"] += 1
+            rule = decision["fast_path_rule"]
+            _stats["rules"][rule] = _stats["rules"].get(rule, 0) + 1
+    return decision
+
+def get_fast_router_stats() -> Dict[str, Any]:
+    """Turns seen, local hits per rule and coverage (share of turns resolved without the model)."""
+    with _stats_lock:
+        stats = {**_stats, "rules": dict(_stats["rules"])}
+    stats["enabled"] = FAST_ROUTER_ENABLED
+    stats["coverage"] = stats["hits"] / stats["turns"] if stats["turns"] else 0.0
+    return stats
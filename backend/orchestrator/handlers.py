@@ -1,13 +1,38 @@
 __module_name__ = "handlers"
 
+import asyncio
+import contextvars
 import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from .state_schema import ProfileBotState
+from .fast_router import ACTION_AGENTS, FAST_ROUTER_ENABLED, fast_route
+from .router_view import key_state_flags, router_state_json
+from .conversation_memory import history_view, update_memory
+from .intent_classifier import classify_route
+from .report_summary import NEXT_STEP_AGENTS, format_outline, report_outline, summarize_full_report, summarize_report
+from .speculation import atake, discard_unless, reap_expired, speculate, take
+from .agent_memo import memoized, recall, remember
+from .report_deps import invalidate_stale, record_provenance, was_invalidated
 from agents.router import RoutingAgent
 from agents.career_guide import CareerGuideAgent
 from agents.content_rewriter import ContentRewriterAgent
 from agents.job_fit_evaluator import JobFitEvaluatorAgent
 from agents.profile_analyzer import ProfileAnalyzerAgent
 from backend.logger import log_agent_action, log_router_decision, log_error
+from backend.call_metrics import record_node_metrics, track_node
+
+# "split": instruction extraction and routing are two model calls; "fused": one call returns both
+ROUTER_MODE = os.getenv("ROUTER_MODE", "split").lower()
+# Chat reply after an agent: "template" builds it locally from the report's headings and scores,
+# "stream" streams a model reply written from the report outline, "llm" re-sends the whole report
+OUTPUT_PROCESSING_MODE = os.getenv("OUTPUT_PROCESSING_MODE", "template").lower()
+# Split mode only: "parallel" runs instruction extraction and routing concurrently
+ROUTER_EXECUTION = os.getenv("ROUTER_EXECUTION", "sequential").lower()
+
+# Shared by every session; each parallel turn holds two workers (extraction, routing)
+_router_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="router")
 
 routing_agent = RoutingAgent()
 analyzer = ProfileAnalyzerAgent()
@@ -15,7 +40,8 @@ rewriter = ContentRewriterAgent()
 evaluator = JobFitEvaluatorAgent()
 guide = CareerGuideAgent()
 
-def router_node(state: ProfileBotState) -> ProfileBotState:
+def _prepare_router_turn(state: ProfileBotState):
+    """Record the user's message and build the string views the router prompts need."""
     current_user_input_for_turn = state.user_input
     history_before_llm_response = list(state.conversation_history)
     if current_user_input_for_turn and (
@@ -24,464 +50,846 @@ def router_node(state: ProfileBotState) -> ProfileBotState:
         history_before_llm_response[-1].get("content") != current_user_input_for_turn
     ):
         state.conversation_history.append({"role": "user", "content": current_user_input_for_turn})
-        history_before_llm_response = list(state.conversation_history)
-    
-    conversation_history_str = "\n".join([f"{msg['role'].capitalize()}: {msg['content']}" for msg in history_before_llm_response])
-    state_json = state.model_dump_json(indent=2)
     
-    # Extract user instructions for dynamic agent behavior
-    if current_user_input_for_turn:
-        extracted_instructions = routing_agent.extract_user_instructions(
-            current_user_input_for_turn, 
-            conversation_history_str
-        )
-        if extracted_instructions:
-            state.current_user_instructions = extracted_instructions
-            log_agent_action("router", "Extracted user instructions", 
-                           {"instructions_confidence": extracted_instructions.get('confidence', 0)})
-            
-        # Build conversation context for continuity
-        recent_messages = history_before_llm_response[-3:] if len(history_before_llm_response) >= 3 else history_before_llm_response
-        state.conversation_context = "; ".join([f"{msg['role']}: {msg['content'][:100]}" for msg in recent_messages])
-    
-    try:
-        routing_response = routing_agent.route(
-            state=state_json,
-            conversation_history=conversation_history_str,
-            user_input=current_user_input_for_turn
-        )
-        
-        # Log routing decision with key state information
-        key_state_flags = {
-            "is_profile_analyzed": state.is_profile_analyzed,
-            "analysis_completed": state.analysis_completed,
-            "rewrite_completed": state.rewrite_completed,
-            "job_fit_completed": state.job_fit_completed,
-            "awaiting_confirmation": state.awaiting_user_confirmation,
-            "awaiting_job_desc": state.awaiting_job_description,
-            "linkedin_url": bool(state.linkedin_url),
-            "last_agent": state.last_agent_called
-        }
+    # Reports derived from a profile/job description that has since changed are dropped before routing
+    invalidate_stale(state)
+    # Fold turns older than the recent window into the rolling summary (in the background)
+    update_memory(state)
+    history_before_llm_response = list(state.conversation_history)
+    conversation_history_str = history_view(state)
+    state_json = router_state_json(state)
+    return current_user_input_for_turn, history_before_llm_response, conversation_history_str, state_json
+
+def _apply_user_instructions(state: ProfileBotState, extracted_instructions, history_before_llm_response) -> None:
+    if extracted_instructions:
+        state.current_user_instructions = extracted_instructions
+        log_agent_action("router", "Extracted user instructions", 
+                       {"instructions_confidence": extracted_instructions.get('confidence', 0)})
         
-        if isinstance(routing_response, dict):
-            action = routing_response.get("current_router_action", "UNKNOWN")
-            log_router_decision(action, current_user_input_for_turn or "", key_state_flags)
-            
-            # Track state changes
-            state_changes = {}
-            
-            if "current_router_action" in routing_response:
-                state.current_router_action = routing_response["current_router_action"]
-                state_changes["current_router_action"] = routing_response["current_router_action"]
-            if "current_bot_response" in routing_response:
-                state.current_bot_response = routing_response["current_bot_response"]
-                state_changes["current_bot_response"] = routing_response["current_bot_response"]
-            if "linkedin_url" in routing_response and routing_response["linkedin_url"]:
-                state.linkedin_url = routing_response["linkedin_url"]
-                state_changes["linkedin_url"] = routing_response["linkedin_url"]
-            if "is_profile_analyzed" in routing_response:
-                state.is_profile_analyzed = routing_response["is_profile_analyzed"]
-                state_changes["is_profile_analyzed"] = routing_response["is_profile_analyzed"]
-            if "awaiting_user_confirmation" in routing_response:
-                state.awaiting_user_confirmation = routing_response["awaiting_user_confirmation"]
-                state_changes["awaiting_user_confirmation"] = routing_response["awaiting_user_confirmation"]
-            if "awaiting_job_description" in routing_response:
-                state.awaiting_job_description = routing_response["awaiting_job_description"]
-                state_changes["awaiting_job_description"] = routing_response["awaiting_job_description"]
-            if "proposed_next_action" in routing_response:
-                state.proposed_next_action = routing_response["proposed_next_action"]
-                state_changes["proposed_next_action"] = routing_response["proposed_next_action"]
-            if "last_agent_called" in routing_response:
-                last_agent_value = routing_response["last_agent_called"]
-                if last_agent_value == "null" or last_agent_value is None:
-                    state.last_agent_called = None
-                else:
-                    state.last_agent_called = last_agent_value
-                state_changes["last_agent_called"] = state.last_agent_called
-            # Handle new re-execution control flags
-            if "user_requested_update" in routing_response:
-                state.user_requested_update = routing_response["user_requested_update"]
-                state_changes["user_requested_update"] = routing_response["user_requested_update"]
-            
-            # Log state changes if any occurred
-            if state_changes:
-                log_agent_action("router", "Updated state", state_changes)
+    # Build conversation context for continuity
+    recent_messages = history_before_llm_response[-3:] if len(history_before_llm_response) >= 3 else history_before_llm_response
+    state.conversation_context = "; ".join([f"{msg['role']}: {msg['content'][:100]}" for msg in recent_messages])
+
+def _apply_routing_response(state: ProfileBotState, routing_response, current_user_input_for_turn,
+                            source: str = "llm") -> ProfileBotState:
+    # Log routing decision with key state information
+    if isinstance(routing_response, dict):
+        action = routing_response.get("current_router_action", "UNKNOWN")
+        log_router_decision(action, current_user_input_for_turn or "", key_state_flags(state), source)
         
-        if (state.current_router_action == "CALL_JOB_FIT" and 
-            current_user_input_for_turn and 
-            not state.target_job_description):
-            job_keywords = ["experience", "responsibilities", "qualifications", "requirements", 
-                          "skills", "years", "education", "job summary", "salary", "benefits"]
-            input_lower = current_user_input_for_turn.lower()
-            keyword_count = sum(1 for keyword in job_keywords if keyword in input_lower)
-            if keyword_count >= 3 or len(current_user_input_for_turn) > 200:
-                state.target_job_description = current_user_input_for_turn
-                log_agent_action("router", "Auto-detected job description", {"keyword_count": keyword_count})
+        # Track state changes
+        state_changes = {}
         
-        if state.current_bot_response and (
-            not state.conversation_history or
-            state.conversation_history[-1].get("role") != "assistant" or
-            state.conversation_history[-1].get("content") != state.current_bot_response
-        ):
-            state.conversation_history.append({"role": "assistant", "content": state.current_bot_response})
-        return state
+        if "current_router_action" in routing_response:
+            state.current_router_action = routing_response["current_router_action"]
+            state_changes["current_router_action"] = routing_response["current_router_action"]
+        if "current_bot_response" in routing_response:
+            state.current_bot_response = routing_response["current_bot_response"]
+            state_changes["current_bot_response"] = routing_response["current_bot_response"]
+        if "linkedin_url" in routing_response and routing_response["linkedin_url"]:
+            state.linkedin_url = routing_response["linkedin_url"]
+            state_changes["linkedin_url"] = routing_response["linkedin_url"]
+        if "is_profile_analyzed" in routing_response:
+            state.is_profile_analyzed = routing_response["is_profile_analyzed"]
+            state_changes["is_profile_analyzed"] = routing_response["is_profile_analyzed"]
+        if "awaiting_user_confirmation" in routing_response:
+            state.awaiting_user_confirmation = routing_response["awaiting_user_confirmation"]
+            state_changes["awaiting_user_confirmation"] = routing_response["awaiting_user_confirmation"]
+        if "awaiting_job_description" in routing_response:
+            state.awaiting_job_description = routing_response["awaiting_job_description"]
+            state_changes["awaiting_job_description"] = routing_response["awaiting_job_description"]
+        if "proposed_next_action" in routing_response:
+            state.proposed_next_action = routing_response["proposed_next_action"]
+            state_changes["proposed_next_action"] = routing_response["proposed_next_action"]
+        if "last_agent_called" in routing_response:
+            last_agent_value = routing_response["last_agent_called"]
+            if last_agent_value == "null" or last_agent_value is None:
+                state.last_agent_called = None
+            else:
+                state.last_agent_called = last_agent_value
+            state_changes["last_agent_called"] = state.last_agent_called
+        if routing_response.get("target_job_description"):
+            state.target_job_description = routing_response["target_job_description"]
+            state_changes["target_job_description"] = True
+        # Handle new re-execution control flags
+        if "user_requested_update" in routing_response:
+            state.user_requested_update = routing_response["user_requested_update"]
+            state_changes["user_requested_update"] = routing_response["user_requested_update"]
         
-    except ValueError as e:
-        log_error("router", str(e), current_user_input_for_turn)
-        state.current_router_action = "RESPOND_DIRECTLY"
+        # Log state changes if any occurred
+        if state_changes:
+            log_agent_action("router", "Updated state", state_changes)
+        # A speculative run only stays useful while the user follows the offered next step
+        discard_unless(state, ACTION_AGENTS.get(state.current_router_action))
+    
+    if (state.current_router_action == "CALL_JOB_FIT" and 
+        current_user_input_for_turn and 
+        not state.target_job_description):
+        job_keywords = ["experience", "responsibilities", "qualifications", "requirements", 
+                      "skills", "years", "education", "job summary", "salary", "benefits"]
+        input_lower = current_user_input_for_turn.lower()
+        keyword_count = sum(1 for keyword in job_keywords if keyword in input_lower)
+        if keyword_count >= 3 or len(current_user_input_for_turn) > 200:
+            state.target_job_description = current_user_input_for_turn
+            log_agent_action("router", "Auto-detected job description", {"keyword_count": keyword_count})
+    
+    if state.current_bot_response and (
+        not state.conversation_history or
+        state.conversation_history[-1].get("role") != "assistant" or
+        state.conversation_history[-1].get("content") != state.current_bot_response
+    ):
+        state.conversation_history.append({"role": "assistant", "content": state.current_bot_response})
+    return state
+
+def _fast_path(state: ProfileBotState, history_before_llm_response, current_user_input_for_turn):
+    """Apply a local routing decision for unambiguous turns; None means ask the model."""
+    if not FAST_ROUTER_ENABLED:
+        return None
+    routing_response = fast_route(state)
+    if routing_response is None:
+        return None
+    log_agent_action("router", "Fast-path route", {"rule": routing_response.pop("fast_path_rule")})
+    _apply_user_instructions(state, None, history_before_llm_response)
+    return _apply_routing_response(state, routing_response, current_user_input_for_turn, "fast_path")
+
+def _classifier_path(state: ProfileBotState, history_before_llm_response, current_user_input_for_turn):
+    """Apply the intent classifier's decision when it is confident; None means ask the model."""
+    routing_response = classify_route(state)
+    if routing_response is None:
+        return None
+    log_agent_action("router", "Classifier route", {"confidence": f"{routing_response.pop('classifier_confidence')}"})
+    _apply_user_instructions(state, None, history_before_llm_response)
+    return _apply_routing_response(state, routing_response, current_user_input_for_turn, "classifier")
+
+def _router_failed(state: ProfileBotState, e: Exception, current_user_input_for_turn) -> ProfileBotState:
+    log_error("router", str(e), current_user_input_for_turn)
+    state.current_router_action = "RESPOND_DIRECTLY"
+    if isinstance(e, ValueError):
         state.current_bot_response = "I apologize, I encountered an issue processing your request. Could you please rephrase?"
         state.error_message = f"Routing error: {str(e)}"
-        state.conversation_history.append({"role": "assistant", "content": state.current_bot_response})
-        return state
-    except Exception as e:
-        log_error("router", str(e), current_user_input_for_turn)
-        state.current_router_action = "RESPOND_DIRECTLY"
+    else:
         state.current_bot_response = "I apologize, but I encountered an internal error. Please try again or rephrase your request."
         state.error_message = str(e)
-        state.conversation_history.append({"role": "assistant", "content": state.current_bot_response})
-        return state
+    state.conversation_history.append({"role": "assistant", "content": state.current_bot_response})
+    return state
 
-def analyze_node(state: ProfileBotState) -> ProfileBotState:
-    log_agent_action("profile_analyzer", "Starting analysis", user_input=state.user_input)
+def _timed(fn):
+    """Run fn and return (result or raised exception, elapsed seconds)."""
+    start = time.perf_counter()
+    try:
+        result = fn()
+    except Exception as e:
+        result = e
+    return result, time.perf_counter() - start
+
+async def _atimed(fn):
+    start = time.perf_counter()
+    try:
+        result = await fn()
+    except Exception as e:
+        result = e
+    return result, time.perf_counter() - start
+
+def _finish_split_route(state: ProfileBotState, history, user_input, extracted, routed,
+                        extract_s: float, route_s: float, total_s: float) -> ProfileBotState:
+    """Apply the results of a split-mode turn: instructions first, then the routing decision."""
+    log_agent_action("router", "Split routing timings", {
+        "execution": ROUTER_EXECUTION,
+        "extract_s": f"{extract_s:.3f}",
+        "route_s": f"{route_s:.3f}",
+        "total_s": f"{total_s:.3f}",
+    })
+    if isinstance(extracted, Exception):
+        log_error("router", f"Instruction extraction failed: {extracted}")
+    elif user_input:
+        _apply_user_instructions(state, extracted, history)
     
+    if isinstance(routed, Exception):
+        return _router_failed(state, routed, user_input)
     try:
-        if not state.linkedin_data:
-            error_msg = "No LinkedIn data available for analysis. Please provide a LinkedIn profile URL first."
-            log_error("profile_analyzer", "Missing LinkedIn data")
-            state.error_message = error_msg
-            state.current_bot_response = error_msg
-            state.current_router_action = "AWAIT_URL"
-            return state
-            
-        # Pass dynamic instructions to the specialized agent
-        result = analyzer.analyze(
-            linkedin_profile_data=state.linkedin_data,
-            user_instructions=state.current_user_instructions,
-            conversation_context=state.conversation_context
+        return _apply_routing_response(state, routed, user_input)
+    except Exception as e:
+        return _router_failed(state, e, user_input)
+
+@track_node("router", new_turn=True)
+def router_node(state: ProfileBotState) -> ProfileBotState:
+    current_user_input_for_turn, history, conversation_history_str, state_json = _prepare_router_turn(state)
+    
+    fast_state = _fast_path(state, history, current_user_input_for_turn)
+    if fast_state is not None:
+        return fast_state
+    classified_state = _classifier_path(state, history, current_user_input_for_turn)
+    if classified_state is not None:
+        return classified_state
+    
+    if ROUTER_MODE == "fused":
+        try:
+            routing_response, extracted_instructions = routing_agent.route_fused(
+                state=state_json,
+                conversation_history=conversation_history_str,
+                user_input=current_user_input_for_turn
+            )
+            if current_user_input_for_turn:
+                _apply_user_instructions(state, extracted_instructions, history)
+            return _apply_routing_response(state, routing_response, current_user_input_for_turn)
+        except Exception as e:
+            return _router_failed(state, e, current_user_input_for_turn)
+    
+    def extract():
+        # Extract user instructions for dynamic agent behavior
+        if not current_user_input_for_turn:
+            return None
+        return routing_agent.extract_user_instructions(current_user_input_for_turn, conversation_history_str)
+    
+    def route():
+        return routing_agent.route(
+            state=state_json,
+            conversation_history=conversation_history_str,
+            user_input=current_user_input_for_turn
         )
-        
-        # Validate that we got a proper result (ProfileAnalyzerAgent returns markdown string)
-        if not result or not isinstance(result, str):
-            error_msg = "Profile analysis failed to produce valid results. Please try again."
-            log_error("profile_analyzer", f"Invalid analysis result: {type(result)}")
-            state.error_message = error_msg
-            state.current_bot_response = error_msg
-            state.current_router_action = "RESPOND_DIRECTLY"
-            return state
-        
-        # Log successful analysis
-        state_changes = {
-            "profile_analysis_report": True,
-            "is_profile_analyzed": True,
-            "analysis_completed": True,
-            "last_agent_called": "analyze",
-            "current_router_action": "PROCESS_AGENT_OUTPUT"
-        }
-        log_agent_action("profile_analyzer", "Analysis completed successfully", state_changes)
-        
-        # Store output for router processing instead of direct response
-        state.pending_agent_output = result
-        state.needs_output_processing = True
-        state.profile_analysis_report = result
-        state.is_profile_analyzed = True
-        state.analysis_completed = True
-        state.last_agent_called = "analyze"
-        state.current_task_status = "Profile analysis completed"
-        state.current_router_action = "PROCESS_AGENT_OUTPUT"
-        
-        # Reset update flag
-        state.user_requested_update = False
-        return state
-        
-    except ValueError as e:
-        error_msg = f"Analysis parsing error: {str(e)}. The analysis may have returned invalid data format."
-        log_error("profile_analyzer", f"Parsing error: {str(e)}")
+    
+    start = time.perf_counter()
+    if ROUTER_EXECUTION == "parallel":
+        # Each worker gets a copy of this context so call metrics and the graph config follow the call
+        extract_future = _router_pool.submit(contextvars.copy_context().run, _timed, extract)
+        route_future = _router_pool.submit(contextvars.copy_context().run, _timed, route)
+        extracted, extract_s = extract_future.result()
+        routed, route_s = route_future.result()
+    else:
+        extracted, extract_s = _timed(extract)
+        routed, route_s = _timed(route)
+    return _finish_split_route(state, history, current_user_input_for_turn,
+                               extracted, routed, extract_s, route_s, time.perf_counter() - start)
+
+@track_node("router", new_turn=True)
+async def arouter_node(state: ProfileBotState) -> ProfileBotState:
+    current_user_input_for_turn, history, conversation_history_str, state_json = _prepare_router_turn(state)
+    
+    fast_state = _fast_path(state, history, current_user_input_for_turn)
+    if fast_state is not None:
+        return fast_state
+    classified_state = _classifier_path(state, history, current_user_input_for_turn)
+    if classified_state is not None:
+        return classified_state
+    
+    if ROUTER_MODE == "fused":
+        try:
+            routing_response, extracted_instructions = await routing_agent.aroute_fused(
+                state=state_json,
+                conversation_history=conversation_history_str,
+                user_input=current_user_input_for_turn
+            )
+            if current_user_input_for_turn:
+                _apply_user_instructions(state, extracted_instructions, history)
+            return _apply_routing_response(state, routing_response, current_user_input_for_turn)
+        except Exception as e:
+            return _router_failed(state, e, current_user_input_for_turn)
+    
+    async def extract():
+        if not current_user_input_for_turn:
+            return None
+        return await routing_agent.aextract_user_instructions(current_user_input_for_turn, conversation_history_str)
+    
+    async def route():
+        return await routing_agent.aroute(
+            state=state_json,
+            conversation_history=conversation_history_str,
+            user_input=current_user_input_for_turn
+        )
+    
+    start = time.perf_counter()
+    if ROUTER_EXECUTION == "parallel":
+        (extracted, extract_s), (routed, route_s) = await asyncio.gather(_atimed(extract), _atimed(route))
+    else:
+        extracted, extract_s = await _atimed(extract)
+        routed, route_s = await _atimed(route)
+    return _finish_split_route(state, history, current_user_input_for_turn,
+                               extracted, routed, extract_s, route_s, time.perf_counter() - start)
+
+def _clear_agent_output(state: ProfileBotState) -> ProfileBotState:
+    # Clear processing flags to prevent routing to ProcessAgentOutput
+    state.current_router_action = "RESPOND_DIRECTLY"
+    state.pending_agent_output = None
+    state.needs_output_processing = False
+    state.last_agent_called = None
+    return state
+
+def _missing_input(state: ProfileBotState, agent: str, log_msg: str, error_msg: str, next_action: str) -> ProfileBotState:
+    log_error(agent, log_msg)
+    state.error_message = error_msg
+    state.current_bot_response = error_msg
+    state.current_router_action = next_action
+    return state
+
+def _store_agent_output(state: ProfileBotState, result: str, agent_key: str, task_status: str) -> ProfileBotState:
+    # Store output for router processing instead of direct response
+    state.pending_agent_output = result
+    state.needs_output_processing = True
+    state.last_agent_called = agent_key
+    state.current_task_status = task_status
+    state.current_router_action = "PROCESS_AGENT_OUTPUT"
+    # Reset update flag
+    state.user_requested_update = False
+    return state
+
+# --- Profile analyzer ---
+
+def _analyze_precheck(state: ProfileBotState):
+    log_agent_action("profile_analyzer", "Starting analysis", user_input=state.user_input)
+    if not state.linkedin_data:
+        return _missing_input(state, "profile_analyzer", "Missing LinkedIn data",
+                              "No LinkedIn data available for analysis. Please provide a LinkedIn profile URL first.",
+                              "AWAIT_URL")
+    return None
+
+def _analyze_kwargs(state: ProfileBotState) -> dict:
+    return {
+        "linkedin_profile_data": state.linkedin_data,
+        "user_instructions": state.current_user_instructions,
+        "conversation_context": state.conversation_context,
+    }
+
+def _store_analysis(state: ProfileBotState, result: str) -> None:
+    state.profile_analysis_report = result
+    state.is_profile_analyzed = True
+    state.analysis_completed = True
+    record_provenance(state, "analyze")
+
+def _analyze_completed(state: ProfileBotState, result) -> ProfileBotState:
+    # Validate that we got a proper result (ProfileAnalyzerAgent returns markdown string)
+    if not result or not isinstance(result, str):
+        error_msg = "Profile analysis failed to produce valid results. Please try again."
+        log_error("profile_analyzer", f"Invalid analysis result: {type(result)}")
         state.error_message = error_msg
-        state.current_bot_response = "I encountered an issue parsing the analysis results. This might be due to an unexpected response format. Please try again."
+        state.current_bot_response = error_msg
         state.current_router_action = "RESPOND_DIRECTLY"
-        # Clear processing flags to prevent routing to ProcessAgentOutput
-        state.pending_agent_output = None
-        state.needs_output_processing = False
-        state.last_agent_called = None
         return state
-    except Exception as e:
-        error_msg = f"Unexpected analysis error: {str(e)}"
+    
+    log_agent_action("profile_analyzer", "Analysis completed successfully", {
+        "profile_analysis_report": True,
+        "is_profile_analyzed": True,
+        "analysis_completed": True,
+        "last_agent_called": "analyze",
+        "current_router_action": "PROCESS_AGENT_OUTPUT"
+    })
+    _store_analysis(state, result)
+    return _store_agent_output(state, result, "analyze", "Profile analysis completed")
+
+def _analyze_failed(state: ProfileBotState, e: Exception) -> ProfileBotState:
+    if isinstance(e, ValueError):
+        log_error("profile_analyzer", f"Parsing error: {str(e)}")
+        state.error_message = f"Analysis parsing error: {str(e)}. The analysis may have returned invalid data format."
+        state.current_bot_response = "I encountered an issue parsing the analysis results. This might be due to an unexpected response format. Please try again."
+    else:
         log_error("profile_analyzer", f"Unexpected error: {str(e)}")
-        state.error_message = error_msg
+        state.error_message = f"Unexpected analysis error: {str(e)}"
         state.current_bot_response = "I apologize, but I encountered an error during profile analysis. Please try again."
-        state.current_router_action = "RESPOND_DIRECTLY"
-        # Clear processing flags to prevent routing to ProcessAgentOutput
-        state.pending_agent_output = None
-        state.needs_output_processing = False
-        state.last_agent_called = None
-        return state
+    return _clear_agent_output(state)
 
-def rewrite_node(state: ProfileBotState) -> ProfileBotState:
-    log_agent_action("content_rewriter", "Starting content rewrite", user_input=state.user_input)
-    
+@track_node("analyze")
+def analyze_node(state: ProfileBotState) -> ProfileBotState:
     try:
-        if not state.profile_analysis_report:
-            error_msg = "Profile analysis required before content rewriting. Please analyze your profile first."
-            log_error("content_rewriter", "Missing profile analysis report")
-            state.error_message = error_msg
-            state.current_bot_response = error_msg
-            state.current_router_action = "CALL_ANALYZE"
-            return state
-            
-        # Pass dynamic instructions to the specialized agent
-        result = rewriter.rewrite(
-            current_content=state.linkedin_data,
-            profile_analysis_report=state.profile_analysis_report,
-            target_role=state.target_role,
-            user_instructions=state.current_user_instructions,
-            conversation_context=state.conversation_context
-        )
-        
-        # Log successful rewrite
-        state_changes = {
-            "content_rewrites_suggestions": True,
-            "rewrite_completed": True,
-            "last_agent_called": "rewrite",
-            "current_router_action": "PROCESS_AGENT_OUTPUT"
-        }
-        log_agent_action("content_rewriter", "Content rewrite completed successfully", state_changes)
-        
-        # Store output for router processing instead of direct response
-        state.pending_agent_output = result
-        state.needs_output_processing = True
-        state.content_rewrites_suggestions = result
-        state.rewrite_completed = True
-        state.last_agent_called = "rewrite"
-        state.current_task_status = "Content rewrite suggestions generated"
-        state.current_router_action = "PROCESS_AGENT_OUTPUT"
-        
-        # Reset update flag
-        state.user_requested_update = False
-        return state
-        
-    except ValueError as e:
-        log_error("content_rewriter", str(e))
+        early = _analyze_precheck(state)
+        if early is not None:
+            return early
+        result = recall(state, "analyze")
+        if result is None:
+            # Pass dynamic instructions to the specialized agent
+            result = analyzer.analyze(**_analyze_kwargs(state))
+            remember(state, "analyze", result)
+        return _analyze_completed(state, result)
+    except Exception as e:
+        return _analyze_failed(state, e)
+
+@track_node("analyze")
+async def aanalyze_node(state: ProfileBotState) -> ProfileBotState:
+    try:
+        early = _analyze_precheck(state)
+        if early is not None:
+            return early
+        result = recall(state, "analyze")
+        if result is None:
+            result = await analyzer.aanalyze(**_analyze_kwargs(state))
+            remember(state, "analyze", result)
+        return _analyze_completed(state, result)
+    except Exception as e:
+        return _analyze_failed(state, e)
+
+def _needs_analysis(state: ProfileBotState, agent: str) -> bool:
+    # The analysis is upstream of every other report. Rewrite and job fit can't run without
+    # it; the guide only uses it, so it recomputes an invalidated one but never starts the first
+    if state.profile_analysis_report or not state.linkedin_data:
+        return False
+    if agent == "job_fit" and not state.target_job_description:
+        return False
+    return agent != "guide" or was_invalidated(state, "analyze")
+
+def _ensure_analysis(state: ProfileBotState, agent: str) -> None:
+    """Recompute the analysis agent reads when it is missing, instead of bouncing the user back to it."""
+    if not _needs_analysis(state, agent):
+        return
+    log_agent_action("profile_analyzer", "Analyzing on demand", {"for_agent": agent})
+    result = recall(state, "analyze")
+    if result is None:
+        result = analyzer.analyze(**_analyze_kwargs(state))
+        remember(state, "analyze", result)
+    if result and isinstance(result, str):
+        _store_analysis(state, result)
+
+async def _aensure_analysis(state: ProfileBotState, agent: str) -> None:
+    """Async variant of _ensure_analysis."""
+    if not _needs_analysis(state, agent):
+        return
+    log_agent_action("profile_analyzer", "Analyzing on demand", {"for_agent": agent})
+    result = recall(state, "analyze")
+    if result is None:
+        result = await analyzer.aanalyze(**_analyze_kwargs(state))
+        remember(state, "analyze", result)
+    if result and isinstance(result, str):
+        _store_analysis(state, result)
+
+# --- Content rewriter ---
+
+def _rewrite_precheck(state: ProfileBotState):
+    log_agent_action("content_rewriter", "Starting content rewrite", user_input=state.user_input)
+    if not state.profile_analysis_report:
+        return _missing_input(state, "content_rewriter", "Missing profile analysis report",
+                              "Profile analysis required before content rewriting. Please analyze your profile first.",
+                              "CALL_ANALYZE")
+    return None
+
+def _rewrite_kwargs(state: ProfileBotState) -> dict:
+    return {
+        "current_content": state.linkedin_data,
+        "profile_analysis_report": state.profile_analysis_report,
+        "target_role": state.target_role,
+        "user_instructions": state.current_user_instructions,
+        "conversation_context": state.conversation_context,
+    }
+
+def _rewrite_completed(state: ProfileBotState, result) -> ProfileBotState:
+    log_agent_action("content_rewriter", "Content rewrite completed successfully", {
+        "content_rewrites_suggestions": True,
+        "rewrite_completed": True,
+        "last_agent_called": "rewrite",
+        "current_router_action": "PROCESS_AGENT_OUTPUT"
+    })
+    state.content_rewrites_suggestions = result
+    state.rewrite_completed = True
+    record_provenance(state, "rewrite")
+    return _store_agent_output(state, result, "rewrite", "Content rewrite suggestions generated")
+
+def _rewrite_failed(state: ProfileBotState, e: Exception) -> ProfileBotState:
+    log_error("content_rewriter", str(e))
+    if isinstance(e, ValueError):
         state.error_message = f"Rewriting error: {str(e)}"
         state.current_bot_response = "I encountered an issue generating content suggestions. Please ensure your profile has been analyzed first."
-        state.current_router_action = "RESPOND_DIRECTLY"
-        # Clear processing flags to prevent routing to ProcessAgentOutput
-        state.pending_agent_output = None
-        state.needs_output_processing = False
-        state.last_agent_called = None
-        return state
-    except Exception as e:
-        log_error("content_rewriter", str(e))
+    else:
         state.error_message = str(e)
         state.current_bot_response = "I apologize, but I encountered an error during content rewriting. Please try again."
-        state.current_router_action = "RESPOND_DIRECTLY"
-        # Clear processing flags to prevent routing to ProcessAgentOutput
-        state.pending_agent_output = None
-        state.needs_output_processing = False
-        state.last_agent_called = None
-        return state
+    return _clear_agent_output(state)
 
-def job_fit_node(state: ProfileBotState) -> ProfileBotState:
-    log_agent_action("job_fit_evaluator", "Starting job fit evaluation", user_input=state.user_input)
-    
+@track_node("rewrite")
+def rewrite_node(state: ProfileBotState) -> ProfileBotState:
     try:
-        if not state.profile_analysis_report:
-            error_msg = "Profile analysis required before job fit evaluation. Please analyze your profile first."
-            log_error("job_fit_evaluator", "Missing profile analysis report")
-            state.error_message = error_msg
-            state.current_bot_response = error_msg
-            state.current_router_action = "CALL_ANALYZE"
-            return state
-        if not state.target_job_description:
-            error_msg = "Job description required for fit evaluation. Please provide a job description."
-            log_error("job_fit_evaluator", "Missing job description")
-            state.error_message = error_msg
-            state.current_bot_response = error_msg
-            state.current_router_action = "REQUEST_JOB_DESCRIPTION"
-            state.awaiting_job_description = True
-            return state
-            
-        # Pass dynamic instructions to the specialized agent
-        result = evaluator.evaluate_fit(
-            profile_analysis_report=state.profile_analysis_report,
-            job_description=state.target_job_description,
-            user_instructions=state.current_user_instructions,
-            conversation_context=state.conversation_context
-        )
-        
-        # Log successful evaluation
-        state_changes = {
-            "job_fit_evaluation_report": True,
-            "job_fit_completed": True,
-            "last_agent_called": "job_fit",
-            "awaiting_job_description": False,
-            "current_router_action": "PROCESS_AGENT_OUTPUT"
-        }
-        log_agent_action("job_fit_evaluator", "Job fit evaluation completed successfully", state_changes)
-        
-        # Store output for router processing instead of direct response
-        state.pending_agent_output = result
-        state.needs_output_processing = True
-        state.job_fit_evaluation_report = result
-        state.job_fit_completed = True
-        state.last_agent_called = "job_fit"
-        state.current_task_status = "Job fit evaluation completed"
-        state.awaiting_job_description = False
-        state.current_router_action = "PROCESS_AGENT_OUTPUT"
-        
-        # Reset update flag
-        state.user_requested_update = False
-        return state
-        
-    except ValueError as e:
-        log_error("job_fit_evaluator", str(e))
+        _ensure_analysis(state, "rewrite")
+        early = _rewrite_precheck(state)
+        if early is not None:
+            return early
+        kwargs = _rewrite_kwargs(state)
+        result = take(state, "rewrite", kwargs)
+        if result is None:
+            # Pass dynamic instructions to the specialized agent
+            result = rewriter.rewrite(**kwargs)
+        return _rewrite_completed(state, result)
+    except Exception as e:
+        return _rewrite_failed(state, e)
+
+@track_node("rewrite")
+async def arewrite_node(state: ProfileBotState) -> ProfileBotState:
+    try:
+        await _aensure_analysis(state, "rewrite")
+        early = _rewrite_precheck(state)
+        if early is not None:
+            return early
+        kwargs = _rewrite_kwargs(state)
+        result = await atake(state, "rewrite", kwargs)
+        if result is None:
+            result = await rewriter.arewrite(**kwargs)
+        return _rewrite_completed(state, result)
+    except Exception as e:
+        return _rewrite_failed(state, e)
+
+# --- Job fit evaluator ---
+
+def _job_fit_precheck(state: ProfileBotState):
+    log_agent_action("job_fit_evaluator", "Starting job fit evaluation", user_input=state.user_input)
+    if not state.profile_analysis_report:
+        return _missing_input(state, "job_fit_evaluator", "Missing profile analysis report",
+                              "Profile analysis required before job fit evaluation. Please analyze your profile first.",
+                              "CALL_ANALYZE")
+    if not state.target_job_description:
+        state.awaiting_job_description = True
+        return _missing_input(state, "job_fit_evaluator", "Missing job description",
+                              "Job description required for fit evaluation. Please provide a job description.",
+                              "REQUEST_JOB_DESCRIPTION")
+    return None
+
+def _job_fit_kwargs(state: ProfileBotState) -> dict:
+    return {
+        "profile_analysis_report": state.profile_analysis_report,
+        "job_description": state.target_job_description,
+        "user_instructions": state.current_user_instructions,
+        "conversation_context": state.conversation_context,
+    }
+
+def _job_fit_completed(state: ProfileBotState, result) -> ProfileBotState:
+    log_agent_action("job_fit_evaluator", "Job fit evaluation completed successfully", {
+        "job_fit_evaluation_report": True,
+        "job_fit_completed": True,
+        "last_agent_called": "job_fit",
+        "awaiting_job_description": False,
+        "current_router_action": "PROCESS_AGENT_OUTPUT"
+    })
+    state.job_fit_evaluation_report = result
+    state.job_fit_completed = True
+    record_provenance(state, "job_fit")
+    state.awaiting_job_description = False
+    return _store_agent_output(state, result, "job_fit", "Job fit evaluation completed")
+
+def _job_fit_failed(state: ProfileBotState, e: Exception) -> ProfileBotState:
+    log_error("job_fit_evaluator", str(e))
+    if isinstance(e, ValueError):
         state.error_message = f"Job fit error: {str(e)}"
         state.current_bot_response = "I encountered an issue evaluating job fit. Please ensure both profile analysis and job description are available."
-        state.current_router_action = "RESPOND_DIRECTLY"
-        # Clear processing flags to prevent routing to ProcessAgentOutput
-        state.pending_agent_output = None
-        state.needs_output_processing = False
-        state.last_agent_called = None
-        return state
-    except Exception as e:
-        log_error("job_fit_evaluator", str(e))
+    else:
         state.error_message = str(e)
         state.current_bot_response = "I apologize, but I encountered an error during job fit evaluation. Please try again."
-        state.current_router_action = "RESPOND_DIRECTLY"
-        # Clear processing flags to prevent routing to ProcessAgentOutput
-        state.pending_agent_output = None
-        state.needs_output_processing = False
-        state.last_agent_called = None
-        return state
+    return _clear_agent_output(state)
 
-def guide_node(state: ProfileBotState) -> ProfileBotState:
-    log_agent_action("career_guide", "Starting career guidance", user_input=state.user_input)
-    
+@track_node("job_fit")
+def job_fit_node(state: ProfileBotState) -> ProfileBotState:
     try:
-        if not state.user_input:
-            error_msg = "User query required for career guidance. Please ask a specific career question."
-            log_error("career_guide", "Missing user query")
-            state.error_message = error_msg
-            state.current_bot_response = error_msg
-            state.current_router_action = "RESPOND_DIRECTLY"
-            return state
-            
-        # Pass dynamic instructions to the specialized agent
-        result = guide.guide(
-            user_query=state.user_input,
-            profile_analysis_report=state.profile_analysis_report or {},
-            target_role=state.target_role or "your desired role",
-            user_instructions=state.current_user_instructions,
-            conversation_context=state.conversation_context
-        )
-        
-        # Log successful guidance
-        state_changes = {
-            "career_guidance_notes": True,
-            "guidance_completed": True,
-            "last_agent_called": "guide",
-            "current_router_action": "PROCESS_AGENT_OUTPUT"
-        }
-        log_agent_action("career_guide", "Career guidance completed successfully", state_changes)
-        
-        # Store output for router processing instead of direct response
-        state.pending_agent_output = result
-        state.needs_output_processing = True
-        state.career_guidance_notes = result
-        state.guidance_completed = True
-        state.last_agent_called = "guide"
-        state.current_task_status = "Career guidance provided"
-        state.current_router_action = "PROCESS_AGENT_OUTPUT"
-        
-        # Reset update flag
-        state.user_requested_update = False
-        return state
-        
-    except ValueError as e:
-        log_error("career_guide", str(e))
+        _ensure_analysis(state, "job_fit")
+        early = _job_fit_precheck(state)
+        if early is not None:
+            return early
+        result = recall(state, "job_fit")
+        if result is None:
+            kwargs = _job_fit_kwargs(state)
+            result = take(state, "job_fit", kwargs)
+            if result is None:
+                # Pass dynamic instructions to the specialized agent
+                result = evaluator.evaluate_fit(**kwargs)
+            remember(state, "job_fit", result)
+        return _job_fit_completed(state, result)
+    except Exception as e:
+        return _job_fit_failed(state, e)
+
+@track_node("job_fit")
+async def ajob_fit_node(state: ProfileBotState) -> ProfileBotState:
+    try:
+        await _aensure_analysis(state, "job_fit")
+        early = _job_fit_precheck(state)
+        if early is not None:
+            return early
+        result = recall(state, "job_fit")
+        if result is None:
+            kwargs = _job_fit_kwargs(state)
+            result = await atake(state, "job_fit", kwargs)
+            if result is None:
+                result = await evaluator.aevaluate_fit(**kwargs)
+            remember(state, "job_fit", result)
+        return _job_fit_completed(state, result)
+    except Exception as e:
+        return _job_fit_failed(state, e)
+
+# --- Career guide ---
+
+def _guide_precheck(state: ProfileBotState):
+    log_agent_action("career_guide", "Starting career guidance", user_input=state.user_input)
+    if not state.user_input:
+        return _missing_input(state, "career_guide", "Missing user query",
+                              "User query required for career guidance. Please ask a specific career question.",
+                              "RESPOND_DIRECTLY")
+    return None
+
+def _guide_kwargs(state: ProfileBotState) -> dict:
+    return {
+        "user_query": state.user_input,
+        "profile_analysis_report": state.profile_analysis_report or {},
+        "target_role": state.target_role or "your desired role",
+        "user_instructions": state.current_user_instructions,
+        "conversation_context": state.conversation_context,
+    }
+
+def _guide_completed(state: ProfileBotState, result) -> ProfileBotState:
+    log_agent_action("career_guide", "Career guidance completed successfully", {
+        "career_guidance_notes": True,
+        "guidance_completed": True,
+        "last_agent_called": "guide",
+        "current_router_action": "PROCESS_AGENT_OUTPUT"
+    })
+    state.career_guidance_notes = result
+    state.guidance_completed = True
+    record_provenance(state, "guide")
+    return _store_agent_output(state, result, "guide", "Career guidance provided")
+
+def _guide_failed(state: ProfileBotState, e: Exception) -> ProfileBotState:
+    log_error("career_guide", str(e))
+    if isinstance(e, ValueError):
         state.error_message = f"Career guidance error: {str(e)}"
         state.current_bot_response = "I encountered an issue providing career guidance. Please ask a specific career-related question."
-        state.current_router_action = "RESPOND_DIRECTLY"
-        # Clear processing flags to prevent routing to ProcessAgentOutput
-        state.pending_agent_output = None
-        state.needs_output_processing = False
-        state.last_agent_called = None
-        return state
-    except Exception as e:
-        log_error("career_guide", str(e))
+    else:
         state.error_message = str(e)
         state.current_bot_response = "I apologize, but I encountered an error providing career guidance. Please try again."
-        state.current_router_action = "RESPOND_DIRECTLY"
-        # Clear processing flags to prevent routing to ProcessAgentOutput
-        state.pending_agent_output = None
-        state.needs_output_processing = False
-        state.last_agent_called = None
-        return state
+    return _clear_agent_output(state)
 
-def process_agent_output_node(state: ProfileBotState) -> ProfileBotState:
-    """Process and contextualize agent output through the router for user presentation."""
+@track_node("guide")
+def guide_node(state: ProfileBotState) -> ProfileBotState:
+    try:
+        _ensure_analysis(state, "guide")
+        early = _guide_precheck(state)
+        if early is not None:
+            return early
+        # Pass dynamic instructions to the specialized agent
+        result = guide.guide(**_guide_kwargs(state))
+        return _guide_completed(state, result)
+    except Exception as e:
+        return _guide_failed(state, e)
+
+@track_node("guide")
+async def aguide_node(state: ProfileBotState) -> ProfileBotState:
+    try:
+        await _aensure_analysis(state, "guide")
+        early = _guide_precheck(state)
+        if early is not None:
+            return early
+        result = await guide.aguide(**_guide_kwargs(state))
+        return _guide_completed(state, result)
+    except Exception as e:
+        return _guide_failed(state, e)
+
+# --- Output processing ---
+
+def _process_output_precheck(state: ProfileBotState):
     log_agent_action("output_processor", "Starting agent output processing", 
                     {"agent_type": state.last_agent_called, "has_pending_output": bool(state.pending_agent_output)})
+    if state.pending_agent_output and state.last_agent_called:
+        return None
+    
+    log_error("output_processor", f"Missing agent output or agent type - pending_output: {bool(state.pending_agent_output)}, last_agent: {state.last_agent_called}, needs_processing: {state.needs_output_processing}")
+    
+    # Provide more specific error context
+    if not state.last_agent_called:
+        error_msg = "No agent type specified for output processing. This suggests an agent execution issue."
+    elif not state.pending_agent_output:
+        error_msg = f"No output available from {state.last_agent_called} agent. The agent may have encountered an error."
+    else:
+        error_msg = "Missing agent output data for processing."
+    
+    state.current_bot_response = f"I encountered an issue processing the agent results. {error_msg} Please try your request again."
+    return _clear_agent_output(state)
+
+def _process_output_kwargs(state: ProfileBotState) -> dict:
+    return {
+        "agent_output": state.pending_agent_output,
+        "agent_type": state.last_agent_called,
+        "conversation_context": state.conversation_context,
+        "user_instructions": state.current_user_instructions,
+    }
+
+def _template_output(state: ProfileBotState, kwargs: dict) -> str:
+    reply = summarize_report(kwargs["agent_output"], kwargs["agent_type"], kwargs["user_instructions"])
+    # The reply ends by offering the next step; record the offer so a "yes" takes the confirm_yes fast path
+    next_agent = NEXT_STEP_AGENTS.get(kwargs["agent_type"])
+    if next_agent:
+        state.awaiting_user_confirmation = True
+        state.proposed_next_action = next_agent
+    return reply
+
+def _outline_kwargs(kwargs: dict) -> dict:
+    # The report is already in the sidebar; the model only needs its outline to write the reply
+    return {**kwargs, "agent_output": format_outline(report_outline(kwargs["agent_output"]))}
+
+def _process_output_completed(state: ProfileBotState, processed_response: str) -> ProfileBotState:
+    log_agent_action("output_processor", "Agent output processed successfully", {
+        "current_bot_response": True,
+        "current_router_action": "RESPOND_DIRECTLY",
+        "pending_agent_output": None,
+        "needs_output_processing": False
+    })
+    
+    # Set the processed response for user presentation
+    state.current_bot_response = processed_response
+    state.current_router_action = "RESPOND_DIRECTLY"
     
+    # Clear processing flags
+    state.pending_agent_output = None
+    state.needs_output_processing = False
+    
+    # Add response to conversation history
+    if state.current_bot_response and (
+        not state.conversation_history or
+        state.conversation_history[-1].get("role") != "assistant" or
+        state.conversation_history[-1].get("content") != state.current_bot_response
+    ):
+        state.conversation_history.append({"role": "assistant", "content": state.current_bot_response})
+
+    _speculate_next(state)
+    return state
+
+def _speculate_next(state: ProfileBotState) -> None:
+    # The next step the reply offers (see NEXT_STEPS), started while the user reads it;
+    # guide is left out since its input is the user's next message
+    reap_expired()
+    if state.last_agent_called == "analyze" and not state.rewrite_completed:
+        speculate(state, "rewrite", rewriter.rewrite, _rewrite_kwargs(state))
+    elif (state.last_agent_called == "rewrite" and state.target_job_description and not state.job_fit_completed
+          and not memoized(state, "job_fit")):
+        speculate(state, "job_fit", evaluator.evaluate_fit, _job_fit_kwargs(state))
+
+def _process_output_failed(state: ProfileBotState, e: Exception) -> ProfileBotState:
+    log_error("output_processor", str(e))
+    state.error_message = f"Output processing error: {str(e)}"
+    state.current_bot_response = "I've completed the analysis. The detailed results are available, and I'm ready to help you with next steps. What would you like to explore further?"
+    state.current_router_action = "RESPOND_DIRECTLY"
+    state.pending_agent_output = None
+    state.needs_output_processing = False
+    return state
+
+@track_node("process_agent_output")
+def process_agent_output_node(state: ProfileBotState) -> ProfileBotState:
+    """Process and contextualize agent output through the router for user presentation."""
     try:
-        if not state.pending_agent_output or not state.last_agent_called:
-            log_error("output_processor", f"Missing agent output or agent type - pending_output: {bool(state.pending_agent_output)}, last_agent: {state.last_agent_called}, needs_processing: {state.needs_output_processing}")
-            
-            # Provide more specific error context
-            if not state.last_agent_called:
-                error_msg = "No agent type specified for output processing. This suggests an agent execution issue."
-            elif not state.pending_agent_output:
-                error_msg = f"No output available from {state.last_agent_called} agent. The agent may have encountered an error."
-            else:
-                error_msg = "Missing agent output data for processing."
-            
-            state.current_bot_response = f"I encountered an issue processing the agent results. {error_msg} Please try your request again."
-            state.current_router_action = "RESPOND_DIRECTLY"
-            # Clear processing flags
-            state.pending_agent_output = None
-            state.needs_output_processing = False
-            state.last_agent_called = None
-            return state
-        
-        # Use the router to process and contextualize the agent output
-        processed_response = routing_agent.process_agent_output(
-            agent_output=state.pending_agent_output,
-            agent_type=state.last_agent_called,
-            conversation_context=state.conversation_context,
-            user_instructions=state.current_user_instructions
-        )
-        
-        # Log successful processing
-        state_changes = {
-            "current_bot_response": True,
-            "current_router_action": "RESPOND_DIRECTLY",
-            "pending_agent_output": None,
-            "needs_output_processing": False
-        }
-        log_agent_action("output_processor", "Agent output processed successfully", state_changes)
-        
-        # Set the processed response for user presentation
-        state.current_bot_response = processed_response
-        state.current_router_action = "RESPOND_DIRECTLY"
-        
-        # Clear processing flags
-        state.pending_agent_output = None
-        state.needs_output_processing = False
-        
-        # Add response to conversation history
-        if state.current_bot_response and (
-            not state.conversation_history or
-            state.conversation_history[-1].get("role") != "assistant" or
-            state.conversation_history[-1].get("content") != state.current_bot_response
-        ):
-            state.conversation_history.append({"role": "assistant", "content": state.current_bot_response})
-        
-        return state
-        
+        early = _process_output_precheck(state)
+        if early is not None:
+            return early
+        kwargs = _process_output_kwargs(state)
+        if OUTPUT_PROCESSING_MODE == "template":
+            processed_response = _template_output(state, kwargs)
+        elif OUTPUT_PROCESSING_MODE == "stream":
+            processed_response = routing_agent.stream_agent_output(**_outline_kwargs(kwargs))
+        else:
+            # Use the router to process and contextualize the agent output
+            processed_response = routing_agent.process_agent_output(**kwargs)
+        return _process_output_completed(state, processed_response)
     except Exception as e:
-        log_error("output_processor", str(e))
-        state.error_message = f"Output processing error: {str(e)}"
-        state.current_bot_response = "I've completed the analysis. The detailed results are available, and I'm ready to help you with next steps. What would you like to explore further?"
-        state.current_router_action = "RESPOND_DIRECTLY"
-        state.pending_agent_output = None
-        state.needs_output_processing = False
-        return state
+        return _process_output_failed(state, e)
+
+@track_node("process_agent_output")
+async def aprocess_agent_output_node(state: ProfileBotState) -> ProfileBotState:
+    """Async variant of process_agent_output_node."""
+    try:
+        early = _process_output_precheck(state)
+        if early is not None:
+            return early
+        kwargs = _process_output_kwargs(state)
+        if OUTPUT_PROCESSING_MODE == "template":
+            processed_response = _template_output(state, kwargs)
+        elif OUTPUT_PROCESSING_MODE == "stream":
+            processed_response = await routing_agent.astream_agent_output(**_outline_kwargs(kwargs))
+        else:
+            processed_response = await routing_agent.aprocess_agent_output(**kwargs)
+        return _process_output_completed(state, processed_response)
+    except Exception as e:
+        return _process_output_failed(state, e)
+
+# --- Full report ---
+
+# State each agent writes besides its branch report. Branches run in the same graph step,
+# so they must not write a common field (debug_info, current_bot_response, ...)
+_BRANCH_FIELDS = {
+    "rewrite": ("content_rewrites_suggestions_ref", "rewrite_completed"),
+    "job_fit": ("job_fit_evaluation_report_ref", "job_fit_completed", "awaiting_job_description"),
+    "guide": ("career_guidance_notes_ref", "guidance_completed"),
+}
+
+@track_node("full_report", new_turn=True)
+def full_report_start_node(state: ProfileBotState) -> ProfileBotState:
+    """Entry of the full-report graph: record the user message and clear leftover branch reports."""
+    log_agent_action("full_report", "Starting full report", user_input=state.user_input)
+    if state.user_input and (not state.conversation_history or
+                             state.conversation_history[-1].get("content") != state.user_input):
+        state.conversation_history.append({"role": "user", "content": state.user_input})
+    invalidate_stale(state)
+    update_memory(state)
+    state.error_message = None
+    state.last_agent_called = None
+    state.branch_reports = None
+    return state
+
+def full_report_branches(state: ProfileBotState) -> list:
+    """Agents to fan out to once the profile is analyzed; job fit needs a job description."""
+    agents = ["rewrite", "guide"]
+    if state.target_job_description:
+        agents.insert(1, "job_fit")
+    return agents
+
+def _branch_state(state: ProfileBotState) -> ProfileBotState:
+    # Own debug_info per branch so the node metrics don't land in a dict the other branches share
+    return state.model_copy(update={"debug_info": {}})
+
+def _branch_update(agent_key: str, result: ProfileBotState) -> dict:
+    turn = result.debug_info.get("turn", {})
+    report = {
+        "calls": turn.get("calls", []),
+        "wall_s": turn.get("nodes", {}).get(agent_key, {}).get("node_wall_s", 0.0),
+    }
+    if result.last_agent_called == agent_key and result.pending_agent_output:
+        report["output"] = result.pending_agent_output
+    else:
+        report["error"] = result.current_bot_response or result.error_message or "No report was produced."
+    update = {field: getattr(result, field) for field in _BRANCH_FIELDS[agent_key]}
+    update["branch_reports"] = {agent_key: report}
+    # Only this branch's entry: the reducer merges the branches' records
+    if agent_key in result.report_provenance:
+        update["report_provenance"] = {agent_key: result.report_provenance[agent_key]}
+    return update
+
+def rewrite_branch_node(state: ProfileBotState) -> dict:
+    return _branch_update("rewrite", rewrite_node(_branch_state(state)))
+
+async def arewrite_branch_node(state: ProfileBotState) -> dict:
+    return _branch_update("rewrite", await arewrite_node(_branch_state(state)))
+
+def job_fit_branch_node(state: ProfileBotState) -> dict:
+    return _branch_update("job_fit", job_fit_node(_branch_state(state)))
+
+async def ajob_fit_branch_node(state: ProfileBotState) -> dict:
+    return _branch_update("job_fit", await ajob_fit_node(_branch_state(state)))
+
+def guide_branch_node(state: ProfileBotState) -> dict:
+    return _branch_update("guide", guide_node(_branch_state(state)))
+
+async def aguide_branch_node(state: ProfileBotState) -> dict:
+    return _branch_update("guide", await aguide_node(_branch_state(state)))
+
+@track_node("merge_reports")
+def merge_reports_node(state: ProfileBotState) -> ProfileBotState:
+    """Join of the full-report branches: fold their metrics into debug_info and write one reply."""
+    reports = state.branch_reports or {}
+    outputs, errors = {}, {}
+    if state.profile_analysis_report and state.last_agent_called == "analyze":
+        # Analysis ran in this graph run rather than an earlier turn
+        outputs["analyze"] = state.profile_analysis_report
+    for agent_key, report in reports.items():
+        record_node_metrics(state.debug_info, agent_key, report.get("calls", []), report.get("wall_s", 0.0))
+        if "output" in report:
+            outputs[agent_key] = report["output"]
+        else:
+            errors[agent_key] = report["error"]
+    log_agent_action("full_report", "Merged branch reports",
+                     {"completed": ", ".join(outputs) or "none", "failed": ", ".join(errors) or "none"})
+
+    state.current_bot_response = summarize_full_report(outputs, errors, state.current_user_instructions)
+    state.current_task_status = "Full report completed"
+    state.current_router_action = "RESPOND_DIRECTLY"
+    state.branch_reports = None
+    state.pending_agent_output = None
+    state.needs_output_processing = False
+    state.last_agent_called = None
+    state.user_requested_update = False
+    state.conversation_history.append({"role": "assistant", "content": state.current_bot_response})
+    return state
+
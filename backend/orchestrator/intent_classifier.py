@@ -0,0 +1,310 @@
+__module_name__ = "intent_classifier"
+
+# Local router-action classifier: TF-IDF features of the user's message and
+# the logged state flags, fed to a softmax (multinomial logistic) regression.
+# Trained from the "ROUTER: Decision" lines backend/logger.py writes (only the
+# routing model's own decisions on a live backend), or from JSONL files of
+# {"user_input", "flags", "action"} records. Pure Python so it
+# adds no dependencies. Train and evaluate with:
+#
+#     PYTHONPATH=. python -m backend.orchestrator.intent_classifier backend/logs/*.log
+
+import argparse
+import glob
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .state_schema import ProfileBotState
+from backend.logger import log_error
+
+# Answer routing turns from the classifier when it is confident (requires a trained model file)
+INTENT_CLASSIFIER_ENABLED = os.getenv("INTENT_CLASSIFIER_ENABLED", "false").lower() in ("1", "true", "yes", "on")
+INTENT_CLASSIFIER_PATH = os.getenv(
+    "INTENT_CLASSIFIER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "router_intent.json"),
+)
+INTENT_CLASSIFIER_THRESHOLD = float(os.getenv("INTENT_CLASSIFIER_THRESHOLD", "0.9"))
+
+# backend/logger.log_router_decision keeps this much of the input
+LOGGED_INPUT_CHARS = 40
+_ENTRY_START = re.compile(r"^\d{2}:\d{2}:\d{2} \| ", re.MULTILINE)
+_DECISION = re.compile(
+    r"^ROUTER: Decision -> (\w+) \| Input: '(.*)' \| State: \[(.*)\](?: \| Source: (\w+)/(\w+))?\s*$", re.DOTALL)
+# Fast-path and classifier decisions would teach the classifier its own rules, and the
+# fake backend's canned routes are not the model's; replayed cassettes were recorded
+# live but would count those turns again
+TRAINING_SOURCES = ("llm",)
+TRAINING_BACKENDS = ("gemini", "record")
+# Entries logged before decisions carried a source all came from the routing model on Gemini
+UNTAGGED_SOURCE = ("llm", "gemini")
+_WORD = re.compile(r"[a-z0-9']+")
+
+Example = Dict[str, Any]
+
+def _log_input(user_input: str) -> str:
+    # Same truncation as the log, so training and serving see the same text
+    return user_input[:LOGGED_INPUT_CHARS] + "..." if len(user_input) > LOGGED_INPUT_CHARS else user_input
+
+def _log_flags(flags: Dict[str, Any]) -> List[str]:
+    # Same rendering as log_router_decision
+    rendered = []
+    for key, value in flags.items():
+        if isinstance(value, bool) and value:
+            rendered.append(key)
+        elif value is not None and not isinstance(value, bool):
+            rendered.append(f"{key}='{str(value)[:20]}'")
+    return rendered
+
+def features(user_input: str, flags: List[str]) -> List[str]:
+    """Terms for one turn: input words and bigrams, shape markers and state flags."""
+    text = user_input.lower()
+    words = _WORD.findall(text)
+    terms = [f"w:{w}" for w in words] + [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+    if "linkedin.com/in" in text:
+        terms.append("shape:linkedin_url")
+    elif "http" in text:
+        terms.append("shape:other_url")
+    if text.endswith("..."):
+        terms.append("shape:long")
+    if not words:
+        terms.append("shape:empty")
+    terms += [f"flag:{flag}" for flag in flags]
+    return terms
+
+def parse_router_log(path: str) -> List[Example]:
+    """
+    Routing decisions from an agent_actions_*.log file that the routing model made
+    on a live backend. Untagged entries (older logs) count as UNTAGGED_SOURCE.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    examples = []
+    # Entries can span lines (pasted job descriptions), so split on the timestamp prefix
+    for entry in _ENTRY_START.split(text):
+        match = _DECISION.match(entry)
+        if not match:
+            continue
+        action, user_input, flags, source, backend = match.groups()
+        if source is None:
+            source, backend = UNTAGGED_SOURCE
+        if source not in TRAINING_SOURCES or backend not in TRAINING_BACKENDS:
+            continue
+        examples.append({
+            "user_input": user_input,
+            "flags": [flag.strip() for flag in flags.split(", ") if flag.strip() and flag.strip() != "initial"],
+            "action": action,
+        })
+    return examples
+
+def load_examples(paths: Iterable[str]) -> List[Example]:
+    examples: List[Example] = []
+    for path in paths:
+        if path.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        examples.append({
+                            "user_input": _log_input(record.get("user_input") or ""),
+                            "flags": record.get("flags") or [],
+                            "action": record["action"],
+                        })
+        else:
+            examples.extend(parse_router_log(path))
+    from agents.router import ROUTER_ACTIONS
+    return [ex for ex in examples if ex["action"] in ROUTER_ACTIONS]
+
+class IntentClassifier:
+    """TF-IDF + softmax regression over router actions."""
+
+    def __init__(self, classes: List[str], idf: Dict[str, float],
+                 weights: Dict[str, Dict[str, float]], bias: Dict[str, float], meta: Optional[Dict[str, Any]] = None):
+        self.classes = classes
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+        self.meta = meta or {}
+
+    def _vector(self, terms: List[str]) -> Dict[str, float]:
+        counts = Counter(term for term in terms if term in self.idf)
+        vector = {term: (1 + math.log(count)) * self.idf[term] for term, count in counts.items()}
+        norm = math.sqrt(sum(v * v for v in vector.values())) or 1.0
+        return {term: v / norm for term, v in vector.items()}
+
+    def _probabilities(self, vector: Dict[str, float]) -> Dict[str, float]:
+        scores = {
+            cls: self.bias[cls] + sum(self.weights[cls].get(term, 0.0) * v for term, v in vector.items())
+            for cls in self.classes
+        }
+        top = max(scores.values())
+        exp = {cls: math.exp(score - top) for cls, score in scores.items()}
+        total = sum(exp.values())
+        return {cls: value / total for cls, value in exp.items()}
+
+    def predict(self, user_input: str, flags: List[str]) -> Tuple[str, float]:
+        """Most likely router action for a turn, with its probability."""
+        probabilities = self._probabilities(self._vector(features(user_input, flags)))
+        action = max(probabilities, key=probabilities.get)
+        return action, probabilities[action]
+
+    def predict_state(self, state: ProfileBotState) -> Tuple[str, float]:
+        from .router_view import key_state_flags
+        return self.predict(_log_input(state.user_input or ""), _log_flags(key_state_flags(state)))
+
+    @classmethod
+    def train(cls, examples: List[Example], epochs: int = 40, learning_rate: float = 0.5,
+              l2: float = 1e-4, seed: int = 0) -> "IntentClassifier":
+        docs = [features(ex["user_input"], ex["flags"]) for ex in examples]
+        doc_freq = Counter(term for doc in docs for term in set(doc))
+        n_docs = len(docs)
+        idf = {term: math.log((1 + n_docs) / (1 + df)) + 1 for term, df in doc_freq.items()}
+        classes = sorted({ex["action"] for ex in examples})
+        model = cls(classes, idf, {c: {} for c in classes}, {c: 0.0 for c in classes})
+
+        data = [(model._vector(doc), ex["action"]) for doc, ex in zip(docs, examples)]
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            step = learning_rate / (1 + epoch * 0.1)
+            for vector, label in data:
+                probabilities = model._probabilities(vector)
+                for c in classes:
+                    gradient = probabilities[c] - (1.0 if c == label else 0.0)
+                    model.bias[c] -= step * gradient
+                    weights = model.weights[c]
+                    for term, value in vector.items():
+                        w = weights.get(term, 0.0)
+                        weights[term] = w - step * (gradient * value + l2 * w)
+        model.meta = {"examples": n_docs, "class_counts": dict(Counter(ex["action"] for ex in examples)),
+                      "trained_at": time.time()}
+        return model
+
+    def save(self, path: str = INTENT_CLASSIFIER_PATH) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        weights = {c: {t: round(w, 6) for t, w in ws.items() if abs(w) > 1e-6} for c, ws in self.weights.items()}
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"classes": self.classes, "idf": self.idf, "weights": weights,
+                       "bias": self.bias, "meta": self.meta}, f)
+
+    @classmethod
+    def load(cls, path: str = INTENT_CLASSIFIER_PATH) -> "IntentClassifier":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["classes"], data["idf"], data["weights"], data["bias"], data.get("meta"))
+
+_classifier: Optional[IntentClassifier] = None
+_classifier_loaded = False
+_lock = threading.Lock()
+_stats: Dict[str, Any] = {"turns": 0, "answered": 0, "low_confidence": 0, "unsupported": 0, "predict_us": 0.0}
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """The trained classifier, or None when disabled or no model file exists."""
+    global _classifier, _classifier_loaded
+    if not INTENT_CLASSIFIER_ENABLED:
+        return None
+    with _lock:
+        if not _classifier_loaded:
+            _classifier_loaded = True
+            try:
+                _classifier = IntentClassifier.load(INTENT_CLASSIFIER_PATH)
+            except (OSError, ValueError, KeyError) as e:
+                log_error("intent_classifier", f"Classifier unavailable, routing with the model only: {e}")
+        return _classifier
+
+def classify_route(state: ProfileBotState) -> Optional[Dict[str, Any]]:
+    """
+    Routing decision from the classifier when it is confident and the
+    predicted action can be carried out without a model-written reply,
+    otherwise None so the caller asks the routing model.
+    """
+    classifier = get_intent_classifier()
+    if classifier is None or not state.user_input:
+        return None
+    from .fast_router import route_action
+
+    start = time.perf_counter()
+    action, confidence = classifier.predict_state(state)
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    decision = route_action(action, state) if confidence >= INTENT_CLASSIFIER_THRESHOLD else None
+    with _lock:
+        _stats["turns"] += 1
+        _stats["predict_us"] += elapsed_us
+        if confidence < INTENT_CLASSIFIER_THRESHOLD:
+            _stats["low_confidence"] += 1
+        elif decision is None:
+            _stats["unsupported"] += 1
+        else:
+            _stats["answered"] += 1
+    if decision is not None:
+        decision["classifier_confidence"] = round(confidence, 3)
+    return decision
+
+def get_intent_classifier_stats() -> Dict[str, Any]:
+    with _lock:
+        stats = dict(_stats)
+    turns = stats["turns"]
+    stats["predict_us"] = stats["predict_us"] / turns if turns else 0.0
+    stats["coverage"] = stats["answered"] / turns if turns else 0.0
+    stats["enabled"] = INTENT_CLASSIFIER_ENABLED
+    stats["threshold"] = INTENT_CLASSIFIER_THRESHOLD
+    return stats
+
+def evaluate(model: IntentClassifier, examples: List[Example], threshold: float) -> Dict[str, Any]:
+    """
+    Agreement with the logged decisions overall and on the turns the
+    classifier would answer (confident, and an action it is allowed to take).
+    """
+    from .fast_router import ACTION_AGENTS
+
+    correct = answered = answered_correct = 0
+    start = time.perf_counter()
+    for ex in examples:
+        action, confidence = model.predict(ex["user_input"], ex["flags"])
+        correct += action == ex["action"]
+        if confidence >= threshold and action in ACTION_AGENTS:
+            answered += 1
+            answered_correct += action == ex["action"]
+    elapsed = time.perf_counter() - start
+    n = len(examples) or 1
+    return {
+        "examples": len(examples),
+        "agreement": correct / n,
+        "coverage": answered / n,
+        "agreement_when_answering": answered_correct / answered if answered else 0.0,
+        "predict_us": elapsed / n * 1e6,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local router intent classifier from agent logs.")
+    parser.add_argument("sources", nargs="*", help="agent_actions_*.log files or JSONL example files")
+    parser.add_argument("--out", default=INTENT_CLASSIFIER_PATH, help="Where to write the model")
+    parser.add_argument("--threshold", type=float, default=INTENT_CLASSIFIER_THRESHOLD)
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of examples held out for evaluation")
+    parser.add_argument("--model-latency-s", type=float, default=2.0,
+                        help="Routing model latency per turn, for the time-saved estimate")
+    args = parser.parse_args()
+
+    sources = args.sources or sorted(glob.glob(os.path.join(os.path.dirname(os.path.dirname(__file__)), "logs", "*.log")))
+    examples = load_examples(sources)
+    if not examples:
+        raise SystemExit("No routing decisions found in the given sources.")
+    random.Random(0).shuffle(examples)
+    split = int(len(examples) * (1 - args.holdout))
+    train_set, test_set = examples[:split], examples[split:] or examples[:split]
+
+    held_out = evaluate(IntentClassifier.train(train_set), test_set, args.threshold)
+    # Ship a model trained on everything; the held-out numbers estimate its quality
+    model = IntentClassifier.train(examples)
+    model.save(args.out)
+    held_out["router_seconds_saved_per_100_turns"] = held_out["coverage"] * 100 * args.model_latency_s
+    print(json.dumps({"model": args.out, "classes": model.meta["class_counts"], "held_out": held_out}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -9,19 +9,34 @@ from .handlers import (
     guide_node,
     router_node,
     process_agent_output_node,
+    aanalyze_node,
+    arewrite_node,
+    ajob_fit_node,
+    aguide_node,
+    arouter_node,
+    aprocess_agent_output_node,
+    full_report_start_node,
+    full_report_branches,
+    rewrite_branch_node,
+    job_fit_branch_node,
+    guide_branch_node,
+    arewrite_branch_node,
+    ajob_fit_branch_node,
+    aguide_branch_node,
+    merge_reports_node,
 )
 from backend.memory import get_memory_saver
 
-def build_graph():
+def build_graph(async_nodes: bool = False):
     graph = StateGraph(ProfileBotState)
 
-    # Define nodes
-    graph.add_node("Router", router_node)
-    graph.add_node("AnalyzeProfile", analyze_node)
-    graph.add_node("RewriteContent", rewrite_node)
-    graph.add_node("EvaluateJobFit", job_fit_node)
-    graph.add_node("CareerGuidance", guide_node)
-    graph.add_node("ProcessAgentOutput", process_agent_output_node)
+    # Define nodes; async nodes await the model instead of blocking a thread
+    graph.add_node("Router", arouter_node if async_nodes else router_node)
+    graph.add_node("AnalyzeProfile", aanalyze_node if async_nodes else analyze_node)
+    graph.add_node("RewriteContent", arewrite_node if async_nodes else rewrite_node)
+    graph.add_node("EvaluateJobFit", ajob_fit_node if async_nodes else job_fit_node)
+    graph.add_node("CareerGuidance", aguide_node if async_nodes else guide_node)
+    graph.add_node("ProcessAgentOutput", aprocess_agent_output_node if async_nodes else process_agent_output_node)
 
     # Set entry point
     graph.set_entry_point("Router")
@@ -76,8 +91,72 @@ def build_graph():
 
     return graph
 
+# Full-report graph node for each agent branch
+BRANCH_NODES = {
+    "rewrite": "RewriteContent",
+    "job_fit": "EvaluateJobFit",
+    "guide": "CareerGuidance",
+}
+
+def build_full_report_graph(async_nodes: bool = False):
+    """
+    Graph for the "full package": analyze the profile if that hasn't happened
+    yet, then run the rewrite, job fit (only with a job description) and
+    career guide agents as parallel branches and merge their reports into one
+    reply. No router call; the turn takes as long as the slowest branch.
+    """
+    graph = StateGraph(ProfileBotState)
+
+    graph.add_node("StartFullReport", full_report_start_node)
+    graph.add_node("AnalyzeProfile", aanalyze_node if async_nodes else analyze_node)
+    graph.add_node("RewriteContent", arewrite_branch_node if async_nodes else rewrite_branch_node)
+    graph.add_node("EvaluateJobFit", ajob_fit_branch_node if async_nodes else job_fit_branch_node)
+    graph.add_node("CareerGuidance", aguide_branch_node if async_nodes else guide_branch_node)
+    graph.add_node("MergeReports", merge_reports_node)
+
+    graph.set_entry_point("StartFullReport")
+
+    def start_decision(state: ProfileBotState):
+        if not state.profile_analysis_report or state.user_requested_update:
+            return "AnalyzeProfile"
+        return [BRANCH_NODES[agent] for agent in full_report_branches(state)]
+
+    def analyze_decision(state: ProfileBotState):
+        # A failed or skipped analysis (e.g. no profile loaded yet) already carries its reply
+        if state.last_agent_called != "analyze":
+            return END
+        return [BRANCH_NODES[agent] for agent in full_report_branches(state)]
+
+    branch_targets = [*BRANCH_NODES.values()]
+    graph.add_conditional_edges("StartFullReport", start_decision, ["AnalyzeProfile", *branch_targets])
+    graph.add_conditional_edges("AnalyzeProfile", analyze_decision, [*branch_targets, END])
+    # Branches started in the same step finish in the same step, so the merge runs once
+    for node in branch_targets:
+        graph.add_edge(node, "MergeReports")
+    graph.add_edge("MergeReports", END)
+
+    return graph
+
 def get_graph_runner() -> Graph:
     raw_graph = build_graph()
     memory_instance = get_memory_saver()
     compiled_graph = raw_graph.compile(checkpointer=memory_instance)
     return compiled_graph
+
+def get_async_graph_runner() -> Graph:
+    """
+    Graph compiled from the async nodes. Drive it with ainvoke/astream so many
+    sessions can share one event loop; it shares the checkpointer with the
+    sync runner, so a thread_id can move between the two.
+    """
+    raw_graph = build_graph(async_nodes=True)
+    memory_instance = get_memory_saver()
+    compiled_graph = raw_graph.compile(checkpointer=memory_instance)
+    return compiled_graph
+
+def get_full_report_graph_runner(async_nodes: bool = False) -> Graph:
+    """Full-report graph; shares the checkpointer, so it can run any turn of a chat session."""
+    raw_graph = build_full_report_graph(async_nodes=async_nodes)
+    memory_instance = get_memory_saver()
+    compiled_graph = raw_graph.compile(checkpointer=memory_instance)
+    return compiled_graph
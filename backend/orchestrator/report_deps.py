@@ -0,0 +1,84 @@
+__module_name__ = "report_deps"
+
+from typing import Any, Dict, List
+
+from .state_schema import ProfileBotState
+from backend.blob_store import has_value
+from backend.logger import log_agent_action
+
+# The reports form a DAG: each agent's report is derived from these state fields.
+# Blob-backed fields are their content hashes, and an upstream report appears as
+# its "_ref", so a recomputed analysis makes everything built on the old one stale.
+# (The career guide also answers the user's question, which is per turn and not tracked.)
+REPORT_INPUTS = {
+    "analyze": ("linkedin_data_ref",),
+    "rewrite": ("linkedin_data_ref", "profile_analysis_report_ref", "target_role"),
+    "job_fit": ("profile_analysis_report_ref", "target_job_description_ref"),
+    "guide": ("profile_analysis_report_ref", "target_role"),
+}
+# Blob-backed inputs the user supplies rather than an agent
+USER_INPUTS = ("linkedin_data_ref", "target_job_description_ref")
+# Report field of each agent and the flags that claim the report is done
+REPORT_OUTPUTS = {
+    "analyze": ("profile_analysis_report_ref", ("analysis_completed", "is_profile_analyzed")),
+    "rewrite": ("content_rewrites_suggestions_ref", ("rewrite_completed",)),
+    "job_fit": ("job_fit_evaluation_report_ref", ("job_fit_completed",)),
+    "guide": ("career_guidance_notes_ref", ("guidance_completed",)),
+}
+
+def report_inputs(state: ProfileBotState, agent: str) -> Dict[str, Any]:
+    """Current values of the inputs agent's report is derived from."""
+    return {field: getattr(state, field) for field in REPORT_INPUTS[agent]}
+
+def was_invalidated(state: ProfileBotState, agent: str) -> bool:
+    """Whether agent's report was dropped by invalidate_stale and not recomputed yet."""
+    return agent in state.report_provenance and state.report_provenance[agent] is None
+
+def record_provenance(state: ProfileBotState, agent: str) -> None:
+    """Note the inputs of the report agent just produced (call once the report is stored)."""
+    # A new dict rather than an in-place update: full-report branches share the parent's one
+    state.report_provenance = {**state.report_provenance, agent: report_inputs(state, agent)}
+
+def is_stale(state: ProfileBotState, agent: str) -> bool:
+    """Whether agent's report exists but was derived from inputs that have changed since."""
+    provenance = state.report_provenance.get(agent)
+    report_field, _ = REPORT_OUTPUTS[agent]
+    # Reports from before provenance tracking can't be judged and are kept
+    if not provenance or getattr(state, report_field) is None:
+        return False
+    return provenance != report_inputs(state, agent)
+
+def _dangling(state: ProfileBotState, field: str) -> bool:
+    # A ref whose blob was swept or lost (e.g. the blob database went missing) reads as None
+    ref = getattr(state, field)
+    return ref is not None and not has_value(ref)
+
+def invalidate_stale(state: ProfileBotState) -> List[str]:
+    """
+    Drop exactly the reports whose inputs changed, with their completion flags,
+    so the router sees them as not done and they are recomputed when asked for.
+    A report or input whose blob is missing counts as changed, so the flags never
+    claim a report the state can't return.
+    Agents are visited upstream first: clearing the analysis changes its "_ref",
+    which makes the reports derived from it stale in turn.
+    """
+    lost = [field for field in USER_INPUTS if _dangling(state, field)]
+    for field in lost:
+        setattr(state, field, None)
+    invalidated = []
+    for agent in REPORT_INPUTS:
+        report_field, flags = REPORT_OUTPUTS[agent]
+        if _dangling(state, report_field):
+            lost.append(report_field)
+        elif not is_stale(state, agent):
+            continue
+        setattr(state, report_field, None)
+        for flag in flags:
+            setattr(state, flag, False)
+        state.report_provenance = {**state.report_provenance, agent: None}
+        invalidated.append(agent)
+    if lost:
+        log_agent_action("report_deps", "Dropped refs to missing blobs", {"fields": ", ".join(lost)})
+    if invalidated:
+        log_agent_action("report_deps", "Invalidated stale reports", {"agents": ", ".join(invalidated)})
+    return invalidated
@@ -0,0 +1,109 @@
+__module_name__ = "report_summary"
+
+import re
+from typing import Any, Dict, List, Optional
+
+AGENT_LABELS = {
+    "analyze": "Profile Analyzer",
+    "rewrite": "Content Rewriter",
+    "job_fit": "Job Fit Evaluator",
+    "guide": "Career Guide",
+}
+
+# Next step in the optimization workflow after each agent (mirrors the router's workflow guidance)
+NEXT_STEPS = {
+    "analyze": "Next, I can rewrite your headline, summary and experience to address these findings. Would you like me to do that?",
+    "rewrite": "Next, I can evaluate how well your profile fits a specific role. Would you like to share a job description?",
+    "job_fit": "Next, I can put together personalized career guidance based on this evaluation. Would you like that?",
+    "guide": "We've completed the core optimization workflow! I can also help with interview prep, networking strategies, or other career questions.",
+}
+# Agent each NEXT_STEPS question offers, so a "yes" to it can be routed there
+NEXT_STEP_AGENTS = {"analyze": "rewrite", "rewrite": "job_fit", "job_fit": "guide"}
+
+SCORE_PATTERN = re.compile(r"([A-Z][\w ]*?Score)\**\s*:\s*\**\s*(\d{1,3})\s*/\s*100")
+FIRST_PRIORITY_PATTERN = re.compile(r"^###\s*(?:Action|Priority|Step)\s*1\s*:\s*(.+)$", re.MULTILINE)
+MAX_SECTIONS = 6
+MAX_SCORES = 4
+
+def _clean_heading(text: str) -> str:
+    # Drop leading emoji/markup so headings read as plain section names
+    return re.sub(r"^[^\w\[]+", "", text).strip(" *")
+
+def report_outline(report: Any) -> Dict[str, Any]:
+    """Title, section headings, scores and first priority action of a markdown agent report."""
+    text = report if isinstance(report, str) else str(report or "")
+    title = next((line[2:].strip() for line in text.splitlines() if line.startswith("# ")), None)
+    sections = [_clean_heading(line[3:]) for line in text.splitlines()
+                if line.startswith("## ") and not SCORE_PATTERN.search(line)]
+    scores: List[Dict[str, Any]] = []
+    for label, value in SCORE_PATTERN.findall(text):
+        label = _clean_heading(label)
+        if all(score["label"] != label for score in scores):
+            scores.append({"label": label, "value": int(value)})
+    priority = FIRST_PRIORITY_PATTERN.search(text)
+    return {
+        "title": title,
+        "sections": sections,
+        "scores": scores,
+        "top_priority": _clean_heading(priority.group(1)) if priority else None,
+    }
+
+def format_outline(outline: Dict[str, Any]) -> str:
+    """Outline as compact markdown, for prompts that don't need the full report."""
+    lines = ["(Outline only - the full report is already shown to the user in the sidebar)"]
+    if outline["title"]:
+        lines.append(f"# {outline['title']}")
+    lines += [f"- Score: {score['label']}: {score['value']}/100" for score in outline["scores"]]
+    lines += [f"- Section: {section}" for section in outline["sections"]]
+    if outline["top_priority"]:
+        lines.append(f"- Top priority: {outline['top_priority']}")
+    return "\n".join(lines)
+
+def summarize_report(agent_output: Any, agent_type: Optional[str],
+                     user_instructions: Optional[Dict[str, Any]] = None) -> str:
+    """Chat reply for a finished agent built locally from the report's headings and scores."""
+    outline = report_outline(agent_output)
+    label = AGENT_LABELS.get(agent_type, "specialist agent")
+    report_name = f"**{outline['title']}**" if outline["title"] else "report"
+
+    parts = [f"My {label} has finished your {report_name}. The full report is available in the sidebar."]
+    if outline["scores"]:
+        headline, *others = outline["scores"][:MAX_SCORES]
+        score_line = f"**{headline['label']}: {headline['value']}/100**"
+        if others:
+            score_line += " (" + ", ".join(f"{s['label']}: {s['value']}/100" for s in others) + ")"
+        parts.append(score_line)
+    if outline["sections"]:
+        parts.append("It covers: " + ", ".join(outline["sections"][:MAX_SECTIONS]) + ".")
+    if outline["top_priority"]:
+        parts.append(f"Top priority: **{outline['top_priority']}**.")
+    instruction_summary = (user_instructions or {}).get("summary")
+    if instruction_summary:
+        parts.append(f"As requested, I applied your instructions ({instruction_summary}).")
+    parts.append(NEXT_STEPS.get(agent_type, "What would you like to explore next?"))
+    return "\n\n".join(parts)
+
+def summarize_full_report(outputs: Dict[str, Any], errors: Dict[str, str],
+                          user_instructions: Optional[Dict[str, Any]] = None) -> str:
+    """Chat reply for a full-report run: one short paragraph per agent report, in workflow order."""
+    parts = ["Your full report is ready. Each report is available in the sidebar."]
+    for agent_type in AGENT_LABELS:
+        label = AGENT_LABELS[agent_type]
+        if agent_type in errors:
+            parts.append(f"**{label}**: {errors[agent_type]}")
+            continue
+        if agent_type not in outputs:
+            continue
+        outline = report_outline(outputs[agent_type])
+        line = f"**{label}**: {outline['title'] or 'report completed'}"
+        if outline["scores"]:
+            line += " - " + ", ".join(f"{s['label']}: {s['value']}/100" for s in outline["scores"][:MAX_SCORES])
+        if outline["top_priority"]:
+            line += f". Top priority: **{outline['top_priority']}**"
+        parts.append(line + ".")
+    if "job_fit" not in outputs and "job_fit" not in errors:
+        parts.append("Share a job description and I can add a job fit evaluation for that role.")
+    instruction_summary = (user_instructions or {}).get("summary")
+    if instruction_summary:
+        parts.append(f"As requested, I applied your instructions ({instruction_summary}).")
+    return "\n\n".join(parts)
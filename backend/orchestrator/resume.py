@@ -0,0 +1,70 @@
+__module_name__ = "resume"
+
+from typing import Any, Dict, Optional
+
+from .state_schema import BLOB_FIELDS, ProfileBotState
+from backend.blob_store import put_value
+
+# Fields a client sets on its copy of the state before a turn (a loaded profile);
+# everything else comes from the thread's checkpoint
+CLIENT_FIELDS = ("linkedin_url", "linkedin_data_ref", "target_job_description_ref")
+# Always part of a delta: the reply, and debug_info whose nested metrics nodes
+# update in place (so the state before the turn may already show the change)
+ALWAYS_IN_DELTA = ("current_bot_response", "debug_info")
+
+def resume_input(session_id: str, user_input: Optional[str], **updates: Any) -> Dict[str, Any]:
+    """
+    Graph input for the next turn of a session: the user's message plus any
+    fields the client changed. Large fields (BLOB_FIELDS) may be passed by
+    name and are stored as their "_ref". A new session_id starts a thread
+    from the state defaults.
+    """
+    graph_input = {"session_id": session_id, "user_input": user_input}
+    for name, value in updates.items():
+        if name in BLOB_FIELDS:
+            name, value = f"{name}_ref", put_value(value)
+        graph_input[name] = value
+    return graph_input
+
+def client_input(state: ProfileBotState) -> Dict[str, Any]:
+    """resume_input from a client's copy of the state: its user_input and CLIENT_FIELDS."""
+    return resume_input(state.session_id, state.user_input,
+                        **{name: getattr(state, name) for name in CLIENT_FIELDS})
+
+def state_delta(before: Dict[str, Any], after: Dict[str, Any]) -> Dict[str, Any]:
+    """Channels whose value changed between two "values" snapshots of a turn."""
+    delta = {key: value for key, value in after.items() if key not in before or before[key] != value}
+    for key in ALWAYS_IN_DELTA:
+        delta[key] = after.get(key)
+    return delta
+
+def _config(graph_input: Dict[str, Any]) -> Dict[str, Any]:
+    return {"configurable": {"thread_id": graph_input["session_id"]}}
+
+def resume_turn(graph_runner, graph_input: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run one turn from the thread's checkpoint and return only what changed.
+    The first "values" event is the checkpointed state with the input applied,
+    the last one the result, so no full state crosses the call boundary.
+    """
+    before = after = None
+    for values in graph_runner.stream(graph_input, config=_config(graph_input), stream_mode="values"):
+        if before is None:
+            before = values
+        after = values
+    return state_delta(before or {}, after or {})
+
+async def aresume_turn(graph_runner, graph_input: Dict[str, Any]) -> Dict[str, Any]:
+    """Async variant of resume_turn for graphs driven with astream."""
+    before = after = None
+    async for values in graph_runner.astream(graph_input, config=_config(graph_input), stream_mode="values"):
+        if before is None:
+            before = values
+        after = values
+    return state_delta(before or {}, after or {})
+
+def apply_delta(state: ProfileBotState, delta: Dict[str, Any]) -> ProfileBotState:
+    """Bring a client's copy of the state up to date with a turn's delta (in place)."""
+    for key, value in delta.items():
+        setattr(state, key, value)
+    return state
@@ -0,0 +1,85 @@
+__module_name__ = "router_view"
+
+import hashlib
+import json
+import os
+from typing import Any, Dict, Optional
+
+from .state_schema import ProfileBotState
+
+# "compact": flags plus short digests of the reports; "full": the whole state as before
+ROUTER_STATE_VIEW = os.getenv("ROUTER_STATE_VIEW", "compact").lower()
+
+# Characters of each long text kept in the compact view
+PREVIEW_CHARS = 160
+
+# Everything the router needs to decide is a flag or a short scalar
+_ROUTER_FIELDS = [
+    "linkedin_url", "target_role", "current_router_action", "last_agent_called",
+    "proposed_next_action", "current_task_status", "error_message", "user_preferences",
+    "needs_output_processing", "is_profile_analyzed", "awaiting_user_confirmation",
+    "awaiting_job_description", "analysis_completed", "rewrite_completed",
+    "job_fit_completed", "guidance_completed", "allow_re_execution", "user_requested_update",
+]
+_REPORT_FIELDS = [
+    "profile_analysis_report", "content_rewrites_suggestions",
+    "job_fit_evaluation_report", "career_guidance_notes",
+]
+_PROFILE_KEYS = ["firstName", "lastName", "headline", "location"]
+
+def text_digest(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Size, content hash and opening of a long text, or None when it is empty."""
+    if not text:
+        return None
+    preview = " ".join(text.split())[:PREVIEW_CHARS]
+    return {
+        "chars": len(text),
+        "sha1": hashlib.sha1(text.encode("utf-8")).hexdigest()[:12],
+        "preview": preview + ("..." if len(text) > PREVIEW_CHARS else ""),
+    }
+
+def _profile_summary(linkedin_data: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    if not linkedin_data:
+        return None
+    summary = {key: linkedin_data[key] for key in _PROFILE_KEYS if linkedin_data.get(key)}
+    summary["sha1"] = hashlib.sha1(
+        json.dumps(linkedin_data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()[:12]
+    return summary
+
+def compact_state(state: ProfileBotState) -> Dict[str, Any]:
+    """
+    Router-facing projection of the state. Conversation history (and the
+    conversation_context derived from it) and the user's input are sent to the
+    router separately, so they are left out; reports and the job description
+    are reduced to digests.
+    """
+    view = {field: getattr(state, field) for field in _ROUTER_FIELDS}
+    view["linkedin_data"] = _profile_summary(state.linkedin_data)
+    view["target_job_description"] = text_digest(state.target_job_description)
+    view["reports"] = {field: text_digest(getattr(state, field)) for field in _REPORT_FIELDS}
+    instructions = state.current_user_instructions or {}
+    view["current_user_instructions"] = instructions.get("summary")
+    pending = state.pending_agent_output
+    view["pending_agent_output"] = text_digest(pending if isinstance(pending, str) else json.dumps(pending)) if pending else None
+    return view
+
+def key_state_flags(state: ProfileBotState) -> Dict[str, Any]:
+    """Flags logged with every routing decision (and used as intent classifier features)."""
+    return {
+        "is_profile_analyzed": state.is_profile_analyzed,
+        "analysis_completed": state.analysis_completed,
+        "rewrite_completed": state.rewrite_completed,
+        "job_fit_completed": state.job_fit_completed,
+        "awaiting_confirmation": state.awaiting_user_confirmation,
+        "awaiting_job_desc": state.awaiting_job_description,
+        "linkedin_url": bool(state.linkedin_url),
+        "last_agent": state.last_agent_called
+    }
+
+def router_state_json(state: ProfileBotState) -> str:
+    """The "Current State" block of the routing prompt, per ROUTER_STATE_VIEW."""
+    if ROUTER_STATE_VIEW == "full":
+        # debug_info holds metrics only; keep it out of the routing prompt
+        return json.dumps(state.model_dump_inline(mode="json", exclude={"debug_info", "report_provenance"}), indent=2)
+    return json.dumps(compact_state(state), indent=2, default=str)
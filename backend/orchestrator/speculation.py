@@ -0,0 +1,172 @@
+__module_name__ = "speculation"
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from .state_schema import ProfileBotState
+from backend.call_metrics import collect_calls, estimate_cost, record_node_metrics, summarize_calls
+from backend.logger import log_agent_action, log_error
+from backend.rate_limiter import current_session_id, session_scope
+
+# Opt-in: start the workflow's likely next agent while the user reads the last report
+SPECULATIVE_AGENTS = os.getenv("SPECULATIVE_AGENTS", "false").lower() == "true"
+# Unclaimed results older than this are dropped (and counted as wasted)
+SPECULATION_TTL_S = float(os.getenv("SPECULATION_TTL_S", "900"))
+
+_speculation_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="speculation")
+# Reentrant: discarding an already finished run counts its waste under the lock
+_slots_lock = threading.RLock()
+# session -> the one speculative run kept for it
+_slots: Dict[str, Dict[str, Any]] = {}
+_stats = {"started": 0, "hits": 0, "discarded": 0, "cancelled": 0,
+          "wasted_prompt_tokens": 0, "wasted_output_tokens": 0, "saved_s": 0.0}
+
+def input_fingerprint(kwargs: Dict[str, Any]) -> str:
+    """Hash of an agent's inputs; conversation_context only carries tone and is left out."""
+    inputs = {key: value for key, value in kwargs.items() if key != "conversation_context"}
+    return hashlib.sha1(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+def _run(session: str, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    start = time.perf_counter()
+    with session_scope(session), collect_calls() as calls:
+        result = fn(**kwargs)
+    return {"result": result, "calls": calls, "wall_s": time.perf_counter() - start}
+
+def _count_waste(future: Future) -> None:
+    if future.cancelled() or future.exception() is not None:
+        return
+    totals = summarize_calls(future.result()["calls"])
+    with _slots_lock:
+        _stats["wasted_prompt_tokens"] += totals["prompt_tokens"]
+        _stats["wasted_output_tokens"] += totals["output_tokens"]
+
+def _discard(session: str, reason: str) -> None:
+    # Caller holds _slots_lock
+    slot = _slots.pop(session, None)
+    if slot is None:
+        return
+    future: Future = slot["future"]
+    if future.cancel():
+        _stats["cancelled"] += 1
+    else:
+        _stats["discarded"] += 1
+        # A running model call can't be interrupted; its tokens are counted once it lands
+        future.add_done_callback(_count_waste)
+    log_agent_action("speculation", "Discarded speculative run", {"agent": slot["agent"], "reason": reason})
+
+def speculate(state: ProfileBotState, agent: str, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> None:
+    """Start fn(**kwargs) in the background for the session, replacing any earlier run."""
+    if not SPECULATIVE_AGENTS:
+        return
+    session = state.session_id or current_session_id()
+    fingerprint = input_fingerprint(kwargs)
+    with _slots_lock:
+        slot = _slots.get(session)
+        if slot is not None and slot["agent"] == agent and slot["fingerprint"] == fingerprint:
+            return
+        _discard(session, "superseded")
+        _slots[session] = {
+            "agent": agent,
+            "fingerprint": fingerprint,
+            "future": _speculation_pool.submit(_run, session, fn, dict(kwargs)),
+            "started_at": time.monotonic(),
+        }
+        _stats["started"] += 1
+    log_agent_action("speculation", "Started speculative run", {"agent": agent})
+
+def _claim(state: ProfileBotState, agent: str, kwargs: Dict[str, Any]) -> Optional[Future]:
+    session = state.session_id or current_session_id()
+    with _slots_lock:
+        slot = _slots.get(session)
+        if slot is None:
+            return None
+        if time.monotonic() - slot["started_at"] > SPECULATION_TTL_S:
+            _discard(session, "expired")
+            return None
+        if slot["agent"] != agent:
+            # Another agent ran first, so the speculated inputs are likely out of date
+            _discard(session, "other agent")
+            return None
+        if slot["fingerprint"] != input_fingerprint(kwargs):
+            _discard(session, "inputs changed")
+            return None
+        del _slots[session]
+    return slot["future"]
+
+def discard_unless(state: ProfileBotState, agent: Optional[str]) -> None:
+    """Drop the session's speculative run unless it is for agent (the one the router just chose)."""
+    if not SPECULATIVE_AGENTS:
+        return
+    session = state.session_id or current_session_id()
+    with _slots_lock:
+        slot = _slots.get(session)
+        if slot is not None and slot["agent"] != agent:
+            _discard(session, "routed elsewhere")
+
+def reap_expired() -> int:
+    """Drop every session's speculative run older than SPECULATION_TTL_S (abandoned sessions never claim theirs)."""
+    now = time.monotonic()
+    with _slots_lock:
+        expired = [session for session, slot in _slots.items() if now - slot["started_at"] > SPECULATION_TTL_S]
+        for session in expired:
+            _discard(session, "expired")
+    return len(expired)
+
+def _adopt(state: ProfileBotState, agent: str, future: Future, wait_s: float) -> Optional[Any]:
+    if future.cancelled() or future.exception() is not None:
+        log_error("speculation", f"Speculative {agent} run failed, running it again: {future.exception()}")
+        return None
+    outcome = future.result()
+    with _slots_lock:
+        _stats["hits"] += 1
+        _stats["saved_s"] += max(0.0, outcome["wall_s"] - wait_s)
+    # The speculative calls are billed to this turn under their own node name
+    record_node_metrics(state.debug_info, f"{agent}_speculative", outcome["calls"], outcome["wall_s"])
+    log_agent_action("speculation", "Adopted speculative result",
+                     {"agent": agent, "waited_s": f"{wait_s:.3f}", "run_s": f"{outcome['wall_s']:.3f}"})
+    return outcome["result"]
+
+def take(state: ProfileBotState, agent: str, kwargs: Dict[str, Any]) -> Optional[Any]:
+    """Result of a speculative run of agent with these inputs (waiting if still running), or None."""
+    if not SPECULATIVE_AGENTS:
+        return None
+    future = _claim(state, agent, kwargs)
+    if future is None:
+        return None
+    start = time.perf_counter()
+    try:
+        future.result()
+    except Exception:
+        pass
+    return _adopt(state, agent, future, time.perf_counter() - start)
+
+async def atake(state: ProfileBotState, agent: str, kwargs: Dict[str, Any]) -> Optional[Any]:
+    """Async variant of take."""
+    if not SPECULATIVE_AGENTS:
+        return None
+    future = _claim(state, agent, kwargs)
+    if future is None:
+        return None
+    start = time.perf_counter()
+    try:
+        await asyncio.wrap_future(future)
+    except Exception:
+        pass
+    return _adopt(state, agent, future, time.perf_counter() - start)
+
+def get_speculation_stats() -> Dict[str, Any]:
+    """Process-wide hit rate and wasted tokens of speculative runs."""
+    with _slots_lock:
+        stats = dict(_stats)
+        stats["pending"] = len(_slots)
+    stats["enabled"] = SPECULATIVE_AGENTS
+    stats["hit_rate"] = stats["hits"] / stats["started"] if stats["started"] else 0.0
+    stats["wasted_cost_usd"] = estimate_cost(stats["wasted_prompt_tokens"], stats["wasted_output_tokens"])
+    stats["saved_s"] = round(stats["saved_s"], 3)
+    return stats
@@ -1,7 +1,9 @@
 __module_name__ = "state_schema"
 
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any, List, Literal, Union
+from pydantic import BaseModel, Field, model_validator
+from typing import Annotated, Optional, Dict, Any, List, Literal, Union
+
+from backend.blob_store import get_value, put_value
 
 # Define the possible actions the router_node can decide on
 RouterAction = Literal[
@@ -21,6 +23,34 @@ RouterAction = Literal[
 # Define agent types for better type safety
 AgentType = Literal["analyze", "rewrite", "job_fit", "guide"]
 
+# Large fields kept out of the checkpoints: the state holds "<name>_ref", the content
+# lives once in backend/blob_store.py and "<name>" is a property that reads/writes it
+BLOB_FIELDS = (
+    "linkedin_data", "target_job_description", "profile_analysis_report",
+    "content_rewrites_suggestions", "job_fit_evaluation_report", "career_guidance_notes",
+)
+
+def _blob_property(name: str) -> property:
+    ref_field = f"{name}_ref"
+
+    def getter(self):
+        return get_value(getattr(self, ref_field))
+
+    def setter(self, value):
+        setattr(self, ref_field, put_value(value))
+
+    return property(getter, setter, doc=f"{name}, loaded from the blob store on access.")
+
+def merge_branch_reports(current: Optional[Dict[str, Any]], update: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reducer for branch_reports: parallel branches add their own key; None clears the channel."""
+    if update is None:
+        return {}
+    return {**(current or {}), **update}
+
+def merge_report_provenance(current: Optional[Dict[str, Any]], update: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Reducer for report_provenance: parallel branches record their own report's key."""
+    return {**(current or {}), **(update or {})}
+
 class ProfileBotState(BaseModel):
     """
     Represents the state of our LangGraph workflow for LinkedIn optimization and career guidance.
@@ -33,6 +63,8 @@ class ProfileBotState(BaseModel):
         default_factory=list,
         description="Chronological list of messages between user and bot. Each dict: {'role': 'user'|'assistant', 'content': '...'}",
     )
+    conversation_summary: Optional[str] = Field(None, description="Rolling summary of older turns that have been folded out of conversation_history.")                                                                                # router_node - backend/orchestrator/conversation_memory.py folds older turns in from a background job.
+    summarized_message_count: int = Field(0, description="Number of messages folded into conversation_summary and removed from conversation_history.")                                                                                # router_node - set alongside conversation_summary.
     current_bot_response: Optional[str] = Field(None, description="The message generated by the bot to be sent to the user in the current turn.")                                                                                      # all nodes access this state  - router_node and process_agent_output_node can use the LLM to set state, other nodes simply set hardcoded messages during errors or exceptions.
     
     # 1a. Dynamic Instructions & Context
@@ -42,21 +74,22 @@ class ProfileBotState(BaseModel):
 
     # 2. Raw Inputs from User
     linkedin_url: Optional[str] = Field(None, description="The LinkedIn profile URL provided by the user.")                                                                                                                            # router_node - state set by the LLM
-    target_job_description: Optional[str] = Field(None, description="The job description provided by the user for job fit evaluation.")                                                                                                # router_node | job_fit_node - router_node sets this programatically, job_fit_node reads this for its analysis.
+    target_job_description_ref: Optional[str] = Field(None, description="Blob store hash of target_job_description: The job description provided by the user for job fit evaluation.")                                                                                                # router_node | job_fit_node - router_node sets this programatically, job_fit_node reads this for its analysis.
     target_role: Optional[str] = Field(None, description="The specific role/industry the user is interested in for guidance/job fit.")                                                                                                 # guide_node | rewrite_node - Currently these node only read. No nodes is setting this state in the first place. We need to inspect this state. Either has to be inferred from the JSON file, provided job description, or the LLM should ask the user explicitly.
-    linkedin_data: Optional[Dict[str, Any]] = Field(None, description="Parsed LinkedIn profile data from scraping.")                                                                                                                   # none - This is set programmatically after scraping the data/ loading from a file (e.g., JSON)
+    linkedin_data_ref: Optional[str] = Field(None, description="Blob store hash of linkedin_data: Parsed LinkedIn profile data from scraping.")                                                                                                                   # none - This is set programmatically after scraping the data/ loading from a file (e.g., JSON)
 
     # 3. Agent Outputs / Processed Data
-    profile_analysis_report: Optional[str] = Field(None, description="Detailed analysis report from the Profile Analyzer in markdown format.")                                                                                         # analyze_node | rewrite_node | job_fit_node | guide_node: The first one sets it, others read it for their respective tasks
-    content_rewrites_suggestions: Optional[str] = Field(None, description="Content rewrite suggestions from Content Rewriter in markdown format.")                                                                                     # rewrite_node - sets this state programmatically
-    job_fit_evaluation_report: Optional[str] = Field(None, description="Job fit evaluation report in markdown format, including score, gaps, etc.")                                                                                    # job_fit_node - sets this state programmatically
-    career_guidance_notes: Optional[str] = Field(None, description="Career guidance recommendations in markdown format.")                                                                                                              # guide_node - sets this state programmatically
+    profile_analysis_report_ref: Optional[str] = Field(None, description="Blob store hash of profile_analysis_report: Detailed analysis report from the Profile Analyzer in markdown format.")                                                                                         # analyze_node | rewrite_node | job_fit_node | guide_node: The first one sets it, others read it for their respective tasks
+    content_rewrites_suggestions_ref: Optional[str] = Field(None, description="Blob store hash of content_rewrites_suggestions: Content rewrite suggestions from Content Rewriter in markdown format.")                                                                                     # rewrite_node - sets this state programmatically
+    job_fit_evaluation_report_ref: Optional[str] = Field(None, description="Blob store hash of job_fit_evaluation_report: Job fit evaluation report in markdown format, including score, gaps, etc.")                                                                                    # job_fit_node - sets this state programmatically
+    career_guidance_notes_ref: Optional[str] = Field(None, description="Blob store hash of career_guidance_notes: Career guidance recommendations in markdown format.")                                                                                                              # guide_node - sets this state programmatically
 
     # 4. Control Flags & Workflow State
     current_router_action: Optional[RouterAction] = Field(None, description="The current action the router has decided upon (e.g., CALL_ANALYZE, RESPOND_DIRECTLY).")                                                                  # router_node - state set by the LLM                                       
     last_agent_called: Optional[AgentType] = Field(None, description="Stores which specialized agent was last invoked. Useful for conversational context.")                                                                            # router_node - state set by the LLM
     pending_agent_output: Optional[Union[Dict[str, Any], str]] = Field(None, description="Raw output from specialized agent waiting for router processing. Can be JSON dict (routing) or markdown string (specialized agents).")       # analyze_node | rewrite_node | job_fit_node | guide_node | process_agent_output_node - First 4 writes programatically, last one reads for post-processing.
     needs_output_processing: bool = Field(False, description="Flag: True if agent output needs router interpretation before user response.")                                                                                           # analyze_node | rewrite_node | job_fit_node | guide_node | process_agent_output_node - All nodes sets the states programatically, first 4 sets True, last one sets False
+    branch_reports: Annotated[Optional[Dict[str, Dict[str, Any]]], merge_branch_reports] = Field(default_factory=dict, description="Full-report mode: each parallel agent branch's output, error and call metrics, keyed by agent until the merge node consumes them.")                    # rewrite/job_fit/guide branch nodes write their own key; merge_reports_node reads and clears it.
     is_profile_analyzed: bool = Field(False, description="Flag: True if profile analysis has been successfully completed.")                                                                                                            # router_node - state set by the LLM
     awaiting_user_confirmation: bool = Field(False, description="Flag: True if the bot is waiting for a 'yes/no' or specific confirmation from the user.")                                                                             # router_node - state set by the LLM
     proposed_next_action: Optional[str] = Field(None, description="The action suggested by the bot (e.g., 'rewrite' after analysis) that needs user confirmation.")                                                                    # router_node - state set by the LLM
@@ -70,7 +103,36 @@ class ProfileBotState(BaseModel):
     guidance_completed: bool = Field(False, description="Flag: True if career guidance has been provided at least once.")                                                                                                              # guide_node - sets the state
     allow_re_execution: bool = Field(True, description="Flag: True if user wants to allow re-running of completed tasks. Set to False to prevent loops.")                                                                              # Currently not used by any nodes, neither any component uses this state!
     user_requested_update: bool = Field(False, description="Flag: True if user explicitly requested to update/redo a completed task.")                                                                                                 # router_node | analyze_node | rewrite_node | job_fit_node | guide_node - router node sets state using the LLM, others set state = False programmatically.
+    report_provenance: Annotated[Dict[str, Optional[Dict[str, Any]]], merge_report_provenance] = Field(default_factory=dict, description="Per agent report: the inputs (content hashes and scalars) it was derived from; None once the report has been invalidated.")   # analyze_node | rewrite_node | job_fit_node | guide_node record it; backend/orchestrator/report_deps.py compares it with the current inputs at the start of each turn.
 
     # 5. Error/Debugging Information
     error_message: Optional[str] = Field(None, description="Stores any error messages encountered during processing.")                                                                                                                 # All nodes use this state
-    debug_info: Dict[str, Any] = Field(default_factory=dict, description="Dictionary for storing various debug-related information.")                                                                                                  # Currently not used by any nodes, neither any component uses this state!
\ No newline at end of file
+    debug_info: Dict[str, Any] = Field(default_factory=dict, description="Dictionary for storing various debug-related information.")                                                                                                  # All nodes - backend/call_metrics.track_node writes per-turn ("turn") and per-session ("session") LLM call metrics here.
+
+    # Lazy accessors for the blob-backed fields
+    linkedin_data = _blob_property("linkedin_data")
+    target_job_description = _blob_property("target_job_description")
+    profile_analysis_report = _blob_property("profile_analysis_report")
+    content_rewrites_suggestions = _blob_property("content_rewrites_suggestions")
+    job_fit_evaluation_report = _blob_property("job_fit_evaluation_report")
+    career_guidance_notes = _blob_property("career_guidance_notes")
+
+    @model_validator(mode="before")
+    @classmethod
+    def _store_inline_blobs(cls, data: Any) -> Any:
+        # Accept the inline form too (constructor kwargs, dumps and checkpoints from before the blob store)
+        if isinstance(data, dict) and any(name in data for name in BLOB_FIELDS):
+            data = dict(data)
+            for name in BLOB_FIELDS:
+                if name in data:
+                    data[f"{name}_ref"] = put_value(data.pop(name))
+        return data
+
+    def model_dump_inline(self, **kwargs) -> Dict[str, Any]:
+        """model_dump with the blob-backed fields resolved to their content."""
+        dumped = self.model_dump(**kwargs)
+        for name in BLOB_FIELDS:
+            if f"{name}_ref" in dumped:
+                dumped[name] = get_value(dumped.pop(f"{name}_ref"))
+        return dumped
+
@@ -0,0 +1,59 @@
+__module_name__ = "streaming"
+
+from typing import Any, Dict, Iterator, Tuple
+
+# Graph nodes whose model output is a markdown report for the sidebar
+REPORT_NODES = {
+    "AnalyzeProfile": "Profile Analyzer",
+    "RewriteContent": "Content Rewriter",
+    "EvaluateJobFit": "Job Fit Evaluator",
+    "CareerGuidance": "Career Guide",
+}
+# Graph nodes whose model output is the chat reply itself
+RESPONSE_NODES = {"ProcessAgentOutput"}
+
+StreamEvent = Tuple[str, Any]
+
+def _chunk_text(chunk: Any) -> str:
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(part.get("text", "") if isinstance(part, dict) else str(part) for part in content)
+    return ""
+
+def stream_turn(graph_runner, graph_input: Dict[str, Any], config: Dict[str, Any]) -> Iterator[StreamEvent]:
+    """
+    Run one turn through the compiled graph and yield events as they happen:
+
+    - ("report", (node, text)): token of an agent's markdown report
+    - ("response", text): token of the chat reply
+    - ("state", values): full state after each step; the last one is the turn result
+
+    Model tokens come from LangGraph's "messages" stream mode, which switches
+    the chat models inside the nodes to streaming. Router JSON is not emitted.
+    If no reply token was streamed (router-only turns, cached reports), the
+    final current_bot_response is emitted as a single "response" event.
+    """
+    final_state: Dict[str, Any] = {}
+    streamed_response = False
+    for mode, payload in graph_runner.stream(graph_input, config=config, stream_mode=["messages", "values"]):
+        if mode == "values":
+            final_state = payload
+            yield "state", payload
+            continue
+        chunk, metadata = payload
+        text = _chunk_text(chunk)
+        if not text:
+            continue
+        node = metadata.get("langgraph_node")
+        if node in REPORT_NODES:
+            yield "report", (node, text)
+        elif node in RESPONSE_NODES:
+            streamed_response = True
+            yield "response", text
+
+    if not streamed_response:
+        final_response = final_state.get("current_bot_response")
+        if final_response:
+            yield "response", final_response
@@ -0,0 +1,25 @@
+__module_name__ = "conversation_summary"
+
+from langchain.prompts import PromptTemplate
+
+def get_summary_prompt():
+    """Prompt that folds older conversation turns into the rolling summary."""
+    return PromptTemplate(
+        input_variables=["previous_summary", "messages"],
+        template="""You are the Conversation Summarizer for a LinkedIn profile optimization assistant. Older turns of the conversation are replaced by your summary, so it must keep everything later turns may rely on.
+
+**Previous Summary:**
+{previous_summary}
+
+**New Messages:**
+{messages}
+
+**Instructions:**
+- Merge the new messages into the previous summary
+- Keep: the user's goals, target roles, stated preferences and instructions (tone, length, focus), which services have been completed, and any open questions or pending confirmations
+- Drop: greetings, pleasantries, and the full text of reports or job descriptions (mention that they were provided)
+- Write in the third person ("The user...") in at most 150 words
+- Output the summary text only, without headings or commentary
+
+**Summary:**"""
+    )
@@ -2,11 +2,8 @@ __module_name__ = "routing"
 
 from langchain.prompts import PromptTemplate
 
-def get_prompt():
-    return PromptTemplate(
-        input_variables=["state", "conversation_history", "user_input"],
-        template=(
-            """You are the LinkedIn Profile Optimization Router Agent - an intelligent orchestration system that coordinates specialized AI agents to deliver comprehensive LinkedIn optimization services.
+# Shared by the split and fused routing prompts so both route with identical rules
+_ROUTER_GUIDELINES = """You are the LinkedIn Profile Optimization Router Agent - an intelligent orchestration system that coordinates specialized AI agents to deliver comprehensive LinkedIn optimization services.
 
 **YOUR ROLE AS INTELLIGENT ORCHESTRATOR:**
 You are the central coordinator that:
@@ -144,7 +141,9 @@ Based on current completion status, guide users to next logical step:
 - Use agent names: "analyze", "rewrite", "job_fit", "guide", or null
 - Set user_requested_update=true only when user explicitly wants to redo completed tasks
 
-**Output Format (JSON only):**
+"""
+
+_ROUTER_OUTPUT_FORMAT = """**Output Format (JSON only):**
 {{
     "current_router_action": "ACTION_NAME",
     "current_bot_response": "Intelligent, conversational response that demonstrates thoughtful decision-making",
@@ -156,7 +155,11 @@ Based on current completion status, guide users to next logical step:
     "last_agent_called": "analyze|rewrite|job_fit|guide|null",
     "user_requested_update": true/false
 }}"""
-        )
+
+def get_prompt():
+    return PromptTemplate(
+        input_variables=["state", "conversation_history", "user_input"],
+        template=_ROUTER_GUIDELINES + _ROUTER_OUTPUT_FORMAT
     )
 
 def get_post_processing_prompt():
@@ -392,4 +395,42 @@ Provide a JSON response with extracted instructions:
 # - Keep responses focused on user value and actionable next steps
 
 # Respond as the intelligent orchestrator who has just coordinated a specialized agent to deliver results and is now guiding the user toward optimal next steps in their LinkedIn optimization journey."""
-#     )
\ No newline at end of file
+#     )
+
+def get_fused_prompt():
+    """Routing and instruction extraction in one call: the router JSON gains a user_instructions object."""
+    return PromptTemplate(
+        input_variables=["state", "conversation_history", "user_input"],
+        template=_ROUTER_GUIDELINES + """**USER INSTRUCTION EXTRACTION:**
+In the same response, extract any specific instructions in the User Input that should shape how the deployed agent performs its task:
+style (formal, casual, technical), length (brief, detailed), focus areas, tone (confident, humble, results-oriented),
+exclusions (things to avoid or not mention), target audience and customization context (specific roles, companies, situations).
+- Look beyond explicit keywords and consider implied preferences (e.g. mentioning a specific job implies tailoring)
+- Only extract genuine instructions, not general conversation
+- If there are none, set has_specific_instructions to false and leave the other fields empty
+
+**Output Format (JSON only):**
+{{
+    "current_router_action": "ACTION_NAME",
+    "current_bot_response": "Intelligent, conversational response that demonstrates thoughtful decision-making",
+    "linkedin_url": "URL if provided by user, otherwise null",
+    "is_profile_analyzed": true/false,
+    "awaiting_user_confirmation": true/false,
+    "awaiting_job_description": true/false,
+    "proposed_next_action": "logical_next_step_based_on_current_state",
+    "last_agent_called": "analyze|rewrite|job_fit|guide|null",
+    "user_requested_update": true/false,
+    "user_instructions": {{
+        "has_specific_instructions": true/false,
+        "style_preferences": ["list of style requirements"],
+        "content_focus": ["areas to emphasize"],
+        "tone_adjustments": ["tone requirements"],
+        "length_requirements": "brief/detailed/standard",
+        "exclusions": ["things to avoid or not mention"],
+        "target_audience": "description of intended audience",
+        "customization_context": "specific context for tailoring",
+        "raw_instructions": "direct quote of instruction-related text",
+        "confidence_score": 0.0-1.0
+    }}
+}}"""
+    )
@@ -0,0 +1,281 @@
+__module_name__ = "rate_limiter"
+
+import asyncio
+import contextlib
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Iterator, Optional
+
+# Process-wide Gemini quota. 0 disables the corresponding bucket.
+RATE_LIMIT_RPM = int(os.getenv("RATE_LIMIT_RPM", "60"))
+RATE_LIMIT_TPM = int(os.getenv("RATE_LIMIT_TPM", "1000000"))
+# "auto" limits only live Gemini traffic (gemini/record backends)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "auto").lower()
+# Output tokens reserved per call until the real usage is known
+RATE_LIMIT_OUTPUT_TOKENS = int(os.getenv("RATE_LIMIT_OUTPUT_TOKENS", "2048"))
+# How long to stop granting after the API answers 429 anyway
+RATE_LIMIT_COOLDOWN_S = float(os.getenv("RATE_LIMIT_COOLDOWN_S", "5"))
+
+# Lower value is served first. Router-side calls are on the user's critical
+# path and cheap; the report agents are heavy and can wait a little.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_AGENT = 1
+INTERACTIVE_AGENTS = {"router", "instruction_extractor", "output_processor"}
+
+_session_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_session_id", default=None)
+
+def priority_for(agent: str) -> int:
+    return PRIORITY_INTERACTIVE if agent in INTERACTIVE_AGENTS else PRIORITY_AGENT
+
+@contextlib.contextmanager
+def session_scope(session_id: Optional[str]) -> Iterator[None]:
+    """Attribute model calls made inside the block to a session for fair queuing."""
+    token = _session_var.set(session_id)
+    try:
+        yield
+    finally:
+        _session_var.reset(token)
+
+def current_session_id() -> str:
+    session_id = _session_var.get()
+    if session_id:
+        return session_id
+    # Inside a graph node the thread_id of the running config identifies the session
+    try:
+        from langchain_core.runnables.config import var_child_runnable_config
+        config = var_child_runnable_config.get() or {}
+        thread_id = config.get("configurable", {}).get("thread_id")
+        if thread_id:
+            return str(thread_id)
+    except Exception:
+        pass
+    return "default"
+
+def estimate_request_tokens(prompt: Any) -> int:
+    if isinstance(prompt, str):
+        text = prompt
+    elif isinstance(prompt, (list, tuple)):
+        text = "".join(str(getattr(m, "content", m)) for m in prompt)
+    else:
+        text = str(prompt)
+    # ~4 characters per token for English text
+    return len(text) // 4 + RATE_LIMIT_OUTPUT_TOKENS
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    try:
+        from google.api_core import exceptions as google_exceptions
+        if isinstance(error, google_exceptions.ResourceExhausted):
+            return True
+    except ImportError:
+        pass
+    return "429" in str(error) or "resource exhausted" in str(error).lower()
+
+class _TokenBucket:
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.tokens = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.capacity <= 0
+
+    def refill(self, now: float) -> None:
+        if self.unlimited:
+            return
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        if self.unlimited:
+            return 0.0
+        # A single request larger than the bucket still gets through once it is full
+        amount = min(amount, self.capacity)
+        missing = amount - self.tokens
+        return 0.0 if missing <= 0 else missing / self.rate
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self.tokens -= min(amount, self.capacity)
+
+    def give_back(self, amount: float) -> None:
+        if not self.unlimited:
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+class Ticket:
+    __slots__ = ("session", "priority", "tokens", "enqueued", "granted")
+
+    def __init__(self, session: str, priority: int, tokens: int):
+        self.session = session
+        self.priority = priority
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+        self.granted = False
+
+class RateLimiter:
+    """
+    Token-bucket limiter for requests and tokens per minute, shared by every
+    session in the process. Waiting calls are served strictly by priority,
+    then round-robin across sessions so one busy session cannot starve the
+    others, then FIFO within a session.
+    """
+
+    def __init__(self, rpm: int = RATE_LIMIT_RPM, tpm: int = RATE_LIMIT_TPM,
+                 cooldown_s: float = RATE_LIMIT_COOLDOWN_S):
+        self._cond = threading.Condition()
+        self._requests = _TokenBucket(rpm)
+        self._tokens = _TokenBucket(tpm)
+        self._cooldown_s = cooldown_s
+        self._blocked_until = 0.0
+        # priority -> session -> waiting tickets; dict order is the round-robin order
+        self._queues: Dict[int, "OrderedDict[str, Deque[Ticket]]"] = {
+            PRIORITY_INTERACTIVE: OrderedDict(),
+            PRIORITY_AGENT: OrderedDict(),
+        }
+        self._depth = 0
+        self._max_depth = 0
+        self._granted = {PRIORITY_INTERACTIVE: 0, PRIORITY_AGENT: 0}
+        self._waits = {PRIORITY_INTERACTIVE: deque(maxlen=1000), PRIORITY_AGENT: deque(maxlen=1000)}
+        self._throttled = 0
+
+    def _enqueue(self, ticket: Ticket) -> None:
+        with self._cond:
+            self._queues[ticket.priority].setdefault(ticket.session, deque()).append(ticket)
+            self._depth += 1
+            self._max_depth = max(self._max_depth, self._depth)
+
+    def _remove(self, ticket: Ticket) -> None:
+        queue = self._queues[ticket.priority]
+        session_queue = queue.get(ticket.session)
+        if session_queue is None or ticket not in session_queue:
+            return
+        was_first = session_queue[0] is ticket
+        session_queue.remove(ticket)
+        self._depth -= 1
+        if session_queue:
+            if was_first:
+                # Served this session; the next one in rotation goes first
+                queue.move_to_end(ticket.session)
+        else:
+            del queue[ticket.session]
+
+    def _head(self) -> Optional[Ticket]:
+        for priority in sorted(self._queues):
+            queue = self._queues[priority]
+            if queue:
+                return next(iter(queue.values()))[0]
+        return None
+
+    def _try_grant(self, ticket: Ticket) -> Optional[float]:
+        """Grant the ticket if it is next in line and quota allows. Returns 0 when granted,
+        otherwise seconds until quota frees up, or None when another ticket is ahead."""
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        if self._head() is not ticket:
+            return None
+        self._requests.refill(now)
+        self._tokens.refill(now)
+        wait = max(self._requests.wait_for(1), self._tokens.wait_for(ticket.tokens))
+        if wait > 0:
+            return wait
+        self._requests.take(1)
+        self._tokens.take(ticket.tokens)
+        self._remove(ticket)
+        ticket.granted = True
+        self._granted[ticket.priority] += 1
+        self._waits[ticket.priority].append(now - ticket.enqueued)
+        self._cond.notify_all()
+        return 0.0
+
+    def _abandon(self, ticket: Ticket) -> None:
+        with self._cond:
+            if not ticket.granted:
+                self._remove(ticket)
+                self._cond.notify_all()
+
+    def acquire(self, session: str, priority: int, tokens: int) -> Ticket:
+        ticket = Ticket(session, priority, tokens)
+        self._enqueue(ticket)
+        try:
+            with self._cond:
+                while True:
+                    wait = self._try_grant(ticket)
+                    if wait == 0.0:
+                        return ticket
+                    # Re-check periodically as well: async waiters poll instead of notifying
+                    self._cond.wait(timeout=min(wait, 1.0) if wait is not None else 0.05)
+        finally:
+            self._abandon(ticket)
+
+    async def aacquire(self, session: str, priority: int, tokens: int) -> Ticket:
+        ticket = Ticket(session, priority, tokens)
+        self._enqueue(ticket)
+        try:
+            while True:
+                with self._cond:
+                    wait = self._try_grant(ticket)
+                if wait == 0.0:
+                    return ticket
+                await asyncio.sleep(min(wait, 1.0) if wait is not None else 0.01)
+        finally:
+            self._abandon(ticket)
+
+    def settle(self, ticket: Ticket, response: Any = None, error: Optional[BaseException] = None) -> None:
+        """Reconcile the reserved tokens with real usage, and back off if the API still said 429."""
+        with self._cond:
+            if error is not None and is_rate_limit_error(error):
+                self._throttled += 1
+                self._blocked_until = max(self._blocked_until, time.monotonic() + self._cooldown_s)
+                return
+            usage = getattr(response, "usage_metadata", None) if response is not None else None
+            actual = usage.get("total_tokens") if isinstance(usage, dict) else None
+            if actual is not None:
+                self._tokens.give_back(ticket.tokens - actual)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            self._requests.refill(now)
+            self._tokens.refill(now)
+            per_priority = {}
+            for priority, name in ((PRIORITY_INTERACTIVE, "interactive"), (PRIORITY_AGENT, "agent")):
+                waits = sorted(self._waits[priority])
+                per_priority[name] = {
+                    "granted": self._granted[priority],
+                    "waiting": sum(len(q) for q in self._queues[priority].values()),
+                    "wait_mean_ms": (sum(waits) / len(waits) * 1000) if waits else 0.0,
+                    "wait_p95_ms": waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000 if waits else 0.0,
+                    "wait_max_ms": waits[-1] * 1000 if waits else 0.0,
+                }
+            return {
+                "rpm_limit": int(self._requests.capacity),
+                "tpm_limit": int(self._tokens.capacity),
+                "requests_available": None if self._requests.unlimited else round(self._requests.tokens, 1),
+                "tokens_available": None if self._tokens.unlimited else int(self._tokens.tokens),
+                "queue_depth": self._depth,
+                "max_queue_depth": self._max_depth,
+                "throttled": self._throttled,
+                "cooling_down": now < self._blocked_until,
+                **per_priority,
+            }
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+def get_rate_limiter_stats() -> Dict[str, Any]:
+    if _limiter is None:
+        return {"status": "not_initialized"}
+    return _limiter.stats()
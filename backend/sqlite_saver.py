@@ -0,0 +1,362 @@
+__module_name__ = "sqlite_saver"
+
+import asyncio
+import contextlib
+import os
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from backend.logger import log_agent_action, log_error
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE INDEX IF NOT EXISTS checkpoints_created_at ON checkpoints (thread_id, created_at);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+class SQLiteSaver(BaseCheckpointSaver):
+    """
+    LangGraph checkpointer in a SQLite file (WAL mode), so sessions survive
+    restarts and can be shared by replicas on the same volume.
+
+    - keep_last: checkpoints kept per thread and namespace (0 keeps all)
+    - ttl_s: threads without a new checkpoint for this long are deleted (0 never)
+    - vacuum_interval_s: how often a background thread expires threads and
+      returns free pages to the file system (0 disables it; call maintain())
+    - on_maintain: called with the saver after each expiry pass, e.g. to
+      sweep data the remaining checkpoints no longer refer to
+    """
+
+    def __init__(self, path: str, keep_last: int = 10, ttl_s: float = 0.0,
+                 vacuum_interval_s: float = 600.0, serde=None,
+                 on_maintain: Optional[Callable[["SQLiteSaver"], None]] = None):
+        super().__init__(serde=serde)
+        self.on_maintain = on_maintain
+        self.path = path
+        self.keep_last = keep_last
+        self.ttl_s = ttl_s
+        self.vacuum_interval_s = vacuum_interval_s
+        self._lock = threading.Lock()
+        self._expired_threads = 0
+        self._last_maintenance: Optional[float] = None
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        with self._lock:
+            # auto_vacuum only takes effect on a new database file
+            self._conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.executescript(_SCHEMA)
+        self._stop = threading.Event()
+        self._vacuum_thread = None
+        if vacuum_interval_s > 0:
+            self._vacuum_thread = threading.Thread(target=self._vacuum_loop, name="checkpoint-vacuum", daemon=True)
+            self._vacuum_thread.start()
+
+    @contextlib.contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # Caller holds the lock
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+            self._conn.execute("COMMIT")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    # --- Reads ---
+
+    def _row_to_tuple(self, row: Tuple, writes: List[Tuple]) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id, parent_id, type_, checkpoint, metadata_type, metadata = row
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                     "checkpoint_id": checkpoint_id}},
+            checkpoint=self.serde.loads_typed((type_, checkpoint)),
+            metadata=self.serde.loads_typed((metadata_type, metadata)),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                  "checkpoint_id": parent_id}}
+                if parent_id else None
+            ),
+            pending_writes=[(task_id, channel, self.serde.loads_typed((w_type, value)))
+                            for task_id, channel, w_type, value in writes],
+        )
+
+    def _writes_for(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[Tuple]:
+        return self._conn.execute(
+            "SELECT task_id, channel, type, value FROM writes "
+            "WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                   "metadata_type, metadata FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?")
+        with self._lock:
+            if checkpoint_id := get_checkpoint_id(config):
+                row = self._conn.execute(columns + " AND checkpoint_id = ?",
+                                         (thread_id, checkpoint_ns, checkpoint_id)).fetchone()
+            else:
+                row = self._conn.execute(columns + " ORDER BY checkpoint_id DESC LIMIT 1",
+                                         (thread_id, checkpoint_ns)).fetchone()
+            if row is None:
+                return None
+            writes = self._writes_for(thread_id, checkpoint_ns, row[2])
+        return self._row_to_tuple(row, writes)
+
+    def list(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+             before: Optional[RunnableConfig] = None, limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        query = ("SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, "
+                 "metadata_type, metadata FROM checkpoints")
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            if config["configurable"].get("checkpoint_ns") is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(config["configurable"]["checkpoint_ns"])
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("checkpoint_id = ?")
+                params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            clauses.append("checkpoint_id < ?")
+            params.append(before_id)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY thread_id, checkpoint_ns, checkpoint_id DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            # Metadata is stored serialized, so filtering happens here like in InMemorySaver
+            if filter:
+                metadata = self.serde.loads_typed((row[6], row[7]))
+                if not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                writes = self._writes_for(row[0], row[1], row[2])
+            yield self._row_to_tuple(row, writes)
+
+    # --- Writes ---
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, serialized = self.serde.dumps_typed(checkpoint)
+        metadata_type, serialized_metadata = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock, self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 type_, serialized, metadata_type, serialized_metadata, time.time()),
+            )
+            if self.keep_last > 0:
+                self._prune(thread_id, checkpoint_ns)
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns,
+                                 "checkpoint_id": checkpoint["id"]}}
+
+    def _prune(self, thread_id: str, checkpoint_ns: str) -> None:
+        # Caller holds the lock inside a transaction; checkpoint ids sort by creation time
+        cutoff = self._conn.execute(
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT 1 OFFSET ?",
+            (thread_id, checkpoint_ns, self.keep_last - 1),
+        ).fetchone()
+        if cutoff is None:
+            return
+        for table in ("checkpoints", "writes"):
+            self._conn.execute(
+                f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id < ?",
+                (thread_id, checkpoint_ns, cutoff[0]),
+            )
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                   task_path: str = "") -> None:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, serialized = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx),
+                         channel, type_, serialized, task_path))
+        # Special writes (errors, interrupts) replace earlier ones; regular writes are kept once
+        verb = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        with self._lock:
+            self._conn.executemany(f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self._transaction() as conn:
+            conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+            conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+
+    def clear(self) -> None:
+        """Delete every thread."""
+        with self._lock, self._transaction() as conn:
+            conn.execute("DELETE FROM checkpoints")
+            conn.execute("DELETE FROM writes")
+
+    def has_thread(self, thread_id: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM checkpoints WHERE thread_id = ? LIMIT 1",
+                                      (thread_id,)).fetchone() is not None
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # Same version format as InMemorySaver, so checkpoints can move between the two
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # --- Async variants; SQLite calls are short, so they run in a worker thread ---
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config: Optional[RunnableConfig], *, filter: Optional[Dict[str, Any]] = None,
+                    before: Optional[RunnableConfig] = None,
+                    limit: Optional[int] = None) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for item in items:
+            yield item
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+                   new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str,
+                          task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # --- Retention ---
+
+    def expire_threads(self) -> int:
+        """Delete threads whose newest checkpoint is older than ttl_s. Returns how many were deleted."""
+        if self.ttl_s <= 0:
+            return 0
+        cutoff = time.time() - self.ttl_s
+        with self._lock:
+            expired = [row[0] for row in self._conn.execute(
+                "SELECT thread_id FROM checkpoints GROUP BY thread_id HAVING MAX(created_at) < ?", (cutoff,))]
+            if expired:
+                with self._transaction() as conn:
+                    for thread_id in expired:
+                        conn.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                        conn.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+            self._expired_threads += len(expired)
+        return len(expired)
+
+    def channel_values(self, channels: Iterable[str]) -> Set[Any]:
+        """Every value the stored checkpoints and pending writes hold for the given channels."""
+        channels = set(channels)
+        with self._lock:
+            checkpoints = self._conn.execute("SELECT type, checkpoint FROM checkpoints").fetchall()
+            placeholders = ", ".join("?" * len(channels))
+            writes = self._conn.execute(f"SELECT type, value FROM writes WHERE channel IN ({placeholders})",
+                                        tuple(channels)).fetchall() if channels else []
+        values = set()
+        for row in checkpoints:
+            channel_values = self.serde.loads_typed(row).get("channel_values", {})
+            values.update(channel_values[name] for name in channels if channel_values.get(name) is not None)
+        values.update(value for value in (self.serde.loads_typed(row) for row in writes) if value is not None)
+        return values
+
+    def maintain(self) -> None:
+        """Expire old threads, release free pages and fold the WAL back into the database file."""
+        expired = self.expire_threads()
+        if self.on_maintain is not None:
+            self.on_maintain(self)
+        with self._lock:
+            # execute() would step the pragma once and free a single page; executescript runs it to the end
+            self._conn.executescript("PRAGMA incremental_vacuum;")
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._last_maintenance = time.time()
+        if expired:
+            log_agent_action("checkpointer", "Expired idle threads", {"threads": f"{expired}"})
+
+    def _vacuum_loop(self) -> None:
+        while not self._stop.wait(self.vacuum_interval_s):
+            try:
+                self.maintain()
+            except Exception as e:
+                log_error("checkpointer", f"Checkpoint maintenance failed: {e}")
+
+    def close(self) -> None:
+        self._stop.set()
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            threads, checkpoints = self._conn.execute(
+                "SELECT COUNT(DISTINCT thread_id), COUNT(*) FROM checkpoints").fetchone()
+            writes = self._conn.execute("SELECT COUNT(*) FROM writes").fetchone()[0]
+            free_pages = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+            page_size = self._conn.execute("PRAGMA page_size").fetchone()[0]
+        file_bytes = {suffix or "db": os.path.getsize(self.path + suffix)
+                      for suffix in ("", "-wal") if os.path.exists(self.path + suffix)}
+        return {
+            "path": self.path,
+            "threads": threads,
+            "checkpoints": checkpoints,
+            "writes": writes,
+            "bytes_on_disk": sum(file_bytes.values()),
+            "wal_bytes": file_bytes.get("-wal", 0),
+            "free_bytes": free_pages * page_size,
+            "keep_last": self.keep_last,
+            "ttl_s": self.ttl_s,
+            "expired_threads": self._expired_threads,
+            "last_maintenance": self._last_maintenance,
+        }
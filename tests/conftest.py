@@ -0,0 +1,9 @@
+import os
+import sys
+
+# Offline model backend, no latency and no on-disk response cache
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("FAKE_LLM_LATENCY", "fixed:0")
+os.environ.setdefault("LLM_CACHE_ENABLED", "false")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,43 @@
+from agents.profile_analyzer import FALLBACK_REPORT
+from backend.orchestrator import agent_memo, handlers
+from backend.orchestrator.state_schema import ProfileBotState
+
+PROFILE = {"firstName": "Test", "lastName": "User", "headline": "Analyst"}
+
+class _FailingModel:
+    def invoke(self, prompt):
+        raise RuntimeError("429 Resource exhausted")
+
+def _state(session_id="memo-test"):
+    state = ProfileBotState(session_id=session_id, user_input="Analyze my LinkedIn profile")
+    state.linkedin_data = PROFILE
+    return state
+
+def test_fallback_report_is_not_memoized():
+    state = _state("memo-fallback")
+    agent_memo.remember(state, "analyze", FALLBACK_REPORT)
+    assert not agent_memo.memoized(state, "analyze")
+    assert agent_memo.recall(state, "analyze") is None
+
+def test_report_is_recalled_for_unchanged_inputs():
+    state = _state("memo-hit")
+    agent_memo.remember(state, "analyze", "# Analysis\nSolid profile.")
+    assert agent_memo.recall(state, "analyze") == "# Analysis\nSolid profile."
+    state.linkedin_data = {**PROFILE, "headline": "Director"}
+    assert agent_memo.recall(state, "analyze") is None
+
+def test_requested_update_bypasses_memo():
+    state = _state("memo-update")
+    agent_memo.remember(state, "analyze", "# Analysis")
+    state.user_requested_update = True
+    assert agent_memo.recall(state, "analyze") is None
+
+def test_failed_analysis_is_rerun_once_the_model_recovers(monkeypatch):
+    monkeypatch.setattr(handlers.analyzer, "model", _FailingModel())
+    failed = handlers.analyze_node(_state("memo-recover"))
+    assert failed.profile_analysis_report == FALLBACK_REPORT
+
+    monkeypatch.undo()
+    recovered = handlers.analyze_node(_state("memo-recover"))
+    assert recovered.profile_analysis_report
+    assert recovered.profile_analysis_report != FALLBACK_REPORT
@@ -0,0 +1,53 @@
+import contextlib
+import io
+
+from langgraph.checkpoint.memory import InMemorySaver
+
+from backend import blob_store, memory
+from backend.checkpoint_serde import get_checkpoint_serde
+from backend.orchestrator import agent_memo
+from backend.orchestrator.langgraph_graph import build_graph
+from backend.orchestrator.report_deps import invalidate_stale, record_provenance
+from backend.orchestrator.state_schema import ProfileBotState
+
+PROFILE = {"firstName": "Sweep", "lastName": "Test", "headline": "Engineer"}
+
+def test_memory_sweep_keeps_live_refs(monkeypatch):
+    saver = InMemorySaver(serde=get_checkpoint_serde())
+    graph = build_graph().compile(checkpointer=saver)
+    state = ProfileBotState(session_id="sweep-session", user_input="Hi, what can you do?")
+    state.linkedin_data = PROFILE
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph.invoke(state.model_dump(), config={"configurable": {"thread_id": "sweep-session"}})
+
+    memo_state = ProfileBotState(session_id="sweep-memo")
+    memo_state.linkedin_data = {**PROFILE, "headline": "Memo"}
+    agent_memo.remember(memo_state, "analyze", "# Analysis\nKept by the memo.")
+    memo_ref = agent_memo.live_refs()[-1]
+    orphan_ref = blob_store.put_value("# Analysis\nNo checkpoint refers to this.")
+
+    # Everything is past the grace period
+    monkeypatch.setattr(blob_store, "BLOB_SWEEP_GRACE_S", -60)
+    memory._sweep_blobs(saver)
+
+    store = blob_store.get_blob_store()
+    assert store.get(state.linkedin_data_ref) is not None
+    assert store.get(memo_ref) is not None
+    assert store.get(orphan_ref) is None
+
+def test_report_swept_under_a_live_ref_is_invalidated(monkeypatch):
+    state = ProfileBotState(session_id="sweep-race")
+    state.linkedin_data = {**PROFILE, "headline": "Race"}
+    state.profile_analysis_report = "# Analysis\nSwept before its checkpoint was written."
+    state.analysis_completed = state.is_profile_analyzed = True
+    record_provenance(state, "analyze")
+
+    # The sweep ran without seeing this state's refs, and the text cache is another replica's
+    monkeypatch.setattr(blob_store, "BLOB_SWEEP_GRACE_S", -60)
+    blob_store.sweep_blobs([state.linkedin_data_ref])
+    monkeypatch.setattr(blob_store, "_text_cache", type(blob_store._text_cache)())
+
+    assert invalidate_stale(state) == ["analyze"]
+    assert state.profile_analysis_report_ref is None
+    assert not state.analysis_completed and not state.is_profile_analyzed
+    assert state.linkedin_data == {**PROFILE, "headline": "Race"}
@@ -0,0 +1,86 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from backend import call_policy
+from backend.call_policy import CallDeadlineExceeded, CallPolicy, attempt_abandoned
+
+def test_attempt_runs_inline_without_hedging_or_deadline():
+    policy = CallPolicy(hedging=False, deadline_s=0)
+    assert policy.run(lambda: threading.current_thread().name) == threading.current_thread().name
+
+def test_deadline_bounds_a_hung_call():
+    policy = CallPolicy(max_attempts=1, deadline_s=0.2, hedging=False)
+    release = threading.Event()
+    start = time.monotonic()
+    with pytest.raises(CallDeadlineExceeded):
+        policy.run(lambda: release.wait(5) and "late", "hung")
+    assert time.monotonic() - start < 1
+    release.set()
+
+def test_deadline_abandons_running_attempts():
+    policy = CallPolicy(max_attempts=1, deadline_s=0.2, hedging=True, hedge_min_samples=1)
+    policy._observe("slow", 0.05)
+    finished = []
+    release = threading.Event()
+
+    def slow_call():
+        release.wait(5)
+        finished.append(attempt_abandoned())
+        return "late"
+
+    with pytest.raises(CallDeadlineExceeded):
+        policy.run(slow_call, "slow")
+    release.set()
+    deadline = time.monotonic() + 5
+    while len(finished) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The primary and its hedge both outlived the deadline; neither result may be used
+    assert finished == [True, True]
+    assert policy.stats()["abandoned"] == 2
+
+def test_async_deadline_flags_cancelled_attempts():
+    policy = CallPolicy(max_attempts=1, deadline_s=0.2, hedging=True, hedge_min_samples=1)
+    policy._observe("slow", 0.05)
+    seen = []
+
+    async def slow_call():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            seen.append(attempt_abandoned())
+            raise
+        return "late"
+
+    with pytest.raises(CallDeadlineExceeded):
+        asyncio.run(policy.arun(slow_call, "slow"))
+    assert seen == [True, True]
+
+class _Limiter:
+    def __init__(self):
+        self.settled = []
+
+    def settle(self, ticket, response=None, error=None):
+        self.settled.append((response, error))
+
+def _abandoned_attempt(fn):
+    # Run fn as if the policy had given up on its attempt
+    context = contextvars.copy_context()
+    flag = threading.Event()
+    flag.set()
+    context.run(call_policy._abandoned.set, flag)
+    return context.run(fn)
+
+def test_abandoned_response_is_not_settled_but_429_is():
+    from backend.llm import _settle
+    limiter = _Limiter()
+    _abandoned_attempt(lambda: _settle(limiter, "ticket", "late response"))
+    assert limiter.settled == []
+    error = RuntimeError("429 Resource exhausted")
+    _abandoned_attempt(lambda: _settle(limiter, "ticket", error=error))
+    assert limiter.settled == [(None, error)]
+    _settle(limiter, "ticket", "response")
+    assert limiter.settled[-1] == ("response", None)
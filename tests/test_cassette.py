@@ -0,0 +1,38 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from backend import call_policy, cassette
+from backend.fake_llm import FakeChatModel
+
+@pytest.fixture
+def recorder(tmp_path, monkeypatch):
+    monkeypatch.setattr(cassette, "_cassette", cassette.Cassette(str(tmp_path / "session.jsonl")))
+    inner = FakeChatModel(model="fake", temperature=0.0, top_p=0.9)
+    return cassette.RecordingChatModel(inner=inner, model="fake", temperature=0.0, top_p=0.9)
+
+def _abandoned(fn):
+    # Run fn as if the call policy had given up on its attempt (deadline or a faster hedge)
+    context = contextvars.copy_context()
+    flag = threading.Event()
+    flag.set()
+    context.run(call_policy._abandoned.set, flag)
+    return context.run(fn)
+
+def test_live_attempts_are_recorded(recorder):
+    recorder.invoke("Summarize this conversation")
+    asyncio.run(recorder.ainvoke("Summarize this conversation"))
+    list(recorder.stream("Summarize this conversation"))
+    assert cassette.get_cassette().recorded == 3
+
+def test_abandoned_attempts_are_not_recorded(recorder):
+    _abandoned(lambda: recorder.invoke("Summarize this conversation"))
+    _abandoned(lambda: asyncio.run(recorder.ainvoke("Summarize this conversation")))
+    _abandoned(lambda: list(recorder.stream("Summarize this conversation")))
+    _abandoned(lambda: asyncio.run(_drain(recorder.astream("Summarize this conversation"))))
+    assert cassette.get_cassette().recorded == 0
+
+async def _drain(stream):
+    return [chunk async for chunk in stream]
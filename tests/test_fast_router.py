@@ -0,0 +1,35 @@
+from backend.orchestrator.fast_router import fast_route
+from backend.orchestrator.report_deps import record_provenance
+from backend.orchestrator.state_schema import ProfileBotState
+
+URL = "https://www.linkedin.com/in/test-user/"
+PROFILE = {"firstName": "Test", "lastName": "User", "headline": "Analyst"}
+
+def _pasted(analyzed=True):
+    state = ProfileBotState(session_id="fast-url", user_input=URL, linkedin_url=URL)
+    state.linkedin_data = PROFILE
+    if analyzed:
+        state.profile_analysis_report = "# Analysis"
+        state.analysis_completed = state.is_profile_analyzed = True
+        record_provenance(state, "analyze")
+    return state
+
+def test_first_paste_analyzes_afresh():
+    decision = fast_route(_pasted(analyzed=False))
+    assert decision["fast_path_rule"] == "linkedin_url"
+    assert decision["user_requested_update"]
+
+def test_same_profile_pasted_again_does_not_force_update():
+    decision = fast_route(_pasted())
+    assert decision["current_router_action"] == "CALL_ANALYZE"
+    assert not decision["user_requested_update"]
+
+def test_changed_profile_forces_update():
+    state = _pasted()
+    state.linkedin_data = {**PROFILE, "headline": "Senior Analyst"}
+    assert fast_route(state)["user_requested_update"]
+
+def test_other_url_forces_update():
+    state = _pasted()
+    state.user_input = "https://www.linkedin.com/in/someone-else/"
+    assert fast_route(state)["user_requested_update"]
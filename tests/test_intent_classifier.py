@@ -0,0 +1,42 @@
+from backend.orchestrator.intent_classifier import IntentClassifier, load_examples, parse_router_log
+
+LOG = """\
+10:00:01 | ROUTER: Decision -> CALL_ANALYZE | Input: 'Analyze my LinkedIn profile' | State: [initial] | Source: llm/gemini
+10:00:02 | ROUTER: Decision -> CALL_JOB_FIT | Input: 'How well do I fit this job?' | State: [is_profile_analyzed] | Source: llm/gemini
+10:00:03 | ROUTER: Decision -> CALL_ANALYZE | Input: 'Please analyze my profile' | State: [initial] | Source: llm/record
+10:00:04 | ROUTER: Decision -> CALL_JOB_FIT | Input: 'Evaluate my fit for this role' | State: [is_profile_analyzed] | Source: llm/gemini
+10:00:05 | ROUTER: Decision -> CALL_REWRITE | Input: 'yes' | State: [awaiting_user_confirmation] | Source: fast_path/gemini
+10:00:06 | ROUTER: Decision -> CALL_GUIDE | Input: 'What should I learn next?' | State: [initial] | Source: classifier/gemini
+10:00:07 | ROUTER: Decision -> CALL_GUIDE | Input: 'What should I learn next?' | State: [initial] | Source: llm/fake
+10:00:08 | ROUTER: Decision -> RESPOND_DIRECTLY | Input: 'hello' | State: [initial]
+10:00:09 | ROUTER: Decision -> CALL_JOB_FIT | Input: 'Job summary:
+we need a data analyst' | State: [is_profile_analyzed] | Source: llm/gemini
+"""
+
+def _write_log(tmp_path):
+    path = tmp_path / "agent_actions_test.log"
+    path.write_text(LOG, encoding="utf-8")
+    return str(path)
+
+def test_parse_keeps_only_live_model_decisions(tmp_path):
+    examples = parse_router_log(_write_log(tmp_path))
+    assert [ex["action"] for ex in examples] == [
+        "CALL_ANALYZE", "CALL_JOB_FIT", "CALL_ANALYZE", "CALL_JOB_FIT", "RESPOND_DIRECTLY", "CALL_JOB_FIT"]
+    assert examples[0]["flags"] == []
+    assert examples[1]["flags"] == ["is_profile_analyzed"]
+    assert examples[-1]["user_input"] == "Job summary:\nwe need a data analyst"
+
+def test_untagged_entries_count_as_model_decisions(tmp_path):
+    # Logged before decisions carried their source
+    path = tmp_path / "agent_actions_old.log"
+    path.write_text("09:00:00 | ROUTER: Decision -> CALL_GUIDE | Input: 'Career advice please' | State: [initial]\n",
+                    encoding="utf-8")
+    assert parse_router_log(str(path)) == [
+        {"user_input": "Career advice please", "flags": [], "action": "CALL_GUIDE"}]
+
+def test_train_on_log_sample(tmp_path):
+    examples = load_examples([_write_log(tmp_path)])
+    model = IntentClassifier.train(examples)
+    assert model.classes == ["CALL_ANALYZE", "CALL_JOB_FIT", "RESPOND_DIRECTLY"]
+    assert model.predict("Analyze my LinkedIn profile", [])[0] == "CALL_ANALYZE"
+    assert model.predict("How well do I fit this job?", ["is_profile_analyzed"])[0] == "CALL_JOB_FIT"
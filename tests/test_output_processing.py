@@ -0,0 +1,35 @@
+import pytest
+
+from backend.orchestrator import handlers
+from backend.orchestrator.fast_router import fast_route
+from backend.orchestrator.state_schema import ProfileBotState
+
+REPORT = "# Profile Analysis\n\n**Overall Score: 72/100**\n\n## Strengths\n\n## Gaps\n"
+
+@pytest.fixture(autouse=True)
+def _template_mode(monkeypatch):
+    monkeypatch.setattr(handlers, "OUTPUT_PROCESSING_MODE", "template")
+
+def _finished(agent):
+    state = ProfileBotState(session_id=f"template-{agent}")
+    state.linkedin_data = {"firstName": "Test", "headline": "Analyst"}
+    state.is_profile_analyzed = state.analysis_completed = True
+    state.profile_analysis_report = state.pending_agent_output = REPORT
+    state.last_agent_called = agent
+    state.needs_output_processing = True
+    return handlers.process_agent_output_node(state)
+
+def test_template_reply_records_offered_next_step():
+    state = _finished("analyze")
+    assert state.current_bot_response.endswith("Would you like me to do that?")
+    assert state.awaiting_user_confirmation
+    assert state.proposed_next_action == "rewrite"
+
+    state.user_input = "yes"
+    decision = fast_route(state)
+    assert decision["fast_path_rule"] == "confirm_yes"
+    assert decision["current_router_action"] == "CALL_REWRITE"
+
+def test_template_reply_without_offer_leaves_confirmation_unset():
+    state = _finished("guide")
+    assert not state.awaiting_user_confirmation
@@ -0,0 +1,51 @@
+from backend.orchestrator.report_deps import invalidate_stale, is_stale, record_provenance, was_invalidated
+from backend.orchestrator.state_schema import ProfileBotState
+
+PROFILE = {"firstName": "Test", "lastName": "User", "headline": "Analyst"}
+
+def _state_with_reports():
+    state = ProfileBotState(session_id="deps-test", target_role="Data Scientist")
+    state.linkedin_data = PROFILE
+    state.target_job_description = "Data scientist, 3+ years of Python and SQL."
+    state.profile_analysis_report = "# Analysis"
+    state.analysis_completed = state.is_profile_analyzed = True
+    record_provenance(state, "analyze")
+    state.content_rewrites_suggestions = "# Rewrites"
+    state.rewrite_completed = True
+    record_provenance(state, "rewrite")
+    state.job_fit_evaluation_report = "# Job Fit"
+    state.job_fit_completed = True
+    record_provenance(state, "job_fit")
+    state.career_guidance_notes = "# Guidance"
+    state.guidance_completed = True
+    record_provenance(state, "guide")
+    return state
+
+def test_unchanged_inputs_keep_every_report():
+    state = _state_with_reports()
+    assert invalidate_stale(state) == []
+    assert state.profile_analysis_report == "# Analysis"
+
+def test_profile_update_invalidates_everything_downstream():
+    state = _state_with_reports()
+    state.linkedin_data = {**PROFILE, "headline": "Senior Analyst"}
+    assert is_stale(state, "analyze") and is_stale(state, "rewrite")
+    # job_fit and guide only read the analysis, and go stale once it is dropped
+    assert not is_stale(state, "job_fit")
+
+    assert invalidate_stale(state) == ["analyze", "rewrite", "job_fit", "guide"]
+    assert state.profile_analysis_report is None and not state.analysis_completed
+    assert not state.is_profile_analyzed
+    assert state.job_fit_evaluation_report is None and not state.job_fit_completed
+    assert was_invalidated(state, "analyze")
+
+    state.profile_analysis_report = "# Fresh analysis"
+    record_provenance(state, "analyze")
+    assert not was_invalidated(state, "analyze")
+
+def test_job_description_update_invalidates_only_job_fit():
+    state = _state_with_reports()
+    state.target_job_description = "Staff data scientist, causal inference."
+    assert invalidate_stale(state) == ["job_fit"]
+    assert state.profile_analysis_report == "# Analysis"
+    assert state.career_guidance_notes == "# Guidance"
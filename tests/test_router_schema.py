@@ -0,0 +1,24 @@
+from agents.router import RoutingAgent, gemini_response_schema, structured_generation_config
+from agents.schemas import FusedRouterDecision, RouterDecision
+
+def test_response_schema_inlines_refs_and_nullables():
+    schema = gemini_response_schema(FusedRouterDecision.model_json_schema())
+    properties = schema["properties"]
+    assert schema["type_"] == "OBJECT"
+    assert properties["current_router_action"]["enum"][0] == "INITIAL_WELCOME"
+    assert properties["last_agent_called"] == {
+        "type_": "STRING", "enum": ["analyze", "rewrite", "job_fit", "guide"], "format_": "enum", "nullable": True}
+    assert properties["user_instructions"]["nullable"]
+    assert properties["user_instructions"]["properties"]["style_preferences"]["items"] == {"type_": "STRING"}
+    assert schema["required"] == ["current_router_action", "current_bot_response"]
+
+def test_generation_config_is_accepted_by_gemini_types():
+    from google.ai.generativelanguage_v1beta.types import GenerationConfig
+    config = GenerationConfig(**structured_generation_config(RouterDecision))
+    assert config.response_mime_type == "application/json"
+    assert "current_router_action" in config.response_schema.properties
+
+def test_text_fallback_still_parses_free_form_json():
+    agent = RoutingAgent()
+    parsed = agent._parse_route('```json\n{"current_router_action": "CALL_ANALYZE", "current_bot_response": "On it"}\n```')
+    assert parsed["current_router_action"] == "CALL_ANALYZE"
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from backend.orchestrator import speculation
+from backend.orchestrator.state_schema import ProfileBotState
+
+@pytest.fixture(autouse=True)
+def _enabled(monkeypatch):
+    monkeypatch.setattr(speculation, "SPECULATIVE_AGENTS", True)
+
+def _rewrite(profile, done=None):
+    if done is not None:
+        done.wait(5)
+    return f"Rewrite of {profile}"
+
+def test_result_is_adopted_for_same_inputs():
+    state = ProfileBotState(session_id="spec-hit")
+    speculation.speculate(state, "rewrite", _rewrite, {"profile": "v1"})
+    assert speculation.take(state, "rewrite", {"profile": "v1"}) == "Rewrite of v1"
+    assert "spec-hit" not in speculation._slots
+
+def test_input_change_discards_slot():
+    state = ProfileBotState(session_id="spec-inputs")
+    speculation.speculate(state, "rewrite", _rewrite, {"profile": "v1"})
+    assert speculation.take(state, "rewrite", {"profile": "v2"}) is None
+    assert "spec-inputs" not in speculation._slots
+
+def test_other_agent_discards_slot():
+    state = ProfileBotState(session_id="spec-agent")
+    speculation.speculate(state, "rewrite", _rewrite, {"profile": "v1"})
+    assert speculation.take(state, "job_fit", {"profile": "v1"}) is None
+    assert "spec-agent" not in speculation._slots
+
+def test_routing_elsewhere_discards_slot():
+    state = ProfileBotState(session_id="spec-route")
+    speculation.speculate(state, "rewrite", _rewrite, {"profile": "v1"})
+    speculation.discard_unless(state, "rewrite")
+    assert "spec-route" in speculation._slots
+    speculation.discard_unless(state, None)
+    assert "spec-route" not in speculation._slots
+
+def test_reap_expired_drops_abandoned_slots(monkeypatch):
+    done = threading.Event()
+    state = ProfileBotState(session_id="spec-abandoned")
+    speculation.speculate(state, "rewrite", _rewrite, {"profile": "v1", "done": done})
+    monkeypatch.setattr(speculation, "SPECULATION_TTL_S", -1)
+    assert speculation.reap_expired() >= 1
+    assert "spec-abandoned" not in speculation._slots
+    done.set()
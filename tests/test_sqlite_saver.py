@@ -0,0 +1,33 @@
+import contextlib
+import io
+
+from backend.orchestrator.langgraph_graph import build_graph
+from backend.orchestrator.state_schema import ProfileBotState
+from backend.sqlite_saver import SQLiteSaver
+
+def _run_turn(graph, session_id):
+    state = ProfileBotState(session_id=session_id, user_input="Hi, what can you do?")
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph.invoke(state.model_dump(), config={"configurable": {"thread_id": session_id}})
+
+def test_delete_thread_keeps_other_sessions(tmp_path):
+    saver = SQLiteSaver(str(tmp_path / "checkpoints.sqlite"), vacuum_interval_s=0)
+    graph = build_graph().compile(checkpointer=saver)
+    _run_turn(graph, "session-a")
+    _run_turn(graph, "session-b")
+
+    saver.delete_thread("session-a")
+
+    assert not saver.has_thread("session-a")
+    assert saver.has_thread("session-b")
+    state = graph.get_state({"configurable": {"thread_id": "session-b"}})
+    assert state.values["conversation_history"]
+    saver.close()
+
+def test_keep_last_prunes_checkpoints(tmp_path):
+    saver = SQLiteSaver(str(tmp_path / "checkpoints.sqlite"), keep_last=2, vacuum_interval_s=0)
+    graph = build_graph().compile(checkpointer=saver)
+    for _ in range(3):
+        _run_turn(graph, "session-a")
+    assert len(list(saver.list({"configurable": {"thread_id": "session-a"}}))) == 2
+    saver.close()